@@ -0,0 +1,123 @@
+import asyncio
+import functools
+import logging
+import time
+
+
+class _Actor:
+    __slots__ = ("queue", "task")
+
+    def __init__(self):
+        self.queue = asyncio.Queue()
+        self.task = None
+
+
+# Mailbox per chat: update dari chat yang sama diproses berurutan,
+# chat yang berbeda jalan paralel. Actor yang nganggur dibuang sendiri.
+# Update dari submit() dibatasi max_queued di semua mailbox (antre + sedang jalan).
+class ChatActors:
+    def __init__(self, idle_timeout=60, max_queued=10000):
+        self.idle_timeout = idle_timeout
+        self.max_queued = max_queued
+        self._space = asyncio.Semaphore(max_queued)
+        self._actors = {}
+        self.processed = 0
+        self.reclaimed = 0
+        self.failed = 0
+        self._pending = 0  # antre + sedang jalan, untuk join()
+        self._idle = None
+
+    def _put(self, chat_id, item):
+        actor = self._actors.get(chat_id)
+        if actor is None:
+            actor = self._actors[chat_id] = _Actor()
+            actor.task = asyncio.create_task(self._worker(chat_id, actor))
+        self._pending += 1
+        actor.queue.put_nowait(item)
+
+    # Jalankan di actor chat dan tunggu hasilnya (timer, reaper)
+    async def run(self, chat_id, fn, *args):
+        future = asyncio.get_running_loop().create_future()
+        self._put(chat_id, (fn, args, future))
+        return await future
+
+    # Masukkan ke antrean chat tanpa menunggu hasilnya, exception cuma di-log. Kalau sudah
+    # max_queued update antre, tunggu sampai ada yang selesai: worker webhook ikut tertahan,
+    # antreannya penuh lalu Telegram dapat 503, jadi banjir update tidak menumpuk di memori.
+    async def submit(self, chat_id, fn, *args):
+        await self._space.acquire()
+        self._put(chat_id, (fn, args, None))
+
+    async def _worker(self, chat_id, actor):
+        while True:
+            try:
+                fn, args, future = await asyncio.wait_for(actor.queue.get(), self.idle_timeout)
+            except asyncio.TimeoutError:
+                # Tidak ada await antara cek dan hapus, jadi aman dari race
+                if actor.queue.empty():
+                    del self._actors[chat_id]
+                    self.reclaimed += 1
+                    return
+                continue
+
+            try:
+                if future is not None and future.cancelled():
+                    continue
+                try:
+                    result = await fn(*args)
+                except Exception as e:
+                    if future is None:
+                        self.failed += 1
+                        logging.exception(f"Gagal memproses update chat {chat_id}")
+                    elif not future.done():
+                        future.set_exception(e)
+                else:
+                    if future is not None and not future.done():
+                        future.set_result(result)
+                self.processed += 1
+            finally:
+                if future is None:
+                    self._space.release()
+                self._done()
+
+    def _done(self):
+        self._pending -= 1
+        if not self._pending and self._idle is not None:
+            self._idle.set()
+
+    # Tunggu sampai semua antrean actor kosong (dipakai bench / load test)
+    async def join(self):
+        while self._pending:
+            self._idle = asyncio.Event()
+            await self._idle.wait()
+
+    # Bungkus handler PTB supaya dijalankan di actor milik chat-nya. Update cuma dimasukkan ke
+    # antrean lalu return: slot concurrent_updates PTB / worker webhook tidak ikut tertahan oleh
+    # chat yang sedang ramai, kecuali semua mailbox sudah penuh (max_queued).
+    def wrap(self, handler):
+        @functools.wraps(handler)
+        async def wrapped(update, context):
+            # Catat waktu terima sebelum antre, dipakai untuk urutan jawaban
+            context.received_at = time.monotonic()
+            chat = update.effective_chat
+            if chat is None:
+                return await handler(update, context)
+            await self.submit(chat.id, handler, update, context)
+        return wrapped
+
+    def stats(self):
+        return {
+            "actors": len(self._actors),
+            "queued": sum(a.queue.qsize() for a in self._actors.values()),
+            "processed": self.processed,
+            "failed": self.failed,
+            "reclaimed": self.reclaimed,
+        }
+
+    async def stop(self):
+        for actor in list(self._actors.values()):
+            actor.task.cancel()
+        self._actors.clear()
+        self._pending = 0
+        self._space = asyncio.Semaphore(self.max_queued)
+        logging.info(f"actors: {self.stats()}")
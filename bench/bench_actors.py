@@ -0,0 +1,47 @@
+# Benchmark throughput: proses update satu-satu vs paralel lewat actor per chat
+# Jalankan: python bench/bench_actors.py [jumlah_chat] [update_per_chat] [latency_ms]
+import asyncio
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from actors import ChatActors
+
+
+async def main(chats=200, per_chat=20, latency_ms=20):
+    random.seed(1)
+    updates = [(chat, seq) for seq in range(per_chat) for chat in range(chats)]
+    latency = latency_ms / 1000
+    seen = {}
+
+    # Handler tiruan: sedikit CPU + 1x panggilan Bot API
+    async def handler(chat, seq):
+        sum(range(200))
+        await asyncio.sleep(latency * random.uniform(0.5, 1.5))
+        seen.setdefault(chat, []).append(seq)
+
+    started = time.perf_counter()
+    for chat, seq in updates[: chats * 2]:
+        await handler(chat, seq)
+    sequential = (time.perf_counter() - started) / (chats * 2)
+    print(f"sequential  {1 / sequential:10.0f} updates/s (diukur dari {chats * 2} update)")
+
+    seen.clear()
+    actors = ChatActors(idle_timeout=1)
+    started = time.perf_counter()
+    await asyncio.gather(*(actors.run(chat, handler, chat, seq) for chat, seq in updates))
+    elapsed = time.perf_counter() - started
+    print(f"actors      {len(updates) / elapsed:10.0f} updates/s ({len(updates)} update, {chats} chat)")
+
+    in_order = all(seqs == sorted(seqs) for seqs in seen.values())
+    print(f"urutan per chat terjaga: {in_order}, actor aktif: {actors.stats()['actors']}")
+    await asyncio.sleep(1.2)
+    print(f"setelah idle: {actors.stats()}")
+
+
+if __name__ == "__main__":
+    args = [int(x) for x in sys.argv[1:]]
+    asyncio.run(main(*args))
@@ -0,0 +1,107 @@
+# Ukur latency update -> balasan untuk mode polling vs webhook, semua di 1 mesin.
+# Update dikirim dengan laju tetap supaya yang terukur jalur ingest, bukan antrean burst.
+# Jalankan: python bench/bench_ingress.py [jumlah_update] [update_per_detik]
+import asyncio
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# Jalan di folder sementara supaya file data asli tidak tersentuh
+os.chdir(tempfile.mkdtemp())
+shutil.copy(os.path.join(ROOT, "questions.json"), "questions.json")
+os.environ.setdefault("SHEET_URL", "http://127.0.0.1:9/offline.csv")
+
+import main
+from fakebot import FakeTelegram, command
+from webhook import WebhookServer
+
+TOKEN = "123456:TEST"
+SECRET = "bench-secret"
+
+
+async def measure(fake, count, rate):
+    sent_at = {}
+    replied = {}
+    done = asyncio.Event()
+
+    def on_call(method, params, now):
+        if method == "sendMessage":
+            chat_id = int(params["chat_id"])
+            if chat_id in sent_at and chat_id not in replied:
+                replied[chat_id] = now
+                if len(replied) == count:
+                    done.set()
+
+    fake.on_call = on_call
+    started = time.perf_counter()
+    for i in range(count):
+        chat_id = -1000 - i
+        delay = started + i / rate - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        sent_at[chat_id] = time.perf_counter()
+        await fake.push(command(chat_id, 10 + i % 50, "/myscore"))
+    await asyncio.wait_for(done.wait(), 60)
+    elapsed = time.perf_counter() - started
+    fake.on_call = None
+
+    latencies = sorted((replied[c] - sent_at[c]) * 1000 for c in sent_at)
+    return {
+        "p50": statistics.median(latencies),
+        "p99": latencies[int(len(latencies) * 0.99) - 1],
+        "throughput": count / elapsed,
+    }
+
+
+async def run_polling(count, rate):
+    fake = FakeTelegram()
+    await fake.start(port=8081)
+    app = main.build_app(TOKEN, fake.url)
+    await app.initialize()
+    await app.start()
+    await app.updater.start_polling(poll_interval=0, timeout=10)
+    try:
+        return await measure(fake, count, rate)
+    finally:
+        await app.updater.stop()
+        await app.stop()
+        await app.shutdown()
+        await fake.stop()
+
+
+async def run_webhook(count, rate):
+    fake = FakeTelegram()
+    await fake.start(port=8081)
+    app = main.build_app(TOKEN, fake.url)
+    await app.initialize()
+    await app.start()
+    server = WebhookServer(app, "/webhook", SECRET, queue_size=10000, workers=main.CONCURRENT_UPDATES)
+    await server.start("127.0.0.1", 8082)
+    await app.bot.set_webhook("http://127.0.0.1:8082/webhook", secret_token=SECRET)
+    try:
+        return await measure(fake, count, rate)
+    finally:
+        await server.stop()
+        await app.stop()
+        await app.shutdown()
+        await fake.stop()
+
+
+def report(name, result):
+    print(f"{name:8s} p50 {result['p50']:7.2f} ms  p99 {result['p99']:7.2f} ms  {result['throughput']:7.0f} update/s")
+
+
+async def amain(count=500, rate=100):
+    report("polling", await run_polling(count, rate))
+    report("webhook", await run_webhook(count, rate))
+
+
+if __name__ == "__main__":
+    asyncio.run(amain(*[int(x) for x in sys.argv[1:]]))
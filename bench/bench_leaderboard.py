@@ -0,0 +1,87 @@
+# Benchmark leaderboard & /myscore: sort seluruh dict grup (cara lama) vs ScoreStore (memori) vs SQLite berindeks
+# Jalankan: python bench/bench_leaderboard.py
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from scorestore import ScoreStore, SqliteScoreStore
+from windows import period_key
+
+
+async def timed(n, fn, *args):
+    started = time.perf_counter()
+    for _ in range(n):
+        await fn(*args)
+    return (time.perf_counter() - started) / n * 1000
+
+
+async def run(directory, rng):
+    journal = ScoreStore(os.path.join(directory, "scores_db.json"), compact_bytes=1 << 30)
+    sqlite = SqliteScoreStore(os.path.join(directory, "scores.sqlite3"))
+    chat_id = -100
+    size = 0
+    for target in (1000, 10000, 100000):
+        # Isi grup sampai target pemain, 1 transaksi per 1000 pemain
+        while size < target:
+            deltas = {10**8 + size + i: rng.randrange(10000) for i in range(1000)}
+            journal.append(chat_id, deltas)
+            await sqlite.add(chat_id, deltas)
+            size += 1000
+        user_id = 10**8 + rng.randrange(size)
+
+        async def old_leaderboard():
+            sorted(journal.scores[str(chat_id)].items(), key=lambda x: x[1], reverse=True)
+
+        n = 20 if size >= 100000 else 100
+        old = await timed(n, old_leaderboard)
+        mem_top = await timed(n, journal.top, chat_id, 20, 0)
+        mem_lookup = await timed(n, journal.lookup, chat_id, user_id)
+        sql_top = await timed(n, sqlite.top, chat_id, 20, 0)
+        sql_lookup = await timed(n, sqlite.lookup, chat_id, user_id)
+        sql_add = await timed(n, sqlite.add, chat_id, {user_id + i: 3 for i in range(8)})
+        print(f"{size:6d} pemain: sort lama {old:7.2f} ms | memori top20 {mem_top:7.2f} ms, rank {mem_lookup:6.2f} ms "
+              f"| sqlite top20 {sql_top:5.2f} ms, rank {sql_lookup:5.2f} ms, tulis sesi {sql_add:5.2f} ms")
+    await journal.close()
+    await sqlite.close()
+
+
+# Leaderboard minggu ini: hitung ulang dari histori sesi (scan + filter waktu) vs bucket periode
+async def run_windows(directory, rng):
+    journal = ScoreStore(os.path.join(directory, "windows.json"), compact_bytes=1 << 30)
+    now = time.time()
+    history = []
+    for i in range(20000):
+        ts = now - 60 * 86400 + i * (60 * 86400 / 20000)  # 60 hari terakhir, urut waktu
+        deltas = {10**8 + rng.randrange(5000): rng.randrange(50) for _ in range(8)}
+        history.append((ts, deltas))
+        journal.append(-100, deltas, now=ts)
+    week = period_key("week", now)
+
+    async def scan_history():
+        totals = {}
+        for ts, deltas in history:
+            if period_key("week", ts) == week:
+                for user_id, points in deltas.items():
+                    totals[user_id] = totals.get(user_id, 0) + points
+        sorted(totals.items(), key=lambda x: x[1], reverse=True)[:20]
+
+    scan = await timed(5, scan_history)
+    bucket = await timed(200, journal.top, -100, 20, 0, "week")
+    print(f"minggu ini dari {len(history)} sesi histori: scan {scan:.1f} ms | bucket {bucket * 1000:.1f} us "
+          f"({await journal.count(-100, window='week')} pemain minggu ini)")
+    await journal.close()
+
+
+def main():
+    with tempfile.TemporaryDirectory() as directory:
+        asyncio.run(run(directory, random.Random(1)))
+        asyncio.run(run_windows(directory, random.Random(2)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+# Benchmark biaya instrumentasi: print DEBUG (cara lama) vs log.debug yang dimatikan,
+# plus overhead timed() + Histogram.observe per handler dan render /metrics.
+# Jalankan: python bench/bench_metrics.py
+import asyncio
+import io
+import logging
+import os
+import sys
+import timeit
+from contextlib import redirect_stdout
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from metrics import Registry, timed
+
+
+def main():
+    logging.basicConfig(level=logging.INFO)
+    log = logging.getLogger("quiz")
+    chat_id, index, text = -1001234567890, 3, "📢 Hasil Jawaban:\n" + "✅ Pemain menjawab benar! (+10)\n" * 20
+    number = 20000
+
+    sink = io.StringIO()
+    with redirect_stdout(sink):
+        old = min(timeit.repeat(lambda: (print(f"[DEBUG] Soal ke-{index + 1} dikirim ke chat_id {chat_id}"),
+                                         print(f"[DEBUG] result_text: {text}")), number=number, repeat=3)) / number
+    new = min(timeit.repeat(lambda: (log.debug("send_question chat_id=%s soal=%d", chat_id, index + 1),
+                                     log.debug("show_correct chat_id=%s", chat_id)), number=number, repeat=3)) / number
+    print(f"2 log debug per soal: print {old * 1e6:.2f} us (ke StringIO, stdout asli lebih mahal) | "
+          f"log.debug mati {new * 1e6:.2f} us")
+
+    registry = Registry()
+    seconds = registry.histogram("quiz_handler_seconds", "durasi", ("handler",))
+    errors = registry.counter("quiz_handler_errors_total", "error", ("handler",))
+
+    async def handler(update, context):
+        return None
+
+    wrapped = timed(seconds, errors, "answer", handler)
+
+    async def loop(fn, n):
+        for _ in range(n):
+            await fn(None, None)
+
+    results = []
+    for label, fn in (("handler polos", handler), ("handler + timed", wrapped)):
+        t = min(timeit.repeat(lambda: asyncio.run(loop(fn, number)), number=1, repeat=3)) / number
+        results.append(f"{label} {t * 1e6:.2f} us")
+    print(" | ".join(results))
+
+    for i in range(20):
+        for method in ("sendMessage", "editMessageText", "answerCallbackQuery"):
+            seconds.observe(0.01 * i, f"h{i}")
+            registry.histogram(f"m_{i}_{method}", "x", ("method",)).observe(0.02, method)
+    t = min(timeit.repeat(registry.render, number=200, repeat=3)) / 200
+    print(f"render /metrics ({len(registry.render().splitlines())} baris): {t * 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+# Simulasi banyak grup selesai soal bersamaan, lawan fake Bot API yang meniru limit
+# Telegram (30/detik global, 20/menit per grup -> 429). Bandingkan kirim langsung vs OutboundScheduler.
+# Jalankan: python bench/bench_outbound.py [jumlah_grup] [ronde] [jeda_detik]
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from telegram.error import RetryAfter
+from telegram.ext import ExtBot
+
+from fakebot import FakeTelegram
+from outbound import OutboundScheduler, DroppedRequest, HIGH, LOW
+
+TOKEN = "123456:TEST"
+
+
+async def one_group(bot, chat_id, rounds, interval, limited, result):
+    for r in range(rounds):
+        started = time.perf_counter()
+        kwargs_high = {"rate_limit_args": HIGH} if limited else {}
+        kwargs_low = {"rate_limit_args": LOW} if limited else {}
+
+        async def send(text, kwargs, kind):
+            try:
+                await bot.send_message(chat_id, text, **kwargs)
+                result[kind + "_sent"] += 1
+                return True
+            except DroppedRequest:
+                result[kind + "_dropped"] += 1
+            except RetryAfter:
+                result[kind + "_failed"] += 1
+            return False
+
+        # Balasan status dari pemain yang telat klik, lalu hasil + soal berikutnya
+        lows = [send(f"❗ status {i}", kwargs_low, "low") for i in range(3)]
+        await asyncio.gather(*lows, send(f"📢 hasil {r}", kwargs_high, "high"))
+        if await send(f"❓ soal {r + 1}", kwargs_high, "high"):
+            result["question_latency"].append((time.perf_counter() - started) * 1000)
+        await asyncio.sleep(max(0, interval - (time.perf_counter() - started)))
+
+
+async def run(groups, rounds, interval, limited):
+    fake = FakeTelegram(enforce_limits=True, latency=0.005)
+    await fake.start(port=8084)
+    limiter = OutboundScheduler() if limited else None
+    bot = ExtBot(TOKEN, base_url=fake.url, rate_limiter=limiter)
+    await bot.initialize()
+    result = {k: 0 for k in ("high_sent", "high_failed", "high_dropped", "low_sent", "low_failed", "low_dropped")}
+    result["question_latency"] = []
+    try:
+        await asyncio.gather(*(one_group(bot, -100 - g, rounds, interval, limited, result) for g in range(groups)))
+    finally:
+        await bot.shutdown()
+        await fake.stop()
+    result["floods"] = fake.floods
+    result["calls"] = len(fake.calls)
+    result["scheduler"] = limiter.stats() if limiter else None
+    return result
+
+
+def report(name, result):
+    lat = sorted(result.pop("question_latency")) or [0]
+    scheduler = result.pop("scheduler")
+    print(f"{name}: soal p50 {statistics.median(lat):.0f} ms, p99 {lat[int(len(lat) * 0.99) - 1]:.0f} ms")
+    print(f"  {result}")
+    if scheduler:
+        print(f"  scheduler {scheduler}")
+
+
+async def main(groups=20, rounds=3, interval=5):
+    report("langsung", await run(groups, rounds, interval, False))
+    report("scheduler", await run(groups, rounds, interval, True))
+
+
+if __name__ == "__main__":
+    asyncio.run(main(*[int(x) for x in sys.argv[1:]]))
@@ -0,0 +1,61 @@
+# Benchmark peringkat per grup: sort seluruh skor tiap request (cara lama) vs ChatRanking (SortedList)
+# Jalankan: python bench/bench_ranking.py
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from ranking import ChatRanking
+
+
+def old_top(scores, limit):
+    return sorted(scores.items(), key=lambda x: x[1], reverse=True)[:limit]
+
+
+def old_rank(scores, user_id):
+    ranked = sorted(scores.items(), key=lambda x: x[1], reverse=True)
+    for position, (uid, _) in enumerate(ranked):
+        if uid == user_id:
+            return position + 1
+
+
+def render(rows):
+    return "🏆 Leaderboard Grup Ini:\n" + "".join(f"{i}. (user ID: {uid}) - {s} poin\n" for i, (uid, s) in enumerate(rows, 1))
+
+
+def main():
+    rng = random.Random(1)
+    for size in (1000, 10000, 100000):
+        scores = {10**8 + i: rng.randrange(10000) for i in range(size)}
+        ranking = ChatRanking(scores.items())
+        user_id = 10**8 + rng.randrange(size)
+        assert [s for _, s in old_top(scores, 20)] == [s for _, s in ranking.top(20)]
+
+        number = 20 if size >= 100000 else 200
+        cases = (
+            ("top20 lama", lambda: old_top(scores, 20)),
+            ("top20 baru", lambda: ranking.top(20)),
+            ("rank lama", lambda: old_rank(scores, user_id)),
+            ("rank baru", lambda: ranking.lookup(user_id)),
+            ("tetangga baru", lambda: ranking.around(user_id, 1)),
+            ("update 8 user", lambda: [ranking.add(10**8 + rng.randrange(size), 3) for _ in range(8)]),
+        )
+        results = []
+        for label, fn in cases:
+            t = min(timeit.repeat(fn, number=number, repeat=3)) / number
+            results.append(f"{label} {t * 1e6:9.1f} us")
+        print(f"{size:6d} pemain: " + " | ".join(results))
+
+    # Render cache: teks leaderboard yang sama dipakai ulang sampai skor grup berubah
+    rows = ranking.top(20)
+    cache = {1: render(rows)}
+    number = 20000
+    miss = min(timeit.repeat(lambda: render(ranking.top(20)), number=number, repeat=3)) / number
+    hit = min(timeit.repeat(lambda: cache.get(1), number=number, repeat=3)) / number
+    print(f"render leaderboard: tanpa cache {miss * 1e6:.1f} us | cache {hit * 1e6:.2f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+# Benchmark simpan skor global: tulis ulang seluruh file (cara lama) vs journal delta (ScoreStore)
+# Jalankan: python bench/bench_scorestore.py
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from scorestore import ScoreStore
+
+
+def fake_scores(rng, chats, users):
+    return {
+        str(-10**12 - c): {str(rng.randrange(10**8, 10**10)): rng.randrange(500) for _ in range(users)}
+        for c in range(chats)
+    }
+
+
+# Cara lama: update dict lalu json.dump indent=4 seluruh skor setiap sesi selesai
+def old_save(path, scores, chat_id, deltas):
+    chat_scores = scores.setdefault(chat_id, {})
+    for user_id, points in deltas.items():
+        chat_scores[user_id] = chat_scores.get(user_id, 0) + points
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(scores, f, indent=4)
+
+
+async def run(directory, rng):
+    for chats in (100, 1000, 10000):
+        scores = fake_scores(rng, chats, 20)
+        chat_ids = list(scores)
+        sessions = [(rng.choice(chat_ids), {str(rng.randrange(10**8, 10**10)): rng.randrange(50) for _ in range(8)})
+                    for _ in range(50)]
+
+        old_path = os.path.join(directory, f"old_{chats}.json")
+        started = time.perf_counter()
+        for chat_id, deltas in sessions:
+            old_save(old_path, scores, chat_id, deltas)
+        old = (time.perf_counter() - started) / len(sessions)
+
+        path = os.path.join(directory, f"new_{chats}.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(scores, f)
+        store = ScoreStore(path, fsync_delay=0.05, compact_bytes=1 << 30)
+        started = time.perf_counter()
+        for chat_id, deltas in sessions:
+            store.append(chat_id, deltas)
+        new = (time.perf_counter() - started) / len(sessions)
+
+        started = time.perf_counter()
+        await store.compact()
+        compact = time.perf_counter() - started
+        await store.close()
+        print(f"{chats:5d} grup: tulis ulang {old * 1000:8.2f} ms/sesi | journal {new * 1e6:6.1f} us/sesi "
+              f"| compaction {compact * 1000:7.1f} ms")
+
+    # Replay saat startup: snapshot 1000 grup + 10000 baris journal
+    path = os.path.join(directory, "replay.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(fake_scores(rng, 1000, 20), f)
+    store = ScoreStore(path, compact_bytes=1 << 30)
+    for _ in range(10000):
+        store.append(-rng.randrange(1000), {rng.randrange(10**8, 10**10): rng.randrange(50) for _ in range(8)})
+    await store.close()
+    started = time.perf_counter()
+    store = ScoreStore(path)
+    print(f"replay snapshot 1000 grup + {store.replayed} baris journal: {(time.perf_counter() - started) * 1000:.1f} ms")
+    await store.close()
+
+
+def main():
+    with tempfile.TemporaryDirectory() as directory:
+        asyncio.run(run(directory, random.Random(1)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+# Benchmark ranking jawaban per soal: cara lama (list + .index, O(n^2)) vs score_answers (1x jalan)
+# Jalankan: python bench/bench_scoring.py
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from scoring import RULES, AnswerLog, score_answers
+
+
+def old_ranking(answers, answer_order, correct):
+    correct_users_ordered = []
+    for uid in answer_order:
+        if answers.get(uid) == correct:
+            correct_users_ordered.append(uid)
+    results = []
+    for uid in answers:
+        if answers[uid] == correct:
+            rank = correct_users_ordered.index(uid)
+            points = 5 if rank == 0 else 3 if rank == 1 else 1
+            results.append((uid, True, points))
+        else:
+            results.append((uid, False, 0))
+    return results
+
+
+def main():
+    rng = random.Random(1)
+    for n in (100, 1000, 5000):
+        users = rng.sample(range(10**6, 10**7), n)
+        options = [rng.randrange(4) for _ in users]
+        answers = dict(zip(users, options))
+        log = AnswerLog(opened_at=0.0)
+        for i, (uid, opt) in enumerate(zip(users, options)):
+            log.record(uid, opt, received_at=i * 0.001)
+
+        assert old_ranking(answers, users, 0) == score_answers(log, 0, RULES["rank"], 15)
+        number = max(1, 2000 // n)
+        old = min(timeit.repeat(lambda: old_ranking(answers, users, 0), number=number, repeat=3)) / number
+        new = min(timeit.repeat(lambda: score_answers(log, 0, RULES["rank"], 15), number=number, repeat=3)) / number
+        speed = min(timeit.repeat(lambda: score_answers(log, 0, RULES["speed"], 15), number=number, repeat=3)) / number
+        print(f"{n:5d} penjawab: lama {old * 1000:9.3f} ms | rank {new * 1000:7.3f} ms | speed {speed * 1000:7.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
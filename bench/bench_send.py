@@ -0,0 +1,57 @@
+# Benchmark CPU per kirim soal: render keyboard tiap kirim vs keyboard pre-render
+# Jalankan: python bench/bench_send.py
+import json
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from telegram import InlineKeyboardButton, InlineKeyboardMarkup
+from questionbank import QuestionBank
+from callbacks import render_keyboard
+
+N = 20000
+
+
+def load_bank():
+    with open(os.path.join(os.path.dirname(__file__), "..", "questions.json"), encoding="utf-8") as f:
+        return QuestionBank(1, json.load(f))
+
+
+# Cara lama: shuffle opsi, bikin tombol + markup baru, lalu diserialisasi PTB
+def send_args_old(question, index):
+    options = list(question.options)
+    random.shuffle(options)
+    keyboard = [[InlineKeyboardButton(opt, callback_data=opt)] for opt in options]
+    markup = InlineKeyboardMarkup(keyboard)
+    text = f"❓ Soal {index + 1}:\n{question.text}"
+    return text, json.dumps(markup.to_dict())
+
+
+HEADERS = [f"❓ Soal {i}:\n" for i in range(1, 101)]
+
+
+# Cara baru: keyboard sesi sudah dirender di awal sesi
+def send_args_new(question, index, keyboards):
+    return HEADERS[index] + question.text, keyboards[index]
+
+
+def main():
+    bank = load_bank()
+    questions = bank.questions
+    random.seed(1)
+    picks = [(questions[random.randrange(len(questions))], random.randrange(20)) for _ in range(N)]
+    keyboards = [render_keyboard(q, random.choice(q.layouts), 1, i) for i, q in enumerate(questions[:20])]
+
+    seconds = min(timeit.repeat(lambda: [send_args_old(q, i) for q, i in picks], number=1, repeat=5))
+    print(f"{'old':12s} {seconds / N * 1e6:8.2f} us/send")
+    seconds = min(timeit.repeat(lambda: [send_args_new(q, i, keyboards) for q, i in picks], number=1, repeat=5))
+    print(f"{'prerendered':12s} {seconds / N * 1e6:8.2f} us/send")
+    seconds = min(timeit.repeat(lambda: [render_keyboard(q, q.layouts[0], 1, i) for q, i in picks], number=1, repeat=5))
+    print(f"{'session init':12s} {seconds / N * 1e6:8.2f} us/question (sekali per sesi)")
+
+
+if __name__ == "__main__":
+    main()
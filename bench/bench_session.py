@@ -0,0 +1,94 @@
+# Benchmark memori dan akses state sesi: dict lama (set + dict per pemain) vs QuizSession (__slots__ + array)
+# Jalankan: python bench/bench_session.py
+import os
+import random
+import sys
+import timeit
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from session import QuizSession
+
+
+def old_session(players):
+    session = {
+        "participants": set(),
+        "scores": {},
+        "started": False,
+        "index": 0,
+        "answers": {},
+        "limit": None,
+        "questions": [],
+        "waiting_limit_selection": False,
+    }
+    session["user_names"] = {}
+    for uid, name in players:
+        session["participants"].add(uid)
+        session["user_names"][uid] = name
+        session["scores"][uid] = 0
+    return session
+
+
+def new_session(chat_id, players):
+    session = QuizSession(chat_id)
+    for uid, name in players:
+        session.add_player(uid, name)
+    return session
+
+
+def measure(build, chats, players):
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    kept = [build(chat_id, players[chat_id]) for chat_id in range(chats)]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return (after - before) / len(kept)
+
+
+def main():
+    rng = random.Random(1)
+    for chats, per_chat in ((10000, 5), (2000, 50), (200, 500)):
+        players = [
+            [(rng.randrange(10**8, 10**10), f"User{i}") for i in range(per_chat)]
+            for _ in range(chats)
+        ]
+        old = measure(lambda chat_id, p: old_session(p), chats, players)
+        new = measure(new_session, chats, players)
+        print(f"{chats:5d} sesi x {per_chat:3d} pemain: dict {old / 1024:8.1f} KiB/sesi | slots {new / 1024:8.1f} KiB/sesi "
+              f"({old / new:.1f}x)")
+
+    # Jalur panas per jawaban: cek peserta, cek sudah jawab, catat, cek semua sudah jawab
+    players = [(10**8 + i, f"User{i}") for i in range(50)]
+    old = old_session(players)
+    new = new_session(1, players)
+    new.start_question()
+    uid = players[25][0]
+
+    def old_answer():
+        if uid in old["participants"] and uid not in old["answers"]:
+            old["answers"][uid] = 1
+        len(old["answers"]) == len(old["participants"])
+        old["answers"].clear()
+
+    def new_answer():
+        if new.has_player(uid) and not new.has_answered(uid):
+            new.answered[new.players[uid]] = 1
+        new.all_answered()
+        new.answered[new.players[uid]] = 0
+
+    def old_attr():
+        old["index"] + 1 < (old["limit"] or 0) and old["started"]
+
+    def new_attr():
+        new.index + 1 < (new.limit or 0) and new.started
+
+    number = 200000
+    for label, fn in (("jawab dict", old_answer), ("jawab slots", new_answer), ("atribut dict", old_attr),
+                      ("atribut slots", new_attr)):
+        t = min(timeit.repeat(fn, number=number, repeat=3)) / number
+        print(f"{label:14s} {t * 1e9:7.1f} ns")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+# Benchmark snapshot sesi: biaya tulis per snapshot (per jumlah pemain) dan waktu restore 1k sesi
+# Jalankan: python bench/bench_sessionstore.py
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from questionbank import QuestionBank
+from session import QuizSession
+from sessionstore import SessionStore
+
+
+def load_bank():
+    with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "questions.json"), encoding="utf-8") as f:
+        return QuestionBank(1, json.load(f))
+
+
+# Sesi di tengah soal ke-3 dengan separuh pemain sudah menjawab
+def running_session(chat_id, bank, players, rng):
+    session = QuizSession(chat_id)
+    for i in range(players):
+        session.add_player(rng.randrange(10**8, 10**10), f"User{i}")
+    session.started = True
+    session.bank = bank
+    session.questions = rng.sample(bank.questions, 10)
+    session.layouts = [rng.randrange(len(q.layouts)) for q in session.questions]
+    session.limit = 10
+    session.index = 2
+    session.epoch = 1
+    session.question_active = True
+    session.current_message_id = 100
+    session.start_question()
+    for uid in session.user_ids[: players // 2]:
+        session.record_answer(uid, rng.randrange(4))
+    return session
+
+
+def main():
+    bank = load_bank()
+    rng = random.Random(1)
+    with tempfile.TemporaryDirectory() as directory:
+        store = SessionStore(directory, QuizSession.to_dict)
+
+        for players in (5, 50, 500):
+            session = running_session(-1000 - players, bank, players, rng)
+            n = 2000 if players < 500 else 300
+            started = time.perf_counter()
+            for _ in range(n):
+                store.save(session)
+            per_write = (time.perf_counter() - started) / n
+            size = os.path.getsize(os.path.join(directory, f"{session.chat_id}.json"))
+            print(f"{players:4d} pemain: {per_write * 1e6:8.1f} us/snapshot, {size / 1024:6.1f} KiB")
+
+        # 100 jawaban masuk dalam satu jeda debounce -> 1x tulis
+        async def burst():
+            session = running_session(-1, bank, 100, rng)
+            store.writes = 0
+            for _ in range(100):
+                store.schedule_save(session)
+            store.flush()
+
+        asyncio.run(burst())
+        print(f"100 jawaban dengan schedule_save: {store.writes} tulis")
+
+        for name in os.listdir(directory):
+            os.remove(os.path.join(directory, name))
+        for chat_id in range(1000):
+            store.save(running_session(-chat_id - 1, bank, 20, rng))
+
+        started = time.perf_counter()
+        snapshots = store.load_all()
+        loaded = time.perf_counter()
+        restored = [QuizSession.from_dict(data, bank) for data in snapshots]
+        done = time.perf_counter()
+        assert all(s is not None for s in restored)
+        print(f"restore 1000 sesi x 20 pemain: baca {(loaded - started) * 1000:.1f} ms, "
+              f"bangun {(done - loaded) * 1000:.1f} ms, total {(done - started) * 1000:.1f} ms")
+
+        # Bank berubah (soal pindah posisi) -> dicocokkan lewat sidik soal
+        shuffled = [{"question": q.text, "options": list(q.options), "answer": q.answer} for q in bank.questions]
+        rng.shuffle(shuffled)
+        other = QuestionBank(2, shuffled)
+        started = time.perf_counter()
+        restored = [QuizSession.from_dict(data, other) for data in snapshots]
+        done = time.perf_counter()
+        assert all(s is not None for s in restored)
+        print(f"restore 1000 sesi ke bank urutan lain: {(done - started) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+# Load test mode sharded: ingress + N worker (proses main.py sungguhan) melawan fake Bot API lokal.
+# Tiap update /joinquiz = tepat 1 sendMessage, throughput dihitung dari balasan yang sampai.
+# Throughput terukur dibatasi jumlah core: di mesin 1 core semua N akan kurang lebih sama. Karena itu
+# dicatat juga waktu CPU tiap worker (/proc/<pid>/stat) dan biaya CPU routing ingress per update:
+# proyeksi 1 core per proses = min(update / CPU worker tersibuk, 1 / CPU ingress per update).
+# Jalankan: python bench/bench_shards.py [chat] [pemain_per_chat] [daftar_N, misal 1,2,4]
+import asyncio
+import collections
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fakebot import FakeTelegram, command
+from shard import HashRing, ShardRouter, WorkerPool
+
+PORT = 8093
+CLOCK_TICK = os.sysconf("SC_CLK_TCK")
+
+# Proses penampung: buka N unix socket dan buang semua yang masuk (pengganti worker untuk ukur ingress)
+SINK = """
+import asyncio, sys
+async def drain(reader, writer):
+    while await reader.read(1 << 16):
+        pass
+async def main():
+    for path in sys.argv[1:]:
+        await asyncio.start_unix_server(drain, path)
+    await asyncio.Event().wait()
+asyncio.run(main())
+"""
+
+
+# Detik CPU (user + system) sebuah proses, None kalau /proc tidak ada (bukan Linux)
+def cpu_seconds(pid):
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+    except OSError:
+        return None
+    return (int(fields[11]) + int(fields[12])) / CLOCK_TICK
+
+
+def ring_report(counts=(2, 4, 8), chats=100000):
+    for n in counts:
+        ring, bigger = HashRing(n), HashRing(n + 1)
+        load = collections.Counter(ring.owner(-10**12 - c) for c in range(chats))
+        moved = sum(1 for c in range(chats) if ring.owner(-10**12 - c) != bigger.owner(-10**12 - c))
+        print(f"ring N={n}: beban shard max/rata-rata {max(load.values()) / (chats / n):.2f} | "
+              f"tambah 1 worker -> {moved / chats:.1%} chat pindah (ideal {1 / (n + 1):.1%})")
+
+
+async def wait_for(predicate, timeout):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            raise TimeoutError
+        await asyncio.sleep(0.01)
+
+
+async def run(fake, shards, chats, players):
+    directory = tempfile.mkdtemp(prefix="bench-shards-")
+    shutil.copy(os.path.join(ROOT, "questions.json"), directory)
+    replies = [0]
+    fake.on_call = lambda method, params, now: replies.__setitem__(0, replies[0] + (method == "sendMessage"))
+    env = {
+        "BOT_TOKEN": "123456:TEST", "BOT_API_URL": fake.url, "SHEET_URL": "http://127.0.0.1:9/offline.csv",
+        "OUTBOUND_GLOBAL_RATE": "1000000", "OUTBOUND_GROUP_PER_MINUTE": "1000000",
+    }
+    log = open(os.path.join(directory, "workers.log"), "w")
+    pool = WorkerPool([sys.executable, os.path.join(ROOT, "main.py")], shards, directory, env=env,
+                      cwd=directory, stdout=subprocess.DEVNULL, stderr=log)
+    router = ShardRouter(pool.paths)
+    pool.start()
+    router.start()
+    try:
+        await wait_for(lambda: all(link.connects for link in router.links), 60)
+
+        # Pemanasan: tiap worker sudah pernah memproses update
+        for c in range(4 * shards):
+            await router.dispatch({"update_id": c + 1, **command(-2 * 10**12 - c, 1, "/joinquiz")})
+        await wait_for(lambda: replies[0] >= 4 * shards, 60)
+
+        updates = [command(-10**12 - c, 10**8 + p, "/joinquiz") for p in range(players) for c in range(chats)]
+        for i, update in enumerate(updates):
+            update["update_id"] = 1000 + i
+        replies[0] = 0
+        pids = [proc.pid for proc in pool.procs]
+        cpu_before = [cpu_seconds(pid) for pid in pids]
+        started = time.perf_counter()
+        for update in updates:
+            await router.dispatch(update)
+        await wait_for(lambda: replies[0] >= len(updates), 300)
+        rate = len(updates) / (time.perf_counter() - started)
+        cpu = [None if a is None else cpu_seconds(pid) - a for pid, a in zip(pids, cpu_before)]
+        return rate, (None if None in cpu else cpu)
+    finally:
+        await router.stop()
+        await pool.stop()
+        log.close()
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+# CPU ingress per update: router + tulis socket ke N penampung (parse webhook / getUpdates tidak termasuk)
+async def ingress_cost(shards, count=20000):
+    directory = tempfile.mkdtemp(prefix="bench-ingress-")
+    paths = [os.path.join(directory, f"sink-{i}.sock") for i in range(shards)]
+    sink = await asyncio.create_subprocess_exec(sys.executable, "-c", SINK, *paths)
+    router = ShardRouter(paths)
+    try:
+        await wait_for(lambda: all(os.path.exists(path) for path in paths), 30)
+        router.start()
+        await wait_for(lambda: all(link.connects for link in router.links), 30)
+        updates = [command(-10**12 - i, 10**8 + i, "/joinquiz") for i in range(count)]
+        started = time.process_time()
+        for update in updates:
+            await router.dispatch(update)
+        await asyncio.gather(*(link.queue.join() for link in router.links))
+        return (time.process_time() - started) / count
+    finally:
+        await router.stop()
+        sink.kill()
+        await sink.wait()
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+async def amain(chats, players, counts):
+    updates = chats * players
+    print(f"{os.cpu_count()} core, {chats} chat x {players} pemain = {updates} update per run")
+    fake = FakeTelegram()
+    await fake.start(port=PORT)
+    try:
+        base = projected_base = None
+        for shards in counts:
+            rate, cpu = await run(fake, shards, chats, players)
+            base = base or rate
+            line = f"N={shards}: {rate:7.0f} update/detik | speedup {rate / base:.2f}x (linear {shards / counts[0]:.0f}x)"
+            if cpu is not None:
+                ingress = await ingress_cost(shards)
+                projected = min(updates / max(cpu), 1 / ingress)
+                projected_base = projected_base or projected
+                line += (f" | CPU worker {sum(cpu) / updates * 1e6:.0f} us/update, tersibuk {max(cpu):.2f} s, "
+                         f"ingress {ingress * 1e6:.0f} us/update -> proyeksi 1 core/proses {projected:7.0f} update/detik "
+                         f"({projected / projected_base:.2f}x)")
+            print(line)
+    finally:
+        await fake.stop()
+
+
+def main():
+    chats = int(sys.argv[1]) if len(sys.argv) > 1 else 400
+    players = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    counts = [int(x) for x in sys.argv[3].split(",")] if len(sys.argv) > 3 else [1, 2, 4]
+    ring_report()
+    asyncio.run(amain(chats, players, counts))
+
+
+if __name__ == "__main__":
+    main()
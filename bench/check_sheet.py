@@ -0,0 +1,97 @@
+# Cek jalur refresh bank soal melawan sheet lokal (bench/sheetserver.py), lewat reload_questions asli main.py.
+# Per mode header (ETag, cuma Last-Modified, tanpa keduanya): fetch pertama mengganti bank, fetch kedua
+# tidak mengubah apa-apa (304, atau sha256 sama kalau sheet tanpa header), isi berubah -> bank diganti
+# dengan hitungan tambah/ubah yang benar, dan force (/reloadsoal) dengan isi sama tetap tidak ganti bank.
+# Jalankan: python bench/check_sheet.py [--port 8098]
+import argparse
+import asyncio
+import os
+import shutil
+import sys
+import tempfile
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from sheetserver import SheetServer, sheet_csv
+
+MODES = {
+    "etag": {"etag": True, "last_modified": True},
+    "last-modified": {"etag": False, "last_modified": True},
+    "tanpa header": {"etag": False, "last_modified": False},
+}
+
+
+def questions(mode, count, edited=None):
+    return [(f"{mode} soal {i}{' (diubah)' if i == edited else ''}?", ("a", "b", "c", "d"), "ABCD"[i % 4])
+            for i in range(count)]
+
+
+async def check_mode(main, server, mode, failures):
+    def expect(label, ok, detail):
+        print(f"  [{'ok' if ok else 'GAGAL'}] {label}: {detail}")
+        if not ok:
+            failures.append((mode, label))
+
+    print(mode)
+    server.set(sheet_csv(questions(mode, 5)))
+    first = await main.reload_questions()
+    expect("fetch pertama", first["changed"] and first["total"] == 5, first)
+
+    bank = main.question_bank
+    not_modified = server.responses[304]
+    second = await main.reload_questions()
+    unchanged = not second["changed"] and main.question_bank is bank
+    if server.etag or server.last_modified:
+        expect("fetch kedua 304", unchanged and server.responses[304] == not_modified + 1, second)
+    else:
+        expect("fetch kedua sha256 sama", unchanged and server.responses[304] == not_modified, second)
+    # fetch_sheet blocking, server sheet jalan di event loop yang sama
+    direct = await asyncio.to_thread(main.fetch_sheet, main.sheet_url, main.question_bank.snapshot)
+    expect("fetch_sheet langsung", direct is None, direct)
+
+    server.set(sheet_csv(questions(mode, 6, edited=2)))
+    third = await main.reload_questions()
+    expect("isi berubah -> bank baru",
+           third["changed"] and main.question_bank is not bank and third["total"] == 6
+           and third["added"] == 2 and third["removed"] == 1 and third["updated"] == 0,
+           third)
+    expect("snapshot disimpan", main.load_snapshot(main.questions_snapshot)["sha256"] ==
+           main.question_bank.snapshot["sha256"], main.questions_snapshot)
+
+    bank = main.question_bank
+    forced = await main.reload_questions(force=True)
+    expect("force dengan isi sama", not forced["changed"] and main.question_bank is bank, forced)
+
+
+# Satu server untuk semua mode (cuma header yang diganti), supaya Last-Modified terus maju
+async def run(main, port):
+    failures = []
+    server = SheetServer()
+    await server.start(port=port)
+    main.sheet_url = server.url
+    try:
+        for mode, headers in MODES.items():
+            server.etag, server.last_modified = headers["etag"], headers["last_modified"]
+            await check_mode(main, server, mode, failures)
+    finally:
+        await server.stop()
+    return failures
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Cek fetch sheet kondisional (304 / ETag / Last-Modified / sha256)")
+    parser.add_argument("--port", type=int, default=8098)
+    ARGS = parser.parse_args()
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+    os.environ["METRICS_PORT"] = "0"
+    # Jalan di folder sementara supaya snapshot / file data asli tidak tersentuh
+    os.chdir(tempfile.mkdtemp())
+    shutil.copy(os.path.join(ROOT, "questions.json"), "questions.json")
+
+    import main
+
+    FAILURES = asyncio.run(run(main, ARGS.port))
+    print("SEMUA OK" if not FAILURES else f"{len(FAILURES)} cek gagal: {FAILURES}")
+    sys.exit(1 if FAILURES else 0)
@@ -0,0 +1,216 @@
+# Fake Telegram Bot API lokal (aiohttp) untuk benchmark / load test.
+# Bot diarahkan ke sini lewat base_url, contoh: http://127.0.0.1:8081/bot
+import asyncio
+import collections
+import json
+import random
+import time
+
+import aiohttp
+from aiohttp import web
+
+BOT_USER = {"id": 1, "is_bot": True, "first_name": "QuizBot", "username": "quiz_test_bot"}
+
+
+class FakeTelegram:
+    def __init__(self, latency=0.0, flood_rate=0.0, retry_after=1, seed=0, enforce_limits=False):
+        self.latency = latency  # detik per panggilan API
+        self.flood_rate = flood_rate  # peluang balas 429
+        self.retry_after = retry_after
+        # Tiru limit Telegram: 30 pesan/detik global, 20 pesan/menit per grup
+        self.enforce_limits = enforce_limits
+        self._global_window = collections.deque()
+        self._chat_windows = collections.defaultdict(collections.deque)
+        self.floods = 0
+        self.rng = random.Random(seed)
+        self.calls = []  # (waktu, method, params)
+        self.on_call = None  # hook(method, params, waktu)
+        self.on_result = None  # hook(method, params, hasil) setelah panggilan sukses, dipakai load test
+        self.webhook_url = None
+        self.webhook_secret = None
+        self._updates = []
+        self._update_event = asyncio.Event()
+        self._update_id = 0
+        self._message_id = 0
+        self._runner = None
+        self._session = None
+        self.host = "127.0.0.1"
+        self.port = None
+
+        self.app = web.Application()
+        self.app.router.add_route("*", "/bot{token}/{method}", self.handle)
+
+    @property
+    def url(self):
+        return f"http://{self.host}:{self.port}/bot"
+
+    async def start(self, host="127.0.0.1", port=8081):
+        self.host, self.port = host, port
+        self._runner = web.AppRunner(self.app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, host, port).start()
+        self._session = aiohttp.ClientSession()
+
+    async def stop(self):
+        if self._session is not None:
+            await self._session.close()
+        if self._runner is not None:
+            await self._runner.cleanup()
+
+    # ---- Bot API ----
+
+    async def handle(self, request):
+        method = request.match_info["method"]
+        if request.content_type == "application/json":
+            params = await request.json()
+        else:
+            params = dict(await request.post())
+        now = time.perf_counter()
+        self.calls.append((now, method, params))
+        if self.on_call is not None:
+            self.on_call(method, params, now)
+
+        if method == "getUpdates":
+            return self._ok(await self._get_updates(params))
+
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if self.flood_rate and self.rng.random() < self.flood_rate:
+            return self._flood(self.retry_after)
+        if self.enforce_limits and method in ("sendMessage", "editMessageText"):
+            retry_after = self._check_limits(int(params["chat_id"]), time.monotonic())
+            if retry_after:
+                return self._flood(retry_after)
+
+        handler = getattr(self, "api_" + method, None)
+        result = handler(params) if handler else True
+        if self.on_result is not None:
+            self.on_result(method, params, result)
+        return self._ok(result)
+
+    def _flood(self, retry_after):
+        self.floods += 1
+        return web.json_response({
+            "ok": False,
+            "error_code": 429,
+            "description": f"Too Many Requests: retry after {retry_after}",
+            "parameters": {"retry_after": retry_after},
+        }, status=429)
+
+    def _check_limits(self, chat_id, now):
+        window = self._global_window
+        while window and now - window[0] > 1:
+            window.popleft()
+        if len(window) >= 30:
+            return 1
+        if chat_id < 0:
+            chat_window = self._chat_windows[chat_id]
+            while chat_window and now - chat_window[0] > 60:
+                chat_window.popleft()
+            if len(chat_window) >= 20:
+                return max(1, int(60 - (now - chat_window[0])) + 1)
+            chat_window.append(now)
+        window.append(now)
+        return 0
+
+    def _ok(self, result):
+        return web.json_response({"ok": True, "result": result})
+
+    def _message(self, chat_id, text, message_id=None):
+        if message_id is None:
+            self._message_id += 1
+            message_id = self._message_id
+        chat_id = int(chat_id)
+        return {
+            "message_id": int(message_id),
+            "date": int(time.time()),
+            "chat": {"id": chat_id, "type": "group" if chat_id < 0 else "private", "title": "Test"},
+            "from": BOT_USER,
+            "text": text,
+        }
+
+    def api_getMe(self, params):
+        return BOT_USER
+
+    def api_sendMessage(self, params):
+        return self._message(params["chat_id"], params.get("text", ""))
+
+    def api_editMessageText(self, params):
+        return self._message(params["chat_id"], params.get("text", ""), params["message_id"])
+
+    def api_editMessageReplyMarkup(self, params):
+        return self._message(params["chat_id"], "", params["message_id"])
+
+    def api_getChat(self, params):
+        chat_id = int(params["chat_id"])
+        return {"id": chat_id, "type": "private", "first_name": f"User{chat_id}"}
+
+    def api_getChatMember(self, params):
+        user_id = int(params["user_id"])
+        return {"status": "administrator", "user": {"id": user_id, "is_bot": False, "first_name": f"User{user_id}"},
+                "can_be_edited": False, "is_anonymous": False, "can_manage_chat": True,
+                "can_delete_messages": True, "can_manage_video_chats": True, "can_restrict_members": True,
+                "can_promote_members": False, "can_change_info": True, "can_invite_users": True,
+                "can_post_stories": False, "can_edit_stories": False, "can_delete_stories": False}
+
+    def api_setWebhook(self, params):
+        self.webhook_url = params["url"]
+        self.webhook_secret = params.get("secret_token")
+        return True
+
+    def api_deleteWebhook(self, params):
+        self.webhook_url = None
+        return True
+
+    async def _get_updates(self, params):
+        offset = int(params.get("offset") or 0)
+        timeout = float(params.get("timeout") or 0)
+        self._updates = [u for u in self._updates if u["update_id"] >= offset]
+        if not self._updates and timeout:
+            self._update_event.clear()
+            try:
+                await asyncio.wait_for(self._update_event.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+        return self._updates[:100]
+
+    # ---- Kirim update ke bot ----
+
+    async def push(self, update):
+        self._update_id += 1
+        update["update_id"] = self._update_id
+        if self.webhook_url:
+            headers = {"X-Telegram-Bot-Api-Secret-Token": self.webhook_secret} if self.webhook_secret else {}
+            async with self._session.post(self.webhook_url, data=json.dumps(update),
+                                          headers={"Content-Type": "application/json", **headers}) as resp:
+                return resp.status
+        self._updates.append(update)
+        self._update_event.set()
+        return 200
+
+    def new_message_id(self):
+        self._message_id += 1
+        return self._message_id
+
+
+def user(user_id):
+    return {"id": user_id, "is_bot": False, "first_name": f"Player{user_id}"}
+
+
+def command(chat_id, user_id, text):
+    cmd = text.split()[0]
+    return {"message": {
+        "message_id": 1, "date": int(time.time()),
+        "chat": {"id": chat_id, "type": "group" if chat_id < 0 else "private", "title": "Test"},
+        "from": user(user_id), "text": text,
+        "entities": [{"type": "bot_command", "offset": 0, "length": len(cmd)}],
+    }}
+
+
+def callback(chat_id, user_id, data, message_id, query_id=None):
+    return {"callback_query": {
+        "id": str(query_id or random.getrandbits(48)), "from": user(user_id), "chat_instance": str(chat_id),
+        "data": data,
+        "message": {"message_id": message_id, "date": int(time.time()),
+                    "chat": {"id": chat_id, "type": "group", "title": "Test"}, "from": BOT_USER, "text": "?"},
+    }}
@@ -0,0 +1,129 @@
+# Pengganti in-memory untuk Update / CallbackQuery / Bot PTB, dipakai microbenchmark handler.
+# Cuma atribut & method yang disentuh main.py; panggilan Bot API dihitung per method, tanpa network.
+import asyncio
+import collections
+import itertools
+import types
+
+
+class FakeUser:
+    __slots__ = ("id", "first_name", "username", "is_bot")
+
+    def __init__(self, user_id):
+        self.id = user_id
+        self.first_name = f"Player{user_id}"
+        self.username = None
+        self.is_bot = False
+
+
+class FakeChat:
+    __slots__ = ("id", "type", "title")
+
+    def __init__(self, chat_id):
+        self.id = chat_id
+        self.type = "group" if chat_id < 0 else "private"
+        self.title = "Bench"
+
+
+class FakeMessage:
+    __slots__ = ("bot", "chat", "chat_id", "message_id")
+
+    def __init__(self, bot, chat_id, message_id):
+        self.bot = bot
+        self.chat = FakeChat(chat_id)
+        self.chat_id = chat_id
+        self.message_id = message_id
+
+    async def reply_text(self, text, **kwargs):
+        return await self.bot.send_message(self.chat_id, text, **kwargs)
+
+
+class FakeQuery:
+    __slots__ = ("bot", "id", "message", "from_user", "data")
+
+    def __init__(self, bot, message, user, data, query_id):
+        self.bot = bot
+        self.id = query_id
+        self.message = message
+        self.from_user = user
+        self.data = data
+
+    async def answer(self, text=None, show_alert=False, **kwargs):
+        return await self.bot.answer_callback_query(self.id, text, show_alert=show_alert)
+
+    async def edit_message_text(self, text, **kwargs):
+        return await self.bot.edit_message_text(text, chat_id=self.message.chat_id,
+                                                message_id=self.message.message_id, **kwargs)
+
+
+class FakeBot:
+    def __init__(self):
+        self.calls = collections.Counter()
+        self._message_ids = itertools.count(1000)
+
+    async def send_message(self, chat_id, text, **kwargs):
+        self.calls["sendMessage"] += 1
+        return FakeMessage(self, chat_id, next(self._message_ids))
+
+    async def edit_message_text(self, text, chat_id=None, message_id=None, **kwargs):
+        self.calls["editMessageText"] += 1
+        return FakeMessage(self, chat_id, message_id)
+
+    async def edit_message_reply_markup(self, chat_id=None, message_id=None, **kwargs):
+        self.calls["editMessageReplyMarkup"] += 1
+        return FakeMessage(self, chat_id, message_id)
+
+    async def answer_callback_query(self, callback_query_id, text=None, **kwargs):
+        self.calls["answerCallbackQuery"] += 1
+        return True
+
+    async def get_chat(self, chat_id):
+        self.calls["getChat"] += 1
+        return types.SimpleNamespace(id=chat_id, type="private", first_name=f"User{chat_id}", title=None)
+
+
+# Task yang di-spawn handler (ack klik, balasan penolakan, refresh nama) lewat application.create_task
+_spawned = set()
+
+
+class FakeApplication:
+    def __init__(self, bot):
+        self.bot = bot
+
+    def create_task(self, coro):
+        task = asyncio.ensure_future(coro)
+        _spawned.add(task)
+        task.add_done_callback(_spawned.discard)
+        return task
+
+
+# Tunggu semua task yang di-spawn handler selesai
+async def settle():
+    while _spawned:
+        await asyncio.gather(*list(_spawned))
+
+
+class FakeContext:
+    def __init__(self, bot, args=()):
+        self.bot = bot
+        self.application = FakeApplication(bot)
+        self.args = list(args)
+        self.received_at = None
+
+
+def command_update(bot, chat_id, user_id, message_id=1):
+    return types.SimpleNamespace(
+        update_id=0, effective_chat=FakeChat(chat_id), effective_user=FakeUser(user_id),
+        message=FakeMessage(bot, chat_id, message_id), callback_query=None,
+    )
+
+
+_query_ids = itertools.count(1)
+
+
+def callback_update(bot, chat_id, user_id, data, message_id):
+    user = FakeUser(user_id)
+    query = FakeQuery(bot, FakeMessage(bot, chat_id, message_id), user, data, str(next(_query_ids)))
+    return types.SimpleNamespace(
+        update_id=0, effective_chat=query.message.chat, effective_user=user, message=None, callback_query=query,
+    )
@@ -0,0 +1,110 @@
+# Kerangka bersama loadtest.py & replay.py: env + folder sementara, Application asli main.py di atas
+# fake Bot API (update masuk lewat antrean WebhookServer), dan pencatat panggilan API + latency
+# klik -> answerCallbackQuery. main.py dibaca saat import, jadi prepare() dipanggil sebelum `import main`.
+import collections
+import json
+import os
+import shutil
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+TOKEN = "123456:TEST"
+SETUP_METHODS = {"getMe", "deleteWebhook", "setWebhook", "getUpdates"}
+
+
+def percentile(values, q):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def add_common_args(parser, port):
+    parser.add_argument("--latency", type=float, default=0.0, help="latency fake Bot API (detik)")
+    parser.add_argument("--flood", type=float, default=0.0, help="peluang fake API balas 429")
+    parser.add_argument("--real-limits", action="store_true", help="pakai limit outbound produksi (default dilepas)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--port", type=int, default=port)
+    parser.add_argument("--json", help="simpan hasil ke file JSON")
+
+
+# Env default + pindah ke folder sementara supaya file data asli tidak tersentuh.
+# paths: nama atribut args berisi path dari pemanggil, di-resolve dulu sebelum pindah folder.
+def prepare(args, paths=("json",)):
+    for name in paths:
+        value = getattr(args, name)
+        if isinstance(value, list):
+            setattr(args, name, [os.path.abspath(path) for path in value])
+        elif value:
+            setattr(args, name, os.path.abspath(value))
+    os.environ.setdefault("METRICS_PORT", "0")
+    os.environ.setdefault("SHEET_URL", "http://127.0.0.1:9/offline.csv")
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+    if not args.real_limits:
+        # Yang diukur kapasitas bot, bukan limit Telegram
+        os.environ.setdefault("OUTBOUND_GLOBAL_RATE", "1000000")
+        os.environ.setdefault("OUTBOUND_GROUP_PER_MINUTE", "1000000")
+    os.chdir(tempfile.mkdtemp())
+    shutil.copy(os.path.join(ROOT, "questions.json"), "questions.json")
+
+
+def write_json(path, result):
+    if path:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+
+
+# Hitung panggilan API per method + latency klik (waktu update diinject) -> ack diterima fake API
+class ApiCalls:
+    def __init__(self):
+        self.calls = collections.Counter()
+        self.clicks = {}  # callback_query_id -> waktu inject
+        self.ack_latency = []
+
+    def click(self, query_id):
+        self.clicks[query_id] = time.perf_counter()
+
+    def on_call(self, method, params, now):
+        if method not in SETUP_METHODS:
+            self.calls[method] += 1
+        if method == "answerCallbackQuery":
+            clicked = self.clicks.pop(params.get("callback_query_id"), None)
+            if clicked is not None:
+                self.ack_latency.append(now - clicked)
+
+    def stats(self):
+        return {
+            "ack_p50_ms": percentile(self.ack_latency, 0.50) * 1000,
+            "ack_p99_ms": percentile(self.ack_latency, 0.99) * 1000,
+            "calls": dict(self.calls),
+        }
+
+
+# Jalankan drive(fake, server) dengan bot aktif melawan fake Bot API, return hasilnya
+async def run_against_fake(args, drive):
+    import main
+    from fakebot import FakeTelegram
+    from webhook import WebhookServer, running
+
+    fake = FakeTelegram(latency=args.latency, flood_rate=args.flood, seed=args.seed)
+    await fake.start(port=args.port)
+    app = main.build_app(TOKEN, fake.url)
+    server = WebhookServer(app, queue_size=100000, workers=main.CONCURRENT_UPDATES)
+    try:
+        async with running(app):
+            server.start_workers()
+            try:
+                return await drive(fake, server)
+            finally:
+                await server.stop()
+    finally:
+        await fake.stop()
+
+
+# Tunggu semua update yang sudah diinject selesai diproses (antrean webhook + actor chat)
+async def drain(server):
+    import main
+
+    await server.queue.join()
+    await main.actors.join()
@@ -0,0 +1,179 @@
+# Load test end-to-end: handler asli main.py + Application PTB melawan fake Bot API lokal.
+# N grup x M pemain: /joinquiz, /startquiznow, pilih jumlah soal, tombol mulai, lalu tiap soal
+# semua pemain klik jawaban dalam jendela `think` detik (burst). Update masuk lewat antrean
+# WebhookServer (jalur HTTP ingest diukur terpisah di bench_ingress.py).
+# Hasil: update/detik, p50/p99 klik -> answerCallbackQuery diterima fake API, soal terkirim -> hasil
+# soal diterima fake API, dan semua panggilan API (termasuk balasan join) dibagi jumlah soal.
+# Jalankan: python bench/loadtest.py --chats 50 --players 8 --limit 5 [--latency 0.05 --flood 0.01] [--json out.json]
+import argparse
+import asyncio
+import collections
+import json
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from harness import ApiCalls, add_common_args, drain, percentile, prepare, run_against_fake, write_json
+
+
+class Chat:
+    def __init__(self, chat_id, players):
+        self.chat_id = chat_id
+        self.players = players
+        self.question_at = {}  # message_id soal -> waktu soal terkirim
+        self.questions = 0
+        self.results = 0
+        self.done = asyncio.Event()
+
+
+class LoadTest:
+    def __init__(self, fake, server, args):
+        self.fake = fake
+        self.server = server
+        self.args = args
+        self.rng = random.Random(args.seed)
+        self.chats = {}
+        self.updates = 0
+        self.api = ApiCalls()
+        self.result_latency = []
+        self._update_id = 0
+        self._query_id = 0
+        self._tasks = set()
+        fake.on_call = self.api.on_call
+        fake.on_result = self.on_result
+
+    async def inject(self, update):
+        self._update_id += 1
+        update["update_id"] = self._update_id
+        self.updates += 1
+        await self.server.queue.put(update)
+
+    def spawn(self, coro):
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def click(self, chat, user_id, data, message_id, delay=0.0):
+        if delay:
+            await asyncio.sleep(delay)
+        self._query_id += 1
+        query_id = f"q{self._query_id}"
+        self.api.click(query_id)
+        await self.inject(callback(chat.chat_id, user_id, data, message_id, query_id))
+
+    # Reaksi pemain terhadap pesan bot: pilih limit, tekan mulai, jawab soal
+    def on_result(self, method, params, result):
+        if method not in ("sendMessage", "editMessageText"):
+            return
+        chat = self.chats.get(int(params["chat_id"]))
+        if chat is None:
+            return
+        text = params.get("text", "")
+        now = time.perf_counter()
+        message_id = result["message_id"]
+        if text.startswith("📊 Pilih jumlah soal"):
+            self.spawn(self.click(chat, chat.players[0], LIMIT + str(self.args.limit), message_id))
+        elif text.startswith("✅ Jumlah soal"):
+            self.spawn(self.click(chat, chat.players[0], START, message_id))
+        elif "Hasil Jawaban" in text:
+            sent = chat.question_at.pop(message_id, None) if method == "editMessageText" else None
+            if sent is None and chat.question_at:
+                sent = chat.question_at.pop(max(chat.question_at))
+            if sent is not None:
+                self.result_latency.append(now - sent)
+            chat.results += 1
+        elif text.startswith("❓ Soal"):
+            chat.questions += 1
+            chat.question_at[message_id] = now
+            markup = params.get("reply_markup")
+            markup = json.loads(markup) if isinstance(markup, str) else markup
+            buttons = [b["callback_data"] for row in markup["inline_keyboard"] for b in row]
+            for user_id in chat.players:
+                if self.rng.random() < self.args.miss:
+                    continue  # pemain ini diam, soal ditutup timeout
+                delay = self.rng.uniform(0, self.args.think)
+                self.spawn(self.click(chat, user_id, self.rng.choice(buttons), message_id, delay))
+        elif text.startswith("🏁 Sesi selesai"):
+            chat.done.set()
+
+    async def run_chat(self, chat, delay):
+        await asyncio.sleep(delay)
+        for user_id in chat.players:
+            await self.inject(command(chat.chat_id, user_id, "/joinquiz"))
+        await self.inject(command(chat.chat_id, chat.players[0], "/startquiznow"))
+        await chat.done.wait()
+
+    async def run(self):
+        args = self.args
+        for c in range(args.chats):
+            chat_id = -10**12 - c
+            self.chats[chat_id] = Chat(chat_id, [10**8 + c * 1000 + p for p in range(args.players)])
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(asyncio.gather(*(
+                self.run_chat(chat, args.ramp * i / max(1, args.chats)) for i, chat in enumerate(self.chats.values())
+            )), args.timeout)
+        except asyncio.TimeoutError:
+            stuck = [chat for chat in self.chats.values() if not chat.done.is_set()]
+            stages = collections.Counter((chat.questions, chat.results) for chat in stuck)
+            raise SystemExit(f"Timeout: {len(stuck)} grup belum selesai, (soal, hasil) -> jumlah grup: {dict(stages)}")
+        elapsed = time.perf_counter() - started
+        await drain(self.server)
+
+        questions = sum(chat.questions for chat in self.chats.values())
+        return {
+            "chats": args.chats, "players": args.players, "limit": args.limit, "think": args.think,
+            "latency": args.latency, "flood": args.flood, "miss": args.miss, "seed": args.seed,
+            "elapsed_s": elapsed,
+            "updates": self.updates,
+            "updates_per_s": self.updates / elapsed,
+            "questions": questions,
+            **self.api.stats(),
+            "result_p50_ms": percentile(self.result_latency, 0.50) * 1000,
+            "result_p99_ms": percentile(self.result_latency, 0.99) * 1000,
+            "calls_per_question": sum(self.api.calls.values()) / questions if questions else 0.0,
+            "floods": self.fake.floods,
+        }
+
+
+def report(result):
+    print(f"{result['chats']} grup x {result['players']} pemain, {result['limit']} soal, think {result['think']}s, "
+          f"latency API {result['latency'] * 1000:.0f} ms, 429 {result['flood']:.0%}, seed {result['seed']}")
+    print(f"  {result['updates']} update dalam {result['elapsed_s']:.2f} s = {result['updates_per_s']:.0f} update/detik")
+    print(f"  klik -> ack      p50 {result['ack_p50_ms']:7.1f} ms | p99 {result['ack_p99_ms']:7.1f} ms")
+    print(f"  soal -> hasil    p50 {result['result_p50_ms']:7.1f} ms | p99 {result['result_p99_ms']:7.1f} ms")
+    calls = ", ".join(f"{method} {count}" for method, count in sorted(result["calls"].items()))
+    print(f"  panggilan API per soal {result['calls_per_question']:.2f} ({calls}); 429 diterima: {result['floods']}")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Load test quiz bot melawan fake Bot API")
+    parser.add_argument("--chats", type=int, default=50)
+    parser.add_argument("--players", type=int, default=8)
+    parser.add_argument("--limit", type=int, default=5, choices=(5, 10, 15, 20))
+    parser.add_argument("--think", type=float, default=0.5, help="jendela klik jawaban per soal (detik)")
+    parser.add_argument("--miss", type=float, default=0.0, help="peluang pemain tidak menjawab (soal ditutup timeout)")
+    parser.add_argument("--ramp", type=float, default=0.0, help="semua grup mulai tersebar dalam sekian detik")
+    parser.add_argument("--timeout", type=float, default=600)
+    add_common_args(parser, port=8094)
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    ARGS = parse_args()
+    # Konfigurasi main.py dibaca saat import, jadi env diisi dulu
+    os.environ.setdefault("QUESTION_TIMEOUT", "3")
+    prepare(ARGS)
+
+    from callbacks import LIMIT, START
+    from fakebot import callback, command
+
+    random.seed(ARGS.seed)
+    RESULT = asyncio.run(run_against_fake(ARGS, lambda fake, server: LoadTest(fake, server, ARGS).run()))
+    report(RESULT)
+    write_json(ARGS.json, RESULT)
@@ -0,0 +1,384 @@
+# Microbenchmark fungsi panas main.py dengan fixture in-memory (bench/fixtures.py), RNG di-seed.
+# Tiap kasus: median/p90 waktu per panggilan (setup per iterasi tidak ikut dihitung), puncak alokasi
+# (tracemalloc) dan jumlah panggilan Bot API per panggilan. Hasil bisa disimpan sebagai JSON dan
+# dibandingkan dengan baseline; baseline waktu cuma berarti di mesin yang sama.
+# Jalankan: python bench/microbench.py [--json hasil.json] [--check] [--save-baseline] [--only answer]
+import argparse
+import asyncio
+import gc
+import inspect
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "microbench_baseline.json")
+PLAYER = 10**8
+QUIZ_LIMIT = 5
+
+
+# Sesi yang sedang menunggu jawaban soal ke-`index`, `answered` pemain pertama sudah jawab
+def running_session(rng, chat_id, players, answered=0, index=0):
+    bank = main.question_bank
+    session = main.QuizSession(chat_id)
+    for p in range(players):
+        session.add_player(PLAYER + p, f"Player{PLAYER + p}")
+    session.started = True
+    session.bank = bank
+    session.limit = QUIZ_LIMIT
+    session.questions = [bank.questions[i] for i in rng.sample(range(len(bank)), QUIZ_LIMIT)]
+    session.epoch = main.next_epoch()
+    session.layouts = [rng.randrange(len(q.layouts)) for q in session.questions]
+    main.build_keyboards(session)
+    session.index = index
+    session.start_question()
+    session.question_active = True
+    session.current_message_id = 999
+    main.sessions[chat_id] = session
+    main.live_questions[chat_id] = main.question_key(session.epoch, index)
+    for p in range(answered):
+        session.record_answer(PLAYER + p, rng.randrange(4), time.monotonic() + p * 0.01)
+    return session
+
+
+def drop_session(chat_id):
+    main.sessions.pop(chat_id, None)
+    main.live_questions.pop(chat_id, None)
+    main.timers.cancel(chat_id)
+    main.session_store.delete(chat_id)
+
+
+def answer_buttons(session):
+    markup = json.loads(session.keyboards[session.index])
+    return [button["callback_data"] for row in markup["inline_keyboard"] for button in row]
+
+
+class FakeResponse:
+    status_code = 200
+    headers = {}
+
+    def __init__(self, text):
+        self.text = text
+        self.content = text.encode()
+
+    def raise_for_status(self):
+        pass
+
+
+def fake_sheet(rng, rows):
+    lines = ["Question,A,B,C,D,Correct"]
+    for i in range(rows):
+        lines.append(f"Soal nomor {i} tentang {rng.random():.6f}?,Opsi A{i},Opsi B{i},Opsi C{i},Opsi D{i},"
+                     f"{'ABCD'[rng.randrange(4)]}")
+    return "\n".join(lines)
+
+
+# Tiap kasus: fungsi async prepare(rng, bot) yang return (setup(i) -> args, fn, teardown(args), cleanup)
+# teardown jalan per iterasi di luar pengukuran, cleanup (async) sekali setelah kasus selesai.
+async def case_answer(rng, bot):
+    chat_id = -1001
+    session = running_session(rng, chat_id, players=8000)  # cukup untuk semua putaran, tiap klik pemain baru
+    buttons = answer_buttons(session)
+    message_id = session.current_message_id
+
+    def setup(i):
+        update = callback_update(bot, chat_id, PLAYER + i, rng.choice(buttons), message_id)
+        return update, FakeContext(bot)
+    return setup, main.handle_answer, None, None
+
+
+async def case_answer_rejected(rng, bot):
+    chat_id = -1002
+    session = running_session(rng, chat_id, players=20)
+    buttons = answer_buttons(session)
+    main.live_questions[chat_id] = main.question_key(session.epoch, session.index + 1)  # token soal lama
+
+    def setup(i):
+        return callback_update(bot, chat_id, PLAYER + i % 20, rng.choice(buttons), 999), FakeContext(bot)
+    return setup, main.handle_answer, None, None
+
+
+async def case_show_correct(rng, bot):
+    for p in range(20):
+        main.name_cache.remember(FakeUser(PLAYER + p))
+
+    def setup(i):
+        chat_id = -2000 - i
+        running_session(rng, chat_id, players=20, answered=20)
+        return FakeContext(bot), chat_id
+    return setup, main.show_correct_and_continue, lambda args: drop_session(args[1]), None
+
+
+async def case_send_question(rng, bot):
+    def setup(i):
+        chat_id = -3000 - i
+        session = running_session(rng, chat_id, players=20, index=1)
+        session.question_active = False
+        return FakeContext(bot), chat_id
+    return setup, main.send_question_to_group, lambda args: drop_session(args[1]), None
+
+
+async def _fill_scores(rng, store, chats, users):
+    for c in range(chats):
+        await store.add(-4000 - c, {PLAYER + rng.randrange(users * 5): rng.randrange(100) for _ in range(users)})
+
+
+async def case_scores_journal(rng, bot):
+    await _fill_scores(rng, main.score_store, 500, 20)
+
+    def setup(i):
+        return -4000 - rng.randrange(500), {PLAYER + rng.randrange(100): rng.randrange(1, 50) for _ in range(8)}
+    return setup, main.update_global_scores, None, None
+
+
+async def case_scores_sqlite(rng, bot):
+    store = main.SqliteScoreStore(os.path.abspath("bench_scores.sqlite3"))
+    await _fill_scores(rng, store, 500, 20)
+    journal, main.score_store = main.score_store, store
+
+    def setup(i):
+        return -4000 - rng.randrange(500), {PLAYER + rng.randrange(100): rng.randrange(1, 50) for _ in range(8)}
+
+    async def cleanup():
+        main.score_store = journal
+        await store.close()
+    return setup, main.update_global_scores, None, cleanup
+
+
+async def _leaderboard_chat(rng):
+    chat_id = -5000
+    await main.score_store.add(chat_id, {PLAYER + u: rng.randrange(10000) for u in range(500)})
+    for u in range(500):
+        main.user_dir.set_name(PLAYER + u, f"Player{PLAYER + u}")
+    return chat_id
+
+
+async def case_leaderboard(rng, bot):
+    chat_id = await _leaderboard_chat(rng)
+
+    def setup(i):
+        main.leaderboard_cache.pop(chat_id, None)
+        return command_update(bot, chat_id, PLAYER), FakeContext(bot)
+    return setup, main.leaderboard, None, None
+
+
+async def case_leaderboard_cached(rng, bot):
+    chat_id = await _leaderboard_chat(rng)
+
+    def setup(i):
+        return command_update(bot, chat_id, PLAYER), FakeContext(bot)
+    return setup, main.leaderboard, None, None
+
+
+async def case_load_sheet(rng, bot):
+    response = FakeResponse(fake_sheet(rng, 1000))
+    requests_module = questionbank.requests
+    questionbank.requests = type("FakeRequests", (), {"get": staticmethod(lambda url, **kwargs: response)})
+
+    def setup(i):
+        return (main.sheet_url,)
+
+    async def cleanup():
+        questionbank.requests = requests_module
+    return setup, main.load_questions_from_sheet, None, cleanup
+
+
+async def case_build_bank(rng, bot):
+    questions = questionbank.parse_questions_csv(fake_sheet(rng, 1000))
+
+    def setup(i):
+        return 2, questions
+    return setup, main.QuestionBank, None, None
+
+
+# nama -> (prepare, jumlah iterasi)
+CASES = {
+    "handle_answer": (case_answer, 2000),
+    "handle_answer_rejected": (case_answer_rejected, 2000),
+    "show_correct_and_continue": (case_show_correct, 300),
+    "send_question_to_group": (case_send_question, 500),
+    "update_global_scores_journal": (case_scores_journal, 1000),
+    "update_global_scores_sqlite": (case_scores_sqlite, 300),
+    "leaderboard": (case_leaderboard, 500),
+    "leaderboard_cached": (case_leaderboard_cached, 2000),
+    "load_questions_from_sheet": (case_load_sheet, 30),
+    "question_bank_build": (case_build_bank, 30),
+}
+
+
+async def call(fn, args):
+    result = fn(*args)
+    if inspect.isawaitable(result):
+        await result
+
+
+# Waktu: `repeat` putaran, diambil putaran dengan median terkecil (seperti min() di timeit)
+# supaya gangguan proses lain di mesin yang sama tidak langsung terbaca sebagai regresi.
+async def measure(prepare, number, seed, warmup=10, repeat=3):
+    rng = random.Random(seed)
+    random.seed(seed)
+    bot = FakeBot()
+    setup, fn, teardown, cleanup = await prepare(rng, bot)
+    samples = None
+    i = 0
+    for r in range(repeat):
+        current = []
+        gc.collect()
+        for n in range(warmup + number):
+            args = setup(i)
+            i += 1
+            started = time.perf_counter_ns()
+            await call(fn, args)
+            elapsed = time.perf_counter_ns() - started
+            # Task yang di-spawn handler (ack klik di luar mailbox chat) diselesaikan di luar pengukuran:
+            # waktu = yang menahan mailbox chat, panggilan API-nya tetap terhitung
+            await settle()
+            if teardown:
+                teardown(args)
+            if n >= warmup:
+                current.append(elapsed)
+        current.sort()
+        if samples is None or current[len(current) // 2] < samples[len(samples) // 2]:
+            samples = current
+    calls = sum(bot.calls.values()) / i
+
+    # Alokasi diukur di putaran terpisah, tracemalloc bikin waktunya tidak representatif
+    peaks = []
+    rounds = min(number, 50)
+    tracemalloc.start()
+    for _ in range(rounds):
+        args = setup(i)
+        i += 1
+        tracemalloc.reset_peak()
+        before = tracemalloc.get_traced_memory()[0]
+        await call(fn, args)
+        peaks.append(tracemalloc.get_traced_memory()[1] - before)
+        await settle()
+        if teardown:
+            teardown(args)
+    tracemalloc.stop()
+
+    if cleanup is not None:
+        await cleanup()
+    return {
+        "number": number,
+        "median_us": samples[len(samples) // 2] / 1000,
+        "p90_us": samples[int(len(samples) * 0.9)] / 1000,
+        "min_us": samples[0] / 1000,
+        "alloc_peak_kib": statistics.median(peaks) / 1024,
+        "api_calls": calls,
+    }
+
+
+async def run(names, seed, scale):
+    results = {}
+    for name in names:
+        prepare, number = CASES[name]
+        results[name] = await measure(prepare, max(1, int(number * scale)), seed)
+    await main.score_store.close()
+    return results
+
+
+# Bandingkan dengan baseline: list (nama, rasio waktu, rasio alokasi, regresi?)
+def compare(results, baseline, tolerance, alloc_tolerance, min_delta_us):
+    rows = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            rows.append((name, None, None, False))
+            continue
+        time_ratio = result["median_us"] / base["median_us"] if base["median_us"] else 1.0
+        alloc_ratio = result["alloc_peak_kib"] / base["alloc_peak_kib"] if base["alloc_peak_kib"] else 1.0
+        slower = result["median_us"] - base["median_us"] > min_delta_us
+        regressed = (time_ratio > 1 + tolerance and slower or
+                     (alloc_ratio > 1 + alloc_tolerance and result["alloc_peak_kib"] - base["alloc_peak_kib"] > 1)
+                     or result["api_calls"] > base["api_calls"] + 1e-9)
+        rows.append((name, time_ratio, alloc_ratio, regressed))
+    return rows
+
+
+def report(results, rows):
+    print(f"{'kasus':30s} {'median':>10s} {'p90':>10s} {'alokasi':>11s} {'API':>5s} {'vs baseline':>24s}")
+    for name, time_ratio, alloc_ratio, regressed in rows:
+        r = results[name]
+        versus = "-" if time_ratio is None else f"waktu {time_ratio:4.2f}x alok {alloc_ratio:4.2f}x"
+        flag = "  <-- REGRESI" if regressed else ""
+        print(f"{name:30s} {r['median_us']:8.1f}us {r['p90_us']:8.1f}us {r['alloc_peak_kib']:8.1f}KiB "
+              f"{r['api_calls']:5.2f} {versus:>24s}{flag}")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Microbenchmark handler quiz bot")
+    parser.add_argument("--only", action="append", help="jalankan kasus yang namanya mengandung teks ini")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--scale", type=float, default=1.0, help="pengali jumlah iterasi")
+    parser.add_argument("--json", help="simpan hasil ke file JSON")
+    parser.add_argument("--baseline", default=BASELINE)
+    parser.add_argument("--save-baseline", action="store_true", help="tulis hasil run ini sebagai baseline")
+    parser.add_argument("--check", action="store_true", help="exit 1 kalau ada regresi dibanding baseline")
+    parser.add_argument("--tolerance", type=float, default=0.5, help="batas kenaikan waktu median (0.5 = 50%%)")
+    parser.add_argument("--min-delta-us", type=float, default=2.0,
+                        help="selisih median minimal (us) sebelum dianggap regresi, kasus mikro kena jitter timer")
+    parser.add_argument("--alloc-tolerance", type=float, default=0.10)
+    return parser.parse_args(argv)
+
+
+def main_cli(args):
+    names = [name for name in CASES if not args.only or any(part in name for part in args.only)]
+    results = asyncio.run(run(names, args.seed, args.scale))
+    output = {
+        "meta": {"python": platform.python_version(), "machine": platform.machine(), "seed": args.seed,
+                 "scale": args.scale, "created_at": time.strftime("%Y-%m-%dT%H:%M:%S")},
+        "results": results,
+    }
+    try:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+    except FileNotFoundError:
+        baseline = {}
+    rows = compare(results, baseline, args.tolerance, args.alloc_tolerance, args.min_delta_us)
+    report(results, rows)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(output, f, indent=2)
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(output, f, indent=2)
+            f.write("\n")
+    regressions = [row[0] for row in rows if row[3]]
+    if args.check and regressions:
+        print(f"Regresi: {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    ARGS = parse_args()
+    # Konfigurasi main.py dibaca saat import. Simpan sesi debounce-nya dibuat panjang supaya
+    # timer call_later tidak menulis file di tengah pengukuran.
+    os.environ.setdefault("METRICS_PORT", "0")
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+    os.environ.setdefault("SESSION_SAVE_DELAY", "3600")
+    os.environ.setdefault("SHEET_URL", "http://127.0.0.1:9/offline.csv")
+    # Path output/baseline relatif terhadap folder pemanggil, jadi di-resolve sebelum pindah folder
+    ARGS.baseline = os.path.abspath(ARGS.baseline)
+    if ARGS.json:
+        ARGS.json = os.path.abspath(ARGS.json)
+    os.chdir(tempfile.mkdtemp())
+    shutil.copy(os.path.join(ROOT, "questions.json"), "questions.json")
+
+    import main
+    import questionbank
+    from fixtures import FakeBot, FakeContext, FakeUser, callback_update, command_update, settle
+
+    sys.exit(main_cli(ARGS))
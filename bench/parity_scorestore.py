@@ -0,0 +1,103 @@
+# Cek paritas ScoreStore (journal) vs SqliteScoreStore: operasi acak (tambah skor, jam maju melewati
+# batas hari/minggu/bulan), lalu count/top/lookup/around semua window (all-time, day, week, month)
+# harus sama persis. Di akhir kedua store dibuka ulang dari disk dan dicek lagi (replay journal vs tabel).
+# Jam dipalsukan lewat time.time supaya pergantian periode bisa diuji tanpa menunggu.
+# Jalankan: python bench/parity_scorestore.py [--ops 3000] [--seed 1]
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from scorestore import ScoreStore, SqliteScoreStore
+
+WINDOWS = (None, "day", "week", "month")
+CHATS = (-100, -200, -300)
+USERS = [10**8 + i for i in range(40)]
+
+
+class Clock:
+    def __init__(self, now):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+async def compare(journal, sqlite, rng, mismatches, label):
+    for chat_id in CHATS:
+        for window in WINDOWS:
+            checks = [("count", (chat_id,))]
+            total = await journal.count(chat_id, window=window)
+            for offset in (0, 5, max(0, total - 3)):
+                checks.append(("top", (chat_id, rng.randint(1, 10), offset)))
+            for user_id in rng.sample(USERS, 6) + [1]:  # id 1 tidak pernah dapat skor
+                checks.append(("lookup", (chat_id, user_id)))
+                checks.append(("around", (chat_id, user_id, rng.randint(1, 2))))
+            for name, args in checks:
+                expected = await getattr(journal, name)(*args, window=window)
+                actual = await getattr(sqlite, name)(*args, window=window)
+                if name == "top":
+                    expected, actual = [tuple(row) for row in expected], [tuple(row) for row in actual]
+                if expected != actual:
+                    mismatches.append((label, name, window, args, expected, actual))
+
+
+async def run(args, directory):
+    rng = random.Random(args.seed)
+    clock = Clock(time.time())
+    journal_path = os.path.join(directory, "scores_db.json")
+    sqlite_path = os.path.join(directory, "scores.sqlite3")
+    mismatches = []
+    rolls = 0
+    with mock.patch("time.time", clock):
+        journal = ScoreStore(journal_path)
+        sqlite = SqliteScoreStore(sqlite_path)
+        for op in range(args.ops):
+            if rng.random() < 0.03:
+                # Lompat 1 jam s/d 10 hari: kadang masih periode sama, kadang lewat beberapa batas
+                clock.now += rng.uniform(3600, 10 * 86400)
+                rolls += 1
+            else:
+                clock.now += rng.uniform(0, 600)
+            chat_id = rng.choice(CHATS)
+            # Rentang poin kecil supaya banyak skor seri (urutan seri juga harus sama)
+            deltas = {user_id: rng.randrange(1, 6) for user_id in rng.sample(USERS, rng.randint(1, 8))}
+            await journal.add(chat_id, deltas)
+            await sqlite.add(chat_id, deltas)
+            if op % 50 == 0:
+                await compare(journal, sqlite, rng, mismatches, f"op {op}")
+        await compare(journal, sqlite, rng, mismatches, "akhir")
+        await journal.close()
+        await sqlite.close()
+
+        # Buka ulang dari disk: journal di-replay, bucket periode harus sama dengan tabel SQLite
+        journal = ScoreStore(journal_path)
+        sqlite = SqliteScoreStore(sqlite_path)
+        await compare(journal, sqlite, rng, mismatches, "setelah buka ulang")
+        await journal.close()
+        await sqlite.close()
+    return mismatches, rolls
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cek paritas backend skor journal vs SQLite")
+    parser.add_argument("--ops", type=int, default=3000)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as directory:
+        mismatches, rolls = asyncio.run(run(args, directory))
+    for label, name, window, call_args, expected, actual in mismatches[:20]:
+        print(f"[{label}] {name}{call_args} window={window}: journal {expected} != sqlite {actual}")
+    print(f"{args.ops} operasi, {rolls} lompatan jam, seed {args.seed}: "
+          f"{'SAMA' if not mismatches else f'{len(mismatches)} beda'}")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
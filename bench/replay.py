@@ -0,0 +1,210 @@
+# Putar ulang rekaman update (UPDATE_LOG=... saat bot jalan) ke handler asli main.py melawan fake Bot API.
+# --speed 1 = tempo asli, N = N kali lebih cepat, 0 = secepatnya. Urutan deck & layout opsi diacak dengan
+# RNG per (--seed, chat, sesi ke-n) lewat QUIZ_SEED, jadi tidak bergantung urutan chat lain memulai sesi:
+# dua build yang diberi rekaman + seed sama bisa dibandingkan langsung (`questions_digest` harus sama).
+#
+# Update tiap chat diputar di jalurnya sendiri sesuai urutan rekaman. Token jawaban di rekaman berisi
+# epoch sesi asli, jadi tiap klik jawaban menunggu sampai bot versi replay benar-benar mengirim soal
+# yang sama (sesi ke-n di chat itu, soal ke-i), lalu tokennya ditulis ulang dengan epoch replay.
+# Klik yang soalnya tidak pernah muncul (rekaman mulai di tengah sesi, alur replay menyimpang)
+# dikirim apa adanya dan dihitung sebagai `unmatched`.
+# Jalankan: python bench/replay.py updates.jsonl.gz [updates.jsonl.1.gz ...] [--speed 10] [--profile out.prof]
+import argparse
+import asyncio
+import collections
+import cProfile
+import hashlib
+import json
+import os
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from harness import ApiCalls, add_common_args, drain, percentile, prepare, run_against_fake, write_json
+from updatelog import read_header, read_logs
+
+
+def chat_of(update):
+    for value in update.values():
+        if isinstance(value, dict):
+            chat = value.get("chat") or (value.get("message") or {}).get("chat")
+            if chat:
+                return chat["id"]
+    return None
+
+
+class Lane:
+    def __init__(self, rows):
+        self.rows = rows  # [(waktu, update)] satu chat
+        self.starts = 0  # klik tombol mulai di rekaman sejauh ini = nomor sesi rekaman
+        self.sessions = {}  # epoch rekaman -> nomor sesi rekaman
+        self.epochs = []  # epoch replay, urut sesi
+        self.questions = collections.defaultdict(asyncio.Event)  # (nomor sesi, index soal) -> terkirim
+        self.shown = []  # teks soal + label tombol yang dikirim replay, urut
+
+    def sent(self, epoch, index):
+        if epoch not in self.epochs:
+            self.epochs.append(epoch)
+        self.questions[self.epochs.index(epoch) + 1, index].set()
+
+
+class Replay:
+    def __init__(self, fake, server, rows, args):
+        self.fake = fake
+        self.server = server
+        self.args = args
+        self.t0 = rows[0][0] if rows else 0.0
+        self.duration = rows[-1][0] - self.t0 if rows else 0.0
+        grouped = collections.defaultdict(list)
+        for row in rows:
+            grouped[chat_of(row[1])].append(row)
+        self.lanes = {chat_id: Lane(chat_rows) for chat_id, chat_rows in grouped.items()}
+        self.updates = 0
+        self.answers = 0
+        self.unmatched = 0
+        self.behind = []  # seberapa telat update diinject dibanding jadwal (detik)
+        self.api = ApiCalls()
+        fake.on_call = self.api.on_call
+        fake.on_result = self.on_result
+
+    # Soal terkirim di replay: epoch + index diambil dari token tombol pertama
+    def on_result(self, method, params, result):
+        if method not in ("sendMessage", "editMessageText"):
+            return
+        if not params.get("text", "").startswith("❓ Soal"):
+            return
+        lane = self.lanes.get(int(params["chat_id"]))
+        markup = params.get("reply_markup")
+        if lane is None or not markup:
+            return
+        markup = json.loads(markup) if isinstance(markup, str) else markup
+        key, _ = decode_answer(markup["inline_keyboard"][0][0]["callback_data"])
+        if key is not None:
+            lane.sent(key >> 8, key & 0xFF)
+            lane.shown.append([params["text"], [b["text"] for row in markup["inline_keyboard"] for b in row]])
+
+    # Sidik soal + layout opsi yang keluar di semua chat, sama untuk rekaman + seed + bank yang sama
+    def questions_digest(self):
+        shown = sorted((str(chat_id), lane.shown) for chat_id, lane in self.lanes.items())
+        return hashlib.sha1(json.dumps(shown, ensure_ascii=False).encode()).hexdigest()[:16]
+
+    async def translate(self, lane, query):
+        key, option = decode_answer(query["data"])
+        if key is None:
+            return
+        self.answers += 1
+        session = lane.sessions.setdefault(key >> 8, lane.starts)
+        index = key & 0xFF
+        try:
+            if not session:
+                raise asyncio.TimeoutError
+            await asyncio.wait_for(lane.questions[session, index].wait(), self.args.wait)
+        except asyncio.TimeoutError:
+            self.unmatched += 1
+            return
+        query["data"] = encode_answer(lane.epochs[session - 1], index, option)
+
+    async def run_lane(self, lane, started):
+        speed = self.args.speed
+        for t, update in lane.rows:
+            if speed:
+                due = started + (t - self.t0) / speed
+                delay = due - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                self.behind.append(max(0.0, -delay))
+            query = update.get("callback_query")
+            if query is not None:
+                data = query.get("data") or ""
+                if data.startswith(ANSWER):
+                    await self.translate(lane, query)
+                elif data == START:
+                    lane.starts += 1
+                self.api.click(query["id"])
+            self.updates += 1
+            await self.server.queue.put(update)
+
+    async def run(self):
+        started = time.perf_counter()
+        await asyncio.gather(*(self.run_lane(lane, started) for lane in self.lanes.values()))
+        await drain(self.server)
+        elapsed = time.perf_counter() - started
+        handlers = {labels[0]: {"count": sum(counts), "mean_ms": total / sum(counts) * 1000}
+                    for labels, (counts, total) in main.handler_seconds.values.items() if sum(counts)}
+        return {
+            "files": self.args.logs, "speed": self.args.speed, "seed": self.args.seed,
+            "question_timeout": self.args.question_timeout,
+            "latency": self.args.latency, "flood": self.args.flood,
+            "chats": len(self.lanes),
+            "recorded_s": self.duration,
+            "elapsed_s": elapsed,
+            "updates": self.updates,
+            "updates_per_s": self.updates / elapsed if elapsed else 0.0,
+            "answers": self.answers,
+            "unmatched": self.unmatched,
+            "questions_digest": self.questions_digest(),
+            "behind_p99_ms": percentile(self.behind, 0.99) * 1000,
+            **self.api.stats(),
+            "handlers": handlers,
+            "floods": self.fake.floods,
+        }
+
+
+def report(result):
+    speed = f"{result['speed']:g}x" if result["speed"] else "secepatnya"
+    print(f"{result['updates']} update dari {result['chats']} chat, rekaman {result['recorded_s']:.1f} s, "
+          f"replay {speed} (seed {result['seed']}) selesai dalam {result['elapsed_s']:.2f} s "
+          f"= {result['updates_per_s']:.0f} update/detik")
+    if result["speed"]:
+        print(f"  telat inject p99 {result['behind_p99_ms']:.1f} ms (besar = replay tidak sanggup ikut tempo)")
+    print(f"  klik -> ack p50 {result['ack_p50_ms']:.1f} ms | p99 {result['ack_p99_ms']:.1f} ms; "
+          f"jawaban {result['answers']}, tidak cocok dengan soal replay {result['unmatched']}")
+    print(f"  sidik soal + layout {result['questions_digest']}")
+    for name, stats in sorted(result["handlers"].items()):
+        print(f"  {name:16s} {stats['count']:7d}x  rata-rata {stats['mean_ms']:.2f} ms")
+    calls = ", ".join(f"{method} {count}" for method, count in sorted(result["calls"].items()))
+    print(f"  panggilan API: {calls}; 429 diterima: {result['floods']}")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Putar ulang rekaman update quiz bot melawan fake Bot API")
+    parser.add_argument("logs", nargs="+", help="file rekaman UPDATE_LOG (beberapa file digabung urut waktu)")
+    parser.add_argument("--speed", type=float, default=1.0, help="pengali tempo, 0 = secepatnya")
+    parser.add_argument("--question-timeout", type=int,
+                        help="timeout soal (detik), default timeout di rekaman dibagi --speed (1 kalau secepatnya)")
+    parser.add_argument("--wait", type=float, help="batas tunggu klik jawaban untuk soalnya, default timeout soal + 5 s")
+    parser.add_argument("--profile", help="simpan profil cProfile ke file ini (buka dengan pstats / snakeviz)")
+    add_common_args(parser, port=8095)
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    ARGS = parse_args()
+    # Konfigurasi main.py dibaca saat import, jadi env diisi dulu. Timeout soal ikut dipercepat supaya
+    # soal yang ditutup timeout di rekaman juga ditutup di titik yang sama (/settimer per chat tidak ikut).
+    if ARGS.question_timeout is None:
+        recorded = read_header(ARGS.logs[0])["meta"].get("question_timeout", 15)
+        ARGS.question_timeout = max(1, round(recorded / ARGS.speed)) if ARGS.speed else 1
+    if ARGS.wait is None:
+        ARGS.wait = ARGS.question_timeout + 5.0
+    os.environ["QUESTION_TIMEOUT"] = str(ARGS.question_timeout)
+    os.environ.pop("UPDATE_LOG", None)  # replay tidak merekam dirinya sendiri
+    os.environ["QUIZ_SEED"] = str(ARGS.seed)
+    prepare(ARGS, paths=("logs", "profile", "json"))
+
+    import main
+    from callbacks import ANSWER, START, decode_answer, encode_answer
+
+    ROWS = list(read_logs(ARGS.logs))
+    profiler = cProfile.Profile() if ARGS.profile else None
+    if profiler:
+        profiler.enable()
+    RESULT = asyncio.run(run_against_fake(ARGS, lambda fake, server: Replay(fake, server, ROWS, ARGS).run()))
+    if profiler:
+        profiler.disable()
+        profiler.dump_stats(ARGS.profile)
+    report(RESULT)
+    write_json(ARGS.json, RESULT)
@@ -0,0 +1,114 @@
+# Pengganti lokal Google Sheets export CSV untuk fetch_sheet / reload_questions.
+# Kirim ETag (hash isi) dan Last-Modified, balas 304 kalau If-None-Match / If-Modified-Since cocok.
+# Header bisa dimatikan satu-satu untuk menguji jalur pembanding sha256 (export tanpa ETag).
+# Jalankan sendiri: python bench/sheetserver.py soal.csv [--port 8098] [--no-etag] [--no-last-modified]
+# lalu SHEET_URL=http://127.0.0.1:8098/sheet.csv; isi file dibaca ulang tiap request.
+import argparse
+import asyncio
+import collections
+import hashlib
+import time
+from email.utils import formatdate, parsedate_to_datetime
+
+from aiohttp import web
+
+
+class SheetServer:
+    def __init__(self, text="", etag=True, last_modified=True, path="/sheet.csv"):
+        self.etag = etag
+        self.last_modified = last_modified
+        self.path = path
+        self.responses = collections.Counter()  # status -> jumlah
+        self.modified = 0
+        self.set(text)
+        self._runner = None
+        self.url = None
+
+    # Ganti isi sheet; Last-Modified selalu maju minimal 1 detik (resolusi header-nya per detik)
+    def set(self, text):
+        self.text = text
+        self.modified = max(int(time.time()), self.modified + 1)
+
+    def _not_modified(self, request, tag):
+        if self.etag and "If-None-Match" in request.headers:
+            return request.headers["If-None-Match"] == tag
+        since = request.headers.get("If-Modified-Since")
+        if self.last_modified and since:
+            try:
+                return parsedate_to_datetime(since).timestamp() >= self.modified
+            except (TypeError, ValueError):
+                return False
+        return False
+
+    async def handle(self, request):
+        body = self.text.encode("utf-8")
+        tag = '"' + hashlib.sha1(body).hexdigest()[:16] + '"'
+        headers = {}
+        if self.etag:
+            headers["ETag"] = tag
+        if self.last_modified:
+            headers["Last-Modified"] = formatdate(self.modified, usegmt=True)
+        status = 304 if self._not_modified(request, tag) else 200
+        self.responses[status] += 1
+        if status == 304:
+            return web.Response(status=304, headers=headers)
+        return web.Response(body=body, content_type="text/csv", charset="utf-8", headers=headers)
+
+    async def start(self, host="127.0.0.1", port=8098):
+        app = web.Application()
+        app.router.add_get(self.path, self.handle)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, host, port).start()
+        self.url = f"http://{host}:{port}{self.path}"
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+
+
+# CSV format sheet soal (kolom: Question, A, B, C, D, Correct)
+def sheet_csv(questions):
+    lines = ["Question,A,B,C,D,Correct"]
+    for text, options, correct in questions:
+        lines.append(",".join([text, *options, correct]))
+    return "\n".join(lines) + "\n"
+
+
+class FileSheetServer(SheetServer):
+    def __init__(self, file, **kwargs):
+        self.file = file
+        super().__init__(self._read(), **kwargs)
+
+    def _read(self):
+        with open(self.file, "r", encoding="utf-8") as f:
+            return f.read()
+
+    async def handle(self, request):
+        text = self._read()
+        if text != self.text:
+            self.set(text)
+        return await super().handle(request)
+
+
+async def serve(args):
+    server = FileSheetServer(args.file, etag=not args.no_etag, last_modified=not args.no_last_modified)
+    await server.start(args.host, args.port)
+    print(f"Sheet {args.file} di {server.url}")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await server.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Server CSV lokal pengganti Google Sheets")
+    parser.add_argument("file", help="file CSV soal")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8098)
+    parser.add_argument("--no-etag", action="store_true")
+    parser.add_argument("--no-last-modified", action="store_true")
+    try:
+        asyncio.run(serve(parser.parse_args()))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,90 @@
+import itertools
+import json
+import time
+
+# Format callback_data: 1 karakter jenis + payload angka base36.
+#   a<base36>  -> jawaban: ((epoch << 8 | index soal) << 3) | index opsi
+#   l<n>       -> pilih jumlah soal
+#   s          -> mulai quiz
+ANSWER = "a"
+LIMIT = "l"
+START = "s"
+
+_DIGITS = "0123456789abcdefghijklmnopqrstuvwxyz"
+
+# Epoch sesi naik terus, mulai dari waktu boot supaya tidak bentrok setelah restart
+_epochs = itertools.count(int(time.time()))
+
+
+def next_epoch():
+    return next(_epochs)
+
+
+def _b36(n):
+    out = []
+    while True:
+        n, r = divmod(n, 36)
+        out.append(_DIGITS[r])
+        if not n:
+            return "".join(reversed(out))
+
+
+# Key soal yang sedang aktif: dibandingkan langsung dengan isi token
+def question_key(epoch, index):
+    return (epoch << 8) | index
+
+
+def encode_answer(epoch, index, option):
+    return ANSWER + _b36((question_key(epoch, index) << 3) | option)
+
+
+# Return (key soal, index opsi) atau (None, None) kalau token tidak valid
+def decode_answer(data):
+    try:
+        payload = int(data[1:], 36)
+    except (TypeError, ValueError):
+        return None, None
+    return payload >> 3, payload & 7
+
+
+# Render keyboard soal untuk satu sesi (sekali di awal sesi), hasilnya JSON siap kirim
+def render_keyboard(question, order, epoch, index):
+    rows = [[{"text": question.options[i], "callback_data": encode_answer(epoch, index, i)}] for i in order]
+    return json.dumps({"inline_keyboard": rows}, ensure_ascii=False)
+
+
+# Epoch dimulai dari waktu boot, token jawaban dengan epoch lebih kecil pasti bukan buatan bot ini
+MIN_EPOCH = 1_500_000_000
+
+
+def _valid_answer(payload):
+    return bool(payload) and all(c in _DIGITS for c in payload) and int(payload, 36) >> 11 >= MIN_EPOCH
+
+
+# Payload yang sah per jenis. Selain itu (tombol format lama seperti "start_quiz", "limit_5",
+# atau teks opsi yang kebetulan diawali a/l/s) dianggap tombol basi dan masuk fallback.
+PAYLOADS = {
+    ANSWER: _valid_answer,
+    LIMIT: lambda payload: payload.isascii() and payload.isdigit(),
+    START: lambda payload: payload == "",
+}
+
+
+# Satu handler untuk semua callback query, dispatch berdasarkan karakter pertama
+class CallbackRouter:
+    def __init__(self, fallback=None):
+        self.routes = {}
+        self.fallback = fallback
+
+    def route(self, kind, handler):
+        self.routes[kind] = handler
+
+    async def dispatch(self, update, context):
+        data = update.callback_query.data or ""
+        kind, payload = data[:1], data[1:]
+        handler = self.routes.get(kind)
+        valid = PAYLOADS.get(kind)
+        if handler is None or valid is not None and not valid(payload):
+            handler = self.fallback
+        if handler is not None:
+            return await handler(update, context)
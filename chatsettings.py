@@ -0,0 +1,48 @@
+import asyncio
+import contextlib
+import json
+import os
+import threading
+
+from filelock import file_lock
+
+
+# Setelan per chat yang diatur admin grup (/settimer dll), disimpan di chat_settings.json
+# supaya bertahan lewat restart. values[field] = {chat_id: nilai}, dipakai langsung seperti dict biasa.
+# shared=True: beberapa proses (mode sharded) menulis file yang sama. Tiap chat cuma dipegang
+# satu shard, jadi saat simpan cukup timpa entri chat yang berubah di proses ini.
+class ChatSettings:
+    def __init__(self, path, fields, shared=False):
+        self.path = path
+        self.shared = shared
+        self.values = {field: {} for field in fields}
+        self._lock = threading.Lock()
+        for chat_id, entry in self._load().items():
+            for field, value in entry.items():
+                if field in self.values:
+                    self.values[field][int(chat_id)] = value
+
+    def _load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def _write(self, chat_id, entry):
+        with self._lock, file_lock(self.path) if self.shared else contextlib.nullcontext():
+            data = self._load()
+            if entry:
+                data[chat_id] = entry
+            else:
+                data.pop(chat_id, None)
+            tmp = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+            os.replace(tmp, self.path)
+
+    # Ubah satu setelan lalu simpan entri chat itu (lock file + tulis di thread, bukan di event loop)
+    async def set(self, field, chat_id, value):
+        self.values[field][chat_id] = value
+        entry = {name: values[chat_id] for name, values in self.values.items() if chat_id in values}
+        await asyncio.to_thread(self._write, str(chat_id), entry)
@@ -0,0 +1,106 @@
+import json
+import os
+import random
+import threading
+
+from filelock import file_lock
+
+
+# Shuffle-bag per chat: soal tidak akan keluar lagi sebelum semua soal di bank
+# sudah keluar. Yang disimpan seed + sidik (Question.fingerprint) soal yang sudah keluar
+# di putaran ini, jadi bank ganti versi (refresh sheet, /reloadsoal) tidak mengulang
+# putaran: soal lama yang sudah keluar tetap dilewati, soal baru/diubah ikut antre.
+class DrawDeck:
+    __slots__ = ("seed", "drawn", "carry", "_bank", "_order", "_pos")
+
+    def __init__(self, seed, drawn=(), carry=()):
+        self.seed = seed
+        self.drawn = set(drawn)
+        self.carry = tuple(carry)  # sidik soal dari akhir putaran sebelumnya
+        self._bank = None
+
+    # Urutan sisa soal untuk versi bank ini, cuma dibangun ulang kalau versinya ganti
+    def _remaining(self, bank):
+        if self._bank != bank.digest:
+            questions = bank.questions
+            perm = list(range(len(questions)))
+            random.Random(self.seed).shuffle(perm)
+            perm = [i for i in perm if questions[i].fingerprint not in self.drawn]
+            # Soal yang baru keluar di akhir putaran sebelumnya ditaruh paling belakang
+            if self.carry:
+                carry = set(self.carry)
+                perm = ([i for i in perm if questions[i].fingerprint not in carry] +
+                        [i for i in perm if questions[i].fingerprint in carry])
+            self._bank, self._order, self._pos = bank.digest, perm, 0
+        return self._order
+
+    def take(self, bank, limit):
+        order = self._remaining(bank)
+        taken = order[self._pos:self._pos + limit]
+        self._pos += len(taken)
+        self.drawn.update(bank.questions[i].fingerprint for i in taken)
+        return taken
+
+    def to_dict(self):
+        return {"seed": self.seed, "drawn": sorted(self.drawn), "carry": list(self.carry)}
+
+
+# shared=True: beberapa proses (mode sharded) menulis file yang sama. Tiap chat cuma
+# dipegang satu shard, jadi saat simpan cukup timpa deck chat yang berubah di proses ini.
+class DeckStore:
+    def __init__(self, path, rng=random, shared=False):
+        self.path = path
+        self.rng = rng
+        self.shared = shared
+        self.decks = {}
+        self._dirty = set()
+        self._lock = threading.Lock()  # save() jalan di thread, bisa beberapa sekaligus
+        for chat_id, data in self._load().items():
+            # Format lama (posisi per digest bank, tanpa sidik) tidak bisa dipetakan, mulai putaran baru
+            if "drawn" in data:
+                self.decks[chat_id] = DrawDeck(data["seed"], data["drawn"], data.get("carry", ()))
+
+    def _load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def save(self):
+        with self._lock:
+            if not self.shared:
+                # list() dulu: dict bisa bertambah di event loop selama thread ini jalan
+                self._write({chat_id: deck.to_dict() for chat_id, deck in list(self.decks.items())})
+                return
+            dirty, self._dirty = self._dirty, set()
+            with file_lock(self.path):
+                data = self._load()
+                for chat_id in dirty:
+                    data[chat_id] = self.decks[chat_id].to_dict()
+                self._write(data)
+
+    def _write(self, data):
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp, self.path)
+
+    # Ambil `limit` id soal untuk chat ini, O(limit) kecuali saat ganti putaran / versi bank.
+    # rng: sumber seed deck baru, default self.rng
+    def draw(self, chat_id, bank, limit, rng=None):
+        rng = rng or self.rng
+        chat_id = str(chat_id)
+        limit = min(limit, len(bank))
+        self._dirty.add(chat_id)
+        deck = self.decks.get(chat_id)
+        if deck is None:
+            deck = self.decks[chat_id] = DrawDeck(rng.getrandbits(32))
+
+        drawn = deck.take(bank, limit)
+        if len(drawn) < limit:
+            # Bank habis -> putaran baru, soal yang barusan keluar jangan diulang dulu
+            carry = [bank.questions[i].fingerprint for i in drawn]
+            deck = self.decks[chat_id] = DrawDeck(rng.getrandbits(32), carry=carry)
+            drawn = drawn + deck.take(bank, limit - len(drawn))
+        return drawn
@@ -0,0 +1,15 @@
+import contextlib
+import fcntl
+import os
+
+
+# Lock antar proses (flock di file <path>.lock) untuk file JSON yang ditulis beberapa worker shard.
+# Lock ikut lepas kalau prosesnya mati, jadi tidak ada lock basi.
+@contextlib.contextmanager
+def file_lock(path):
+    fd = os.open(path + ".lock", os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        yield
+    finally:
+        os.close(fd)
@@ -1,57 +1,317 @@
 import logging
 import json
 import random
-import requests
-import csv
-import io
 import os
+import secrets
 import asyncio
-# from aiohttp import web
-from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
-from telegram.ext import ApplicationBuilder, CommandHandler, CallbackQueryHandler, ContextTypes
-
-logging.basicConfig(level=logging.INFO)
+import functools
+import sys
+import time
+from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup, ReplyParameters
+from telegram.error import BadRequest, TelegramError
+from telegram.ext import ApplicationBuilder, CallbackContext, CommandHandler, CallbackQueryHandler, ContextTypes, TypeHandler
+from namecache import NameCache
+from userstore import UserDirectory
+from questionbank import load_snapshot, save_snapshot, fetch_sheet, QuestionBank, diff_banks
+from decks import DeckStore
+from chatsettings import ChatSettings
+from scheduler import DeadlineScheduler
+from actors import ChatActors
+from webhook import run_webhook
+from metrics import Registry, LoopLagMonitor, timed, LAG_BUCKETS
+from updatelog import UpdateRecorder
+from shard import HashRing, run_sharded, run_worker
+from outbound import OutboundScheduler, DroppedRequest, HIGH, LOW
+from scoring import RULES, score_answers
+from session import QuizSession
+from reaper import SessionReaper
+from sessionstore import SessionStore
+from scorestore import ScoreStore, SqliteScoreStore
+from windows import ALIASES, LABELS, period_key
+from callbacks import CallbackRouter, ANSWER, LIMIT, START, next_epoch, question_key, decode_answer, render_keyboard
+
+# LOG_LEVEL=DEBUG untuk log detail alur soal. Di level lain log.debug cuma 1 cek level,
+# argumennya tidak diformat sama sekali.
+LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO").upper()
+logging.basicConfig(level=LOG_LEVEL, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+if LOG_LEVEL != "DEBUG":
+    # httpx mencatat setiap request Bot API di level INFO; jumlah & latency-nya sudah ada di /metrics
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+log = logging.getLogger("quiz")
 
 # Data
-sessions = {}  # session per chat_id
+sessions = {}  # QuizSession per chat_id
+live_questions = {}  # chat_id -> key soal yang sedang bisa dijawab
+timers = DeadlineScheduler()  # semua timer soal, key = chat_id
+QUESTION_TIMEOUT = int(os.environ.get("QUESTION_TIMEOUT", 15))
+SCORING_RULE = os.environ.get("SCORING_RULE", "rank")
+# Update per chat diproses berurutan. Lebih dari ACTOR_MAX_QUEUED update antre -> handler PTB /
+# worker webhook menunggu, antrean webhook penuh dan Telegram dapat 503 (kirim ulang nanti).
+actors = ChatActors(idle_timeout=int(os.environ.get("ACTOR_IDLE_TIMEOUT", 60)),
+                    max_queued=int(os.environ.get("ACTOR_MAX_QUEUED", 10000)))
+CONCURRENT_UPDATES = int(os.environ.get("CONCURRENT_UPDATES", 256))
+# Sesi yang ditinggal dibuang setelah idle sekian detik (per state, 0 = tidak pernah)
+reaper = SessionReaper(sessions, {
+    "lobby": int(os.environ.get("SESSION_TTL_LOBBY", 3600)),
+    "waiting": int(os.environ.get("SESSION_TTL_WAITING", 600)),
+    "running": int(os.environ.get("SESSION_TTL_RUNNING", 900)),
+}, interval=int(os.environ.get("SESSION_REAP_INTERVAL", 60)))
+# Mode hemat pesan: hasil di-edit ke pesan soal, penolakan jadi toast, /questionstatus di-edit live
+# Mode sharded: SHARDS=N -> 1 proses ingress + N proses worker, chat dibagi lewat consistent hashing.
+# Tiap worker menjalankan file ini juga dengan BOT_MODE=worker dan SHARD_INDEX-nya sendiri.
+SHARDS = int(os.environ.get("SHARDS", 0))  # 0 = 1 proses biasa
+SHARD_INDEX = int(os.environ.get("SHARD_INDEX", 0))
+shard_ring = HashRing(SHARDS) if SHARDS else None
+
+# Setelan chat yang diatur admin, disimpan di chat_settings.json
+chat_settings = ChatSettings("chat_settings.json", ("timeout", "scoring"), shared=bool(SHARDS))
+chat_timeouts = chat_settings.values["timeout"]  # chat_id -> detik per soal (diatur lewat /settimer)
+chat_scoring = chat_settings.values["scoring"]  # chat_id -> nama aturan skor (diatur lewat /setscoring)
+
+# UPDATE_LOG=updates.jsonl.gz -> semua update masuk direkam untuk diputar ulang (bench/replay.py).
+# Mode sharded: tiap worker menulis filenya sendiri (updates.jsonl.<shard>.gz).
+UPDATE_LOG = os.environ.get("UPDATE_LOG")
+if UPDATE_LOG and SHARDS:
+    UPDATE_LOG = "{0}.{2}{1}".format(*os.path.splitext(UPDATE_LOG), SHARD_INDEX)
+update_recorder = None
+
+LOW_CHATTER = os.environ.get("LOW_CHATTER", "1") == "1"
+STATUS_EDIT_DELAY = 2  # detik, edit status digabung per jeda ini
+# Semua request keluar lewat scheduler ini (limit global + per chat, prioritas).
+# Limit global berlaku per token bot, jadi di mode sharded dibagi rata ke semua worker.
+outbound = OutboundScheduler(
+    global_rate=float(os.environ.get("OUTBOUND_GLOBAL_RATE", 25)) / max(SHARDS, 1),
+    global_burst=max(1.0, 5 / max(SHARDS, 1)),
+    group_rate=float(os.environ.get("OUTBOUND_GROUP_PER_MINUTE", 20)) / 60,
+)
+
+# Metrik Prometheus: GET /metrics di server webhook, atau server kecil di METRICS_PORT
+# untuk mode polling / worker shard (port + SHARD_INDEX). METRICS_PORT=0 = mati.
+METRICS_HOST = os.environ.get("METRICS_HOST", "127.0.0.1")
+METRICS_PORT = int(os.environ.get("METRICS_PORT", 9100))
+registry = Registry()
+handler_seconds = registry.histogram("quiz_handler_seconds", "Durasi handler, tanpa waktu antre di actor", ("handler",))
+handler_errors = registry.counter("quiz_handler_errors_total", "Handler yang berakhir dengan exception", ("handler",))
+api_seconds = registry.histogram("quiz_bot_api_seconds", "Latency panggilan Bot API per method", ("method", "result"))
+outbound.observe = lambda method, seconds, result: api_seconds.observe(seconds, method, result)
+timers.observe_lag = registry.histogram(
+    "quiz_timer_lag_seconds", "Telat timer soal dari deadline-nya", buckets=LAG_BUCKETS).observe
+loop_lag = LoopLagMonitor(registry.histogram(
+    "quiz_event_loop_lag_seconds", "Telat bangun event loop dari jadwalnya", buckets=LAG_BUCKETS))
+
+def session_counts():
+    counts = {(state,): 0 for state in reaper.ttls}
+    for session in sessions.values():
+        counts[(session.state,)] += 1
+    return counts
+
+registry.gauge("quiz_sessions", "Sesi aktif per state", ("state",), fn=session_counts)
+registry.counter("quiz_sessions_reaped_total", "Sesi idle yang dibuang reaper, per state", ("state",),
+                 fn=lambda: {(state,): count for state, count in reaper.reaped.items()})
+registry.gauge("quiz_participants", "Pemain di semua sesi aktif", fn=lambda: sum(len(s.players) for s in sessions.values()))
+registry.gauge("quiz_timers_pending", "Timer soal yang menunggu", fn=lambda: len(timers))
+registry.gauge("quiz_actor_queue", "Update yang antre di actor chat", fn=lambda: actors.stats()["queued"])
+registry.gauge("quiz_outbound_queue", "Request Bot API yang antre di scheduler", fn=lambda: outbound.stats()["queued"])
+
 scores_db = "scores_db.json"
+users_db = "users_db.json"
+decks_db = "decks_db.json"
+sessions_dir = "sessions_db"
+name_cache = NameCache(ttl=int(os.environ.get("NAME_CACHE_TTL", 3600)), maxsize=int(os.environ.get("NAME_CACHE_SIZE", 5000)))
+registry.counter("quiz_name_cache_lookups_total", "Lookup nama lewat NameCache", ("result",),
+                 fn=lambda: {("hit",): name_cache.hits, ("miss",): name_cache.misses})
+registry.gauge("quiz_name_cache_entries", "Nama yang tersimpan di NameCache", fn=lambda: name_cache.stats()["size"])
+registry.gauge("quiz_name_cache_inflight", "get_chat NameCache yang sedang jalan", fn=lambda: name_cache.stats()["inflight"])
+user_dir = UserDirectory(users_db, shared=bool(SHARDS))
+USER_REFRESH_AGE = int(os.environ.get("USER_REFRESH_AGE", 7 * 86400))
+
+# Skor global. Default: snapshot scores_db.json + journal delta, di-replay saat startup.
+# SCORE_BACKEND=sqlite: tabel SQLite (WAL), isi scores_db.json dimigrasi sekali saat pertama dibuka.
+# Mode sharded wajib sqlite: journal cuma aman untuk 1 proses penulis.
+SCORE_BACKEND = os.environ.get("SCORE_BACKEND", "sqlite" if SHARDS else "journal")
+if SHARDS and SCORE_BACKEND != "sqlite":
+    raise SystemExit("SHARDS butuh SCORE_BACKEND=sqlite (beberapa worker menulis skor bersamaan)")
+LEADERBOARD_PAGE_SIZE = 20
+leaderboard_cache = {}  # chat_id -> {(window, periode, halaman): teks}, dibuang setiap skor grup itu berubah
+if SCORE_BACKEND == "sqlite":
+    score_store = SqliteScoreStore(os.environ.get("SCORE_DB", "scores.sqlite3"), json_path=scores_db)
+else:
+    score_store = ScoreStore(
+        scores_db,
+        fsync_delay=float(os.environ.get("SCORE_FSYNC_DELAY", 0.05)),
+        compact_bytes=int(os.environ.get("SCORE_COMPACT_BYTES", 1 << 20)),
+    )
 
-# Load previous scores from file
-def load_scores():
+# Load questions from Google Sheets
+def load_questions_from_sheet(url):
+    snapshot = fetch_sheet(url)
+    return snapshot["questions"]
+
+sheet_url = os.environ.get("SHEET_URL", "https://docs.google.com/spreadsheets/d/1iG0yUxbWU90wY7p3vpaoc0YPUJIsFjxx9Icnf4I2l14/export?format=csv&gid=1745206204")
+questions_snapshot = os.environ.get("QUESTIONS_SNAPSHOT", "questions_snapshot.json")
+QUESTION_RELOAD_INTERVAL = int(os.environ.get("QUESTION_RELOAD_INTERVAL", 0))  # detik, 0 = cuma sekali saat startup
+ADMIN_IDS = {int(x) for x in os.environ.get("ADMIN_IDS", "").split(",") if x.strip()}
+
+# Load questions dari snapshot lokal dulu (cepat, tanpa network),
+# kalau belum ada pakai questions.json bawaan
+def load_local_questions():
+    snapshot = load_snapshot(questions_snapshot)
+    if snapshot and snapshot.get("questions"):
+        return snapshot, snapshot["questions"]
+    try:
+        with open("questions.json", "r", encoding="utf-8") as f:
+            return None, json.load(f)
+    except FileNotFoundError:
+        return None, []
+
+# Bank soal yang aktif. Sesi yang sudah jalan pegang versinya sendiri
+# (session.bank), sesi baru selalu ambil versi terbaru.
+_snapshot, _questions = load_local_questions()
+question_bank = QuestionBank(1, _questions, _snapshot)
+reload_lock = asyncio.Lock()
+decks = DeckStore(decks_db, shared=bool(SHARDS))
+# Acak deck & layout opsi per sesi. QUIZ_SEED diisi (bench/replay.py): RNG diturunkan dari
+# (seed, chat, sesi ke-n chat itu), jadi hasilnya tidak bergantung urutan chat lain memulai sesi.
+QUIZ_SEED = os.environ.get("QUIZ_SEED")
+session_starts = {}  # chat_id -> sesi yang sudah dimulai di proses ini (cuma dengan QUIZ_SEED)
+
+def session_rng(chat_id):
+    if QUIZ_SEED is None:
+        return random
+    n = session_starts[chat_id] = session_starts.get(chat_id, 0) + 1
+    return random.Random(f"{QUIZ_SEED}:{chat_id}:{n}")
+
+# Reload bank soal dari sheet: fetch + build di thread, lalu swap referensi.
+# Return dict laporan (versi, durasi, jumlah tambah/hapus/ubah).
+async def reload_questions(force=False):
+    global question_bank
+    async with reload_lock:
+        started = time.perf_counter()
+        old = question_bank
+        previous = old.snapshot
+        if force and previous:
+            # Abaikan ETag/Last-Modified, tapi tetap skip kalau isinya sama persis
+            previous = {"sha256": previous.get("sha256")}
+        snapshot = await asyncio.to_thread(fetch_sheet, sheet_url, previous)
+        if snapshot is None:
+            return {"changed": False, "version": old.version, "total": len(old),
+                    "duration_ms": (time.perf_counter() - started) * 1000}
+
+        new = await asyncio.to_thread(QuestionBank, old.version + 1, snapshot["questions"], snapshot)
+        added, removed, changed = diff_banks(old, new)
+        question_bank = new
+        await asyncio.to_thread(save_snapshot, questions_snapshot, snapshot)
+
+        report = {"changed": True, "version": new.version, "total": len(new),
+                  "added": added, "removed": removed, "updated": changed,
+                  "duration_ms": (time.perf_counter() - started) * 1000}
+        logging.info(f"Bank soal diperbarui: {report}")
+        return report
+
+# Refresh di background: sekali saat startup, lalu periodik kalau diaktifkan
+async def periodic_reload():
+    while True:
+        try:
+            await reload_questions()
+        except Exception as e:
+            logging.warning(f"Gagal refresh soal dari sheet, tetap pakai bank v{question_bank.version}: {e}")
+        if QUESTION_RELOAD_INTERVAL <= 0:
+            return
+        await asyncio.sleep(QUESTION_RELOAD_INTERVAL)
+
+# ADMIN_IDS, atau admin / pembuat grup ini
+async def is_chat_admin(update, context):
+    user_id = update.effective_user.id
+    if user_id in ADMIN_IDS:
+        return True
+    member = await context.bot.get_chat_member(update.effective_chat.id, user_id)
+    return member.status in ("creator", "administrator")
+
+# Mode sharded: bank baru dari worker lain (/reloadsoal, refresh sheet) diambil dari snapshot yang
+# ditulisnya. Tiap interval cuma os.stat; isinya dibaca kalau mtime berubah, dipakai kalau sha-nya beda.
+SNAPSHOT_WATCH_INTERVAL = float(os.environ.get("SNAPSHOT_WATCH_INTERVAL", 5))
+
+def snapshot_mtime():
     try:
-        with open(scores_db, "r", encoding="utf-8") as f:
-            return json.load(f)
+        return os.stat(questions_snapshot).st_mtime_ns
     except FileNotFoundError:
-        return {}
+        return None
+
+async def adopt_snapshot():
+    global question_bank
+    async with reload_lock:
+        old = question_bank
+        snapshot = await asyncio.to_thread(load_snapshot, questions_snapshot)
+        if not snapshot or not snapshot.get("questions"):
+            return
+        if old.snapshot and snapshot.get("sha256") == old.snapshot.get("sha256"):
+            return  # snapshot tulisan proses ini sendiri, atau isi sheet sama
+        question_bank = await asyncio.to_thread(QuestionBank, old.version + 1, snapshot["questions"], snapshot)
+        logging.info(f"Bank soal v{question_bank.version} diambil dari snapshot worker lain ({len(question_bank)} soal)")
+
+async def watch_snapshot():
+    seen = snapshot_mtime()
+    while True:
+        await asyncio.sleep(SNAPSHOT_WATCH_INTERVAL)
+        mtime = snapshot_mtime()
+        if mtime is None or mtime == seen:
+            continue
+        seen = mtime
+        try:
+            await adopt_snapshot()
+        except Exception as e:
+            logging.warning(f"Gagal ambil snapshot soal, tetap pakai bank v{question_bank.version}: {e}")
+
+# /reloadsoal (admin) -> reload bank soal tanpa restart bot.
+# Di mode sharded cuma worker pemilik chat ini yang reload; worker lain ikut lewat watch_snapshot.
+async def reload_questions_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    if not await is_chat_admin(update, context):
+        await reply_low(context, update.message, "❗ Hanya admin yang bisa reload soal.")
+        return
 
-# Save scores to file
-def save_scores():
-    with open(scores_db, "w", encoding="utf-8") as f:
-        json.dump(global_scores, f, indent=4)
+    try:
+        report = await reload_questions(force=True)
+    except Exception as e:
+        await reply_low(context, update.message, f"❗ Gagal reload soal: {e}")
+        return
 
-# Global score dictionary
-global_scores = load_scores()
+    if not report["changed"]:
+        await update.message.reply_text(
+            f"ℹ️ Soal tidak berubah (v{report['version']}, {report['total']} soal, {report['duration_ms']:.0f} ms)."
+        )
+        return
+    await update.message.reply_text(
+        f"✅ Bank soal v{report['version']} dimuat dalam {report['duration_ms']:.0f} ms\n"
+        f"Total: {report['total']} soal\n"
+        f"➕ {report['added']} baru | ➖ {report['removed']} dihapus | ✏️ {report['updated']} diubah"
+    )
 
-# Load questions from Google Sheets
-def load_questions_from_sheet(url):
-    response = requests.get(url)
-    response.raise_for_status()
 
-    questions = []
-    reader = csv.DictReader(io.StringIO(response.text))
-    for row in reader:
-        correct_index = ["A", "B", "C", "D"].index(row["Correct"].strip().upper())
-        options = [row["A"], row["B"], row["C"], row["D"]]
-        questions.append({
-            "question": row["Question"],
-            "options": options,
-            "answer": options[correct_index]
-        })
-    return questions
+# Rekam update apa adanya (group -2 = sebelum handler lain), waktu = saat mulai diproses
+async def record_update(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    update_recorder.record(update.to_dict())
 
-sheet_url = "https://docs.google.com/spreadsheets/d/1iG0yUxbWU90wY7p3vpaoc0YPUJIsFjxx9Icnf4I2l14/export?format=csv&gid=1745206204"
-all_questions_master = load_questions_from_sheet(sheet_url)
+# Simpan nama user dari setiap update yang masuk (gratis, tanpa get_chat)
+async def remember_user(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    name_cache.remember(update.effective_user)
+    if user_dir.upsert(update.effective_user):
+        user_dir.schedule_save()
 
+# Refresh nama basi di background, tidak menahan balasan ke grup
+def refresh_stale_users(context, user_ids):
+    if user_dir.stale(user_ids, USER_REFRESH_AGE):
+        context.application.create_task(user_dir.refresh(name_cache, context.bot, user_ids, USER_REFRESH_AGE))
+
+# Balasan status/error: prioritas rendah, boleh digabung/dibuang kalau chat lagi ramai
+async def reply_low(context, message, text):
+    quote = None
+    if message.chat.type != "private":
+        quote = ReplyParameters(message.message_id, allow_sending_without_reply=True)
+    try:
+        return await context.bot.send_message(chat_id=message.chat_id, text=text, reply_parameters=quote, rate_limit_args=LOW)
+    except DroppedRequest as e:
+        logging.info(f"Balasan dibuang: {e}")
+        return None
 
 # Start (new entrypoint)
 async def start_quiz_wadidaw(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -61,28 +321,54 @@ async def start_quiz_wadidaw(update: Update, context: ContextTypes.DEFAULT_TYPE)
     /quizwadidaw -> munculin bot quiz
     /joinquiz -> jojn quiz
     /questionstatus -> liat status pertanyaan
-    /myscore -> liat score sementara
-    /leaderboard -> liat total score di grup
+    /myscore -> liat score sementara (/myscore minggu -> skor minggu ini)
+    /leaderboard -> liat total score di grup (/leaderboard 2 -> halaman berikutnya)
+    /leaderboard hari|minggu|bulan -> leaderboard hari ini / minggu ini / bulan ini
     /restartquiz -> restart quiz
     /listpemain -> buat liat list pemain yg udah join quiz
+    /settimer -> atur waktu menjawab per soal (admin)
+    /setscoring -> atur cara hitung poin (urutan / kecepatan, admin)
+    /reloadsoal -> reload soal dari sheet (admin)
 
     Ketik /joinquiz untuk bergabung ke sesi terlebih dahulu.""")
 
+# Satu-satunya tempat bikin sesi baru
+def get_or_create_session(chat_id, waiting_limit_selection=False):
+    session = sessions.get(chat_id)
+    if session is None:
+        session = sessions[chat_id] = QuizSession(chat_id, waiting_limit_selection)
+    else:
+        session.touch()
+    return session
+
+# Snapshot sesi + deadline soal (waktu dinding) dan setelan chat yang dipakai sesi ini
+def snapshot_session(session):
+    data = session.to_dict()
+    remaining = timers.remaining(session.chat_id) if session.question_active else None
+    data["deadline"] = None if remaining is None else time.time() + remaining
+    data["timeout"] = chat_timeouts.get(session.chat_id)
+    data["scoring"] = chat_scoring.get(session.chat_id)
+    return data
+
+# Sesi yang sedang jalan disimpan per transisi, supaya restart bisa lanjut
+session_store = SessionStore(sessions_dir, snapshot_session, save_delay=float(os.environ.get("SESSION_SAVE_DELAY", 1)))
+
 # List players who joined the quiz
 async def list_players(update: Update, context: ContextTypes.DEFAULT_TYPE):
     chat_id = update.effective_chat.id
     session = sessions.get(chat_id)
 
-    if not session or not session["participants"]:
-        await update.message.reply_text("❗ Belum ada pemain yang bergabung.")
+    if not session or not session.user_ids:
+        await reply_low(context, update.message, "❗ Belum ada pemain yang bergabung.")
         return
 
     player_list = "👥 Pemain yang sudah bergabung:\n"
-    for user_id in session["participants"]:
-        try:
-            user = await context.bot.get_chat(user_id)
-            player_list += f"- {user.first_name}\n"
-        except:
+    participants = list(session.user_ids)
+    names = await name_cache.get_many(context.bot, participants)
+    for user_id, name in zip(participants, names):
+        if name:
+            player_list += f"- {name}\n"
+        else:
             player_list += f"- User ID: {user_id}\n"
 
     await update.message.reply_text(player_list)
@@ -91,61 +377,46 @@ async def list_players(update: Update, context: ContextTypes.DEFAULT_TYPE):
 async def join_quiz(update: Update, context: ContextTypes.DEFAULT_TYPE):
     chat_id = update.effective_chat.id
     user = update.effective_user
-    session = sessions.setdefault(chat_id, {
-        "participants": set(),
-        "scores": {},
-        "started": False,
-        "index": 0,
-        "answers": {},
-        "limit": None,
-        "questions": [],
-        "waiting_limit_selection": False
-    })
-
-    if session["started"]:
-        await update.message.reply_text("❗ Quiz sudah dimulai. Kamu tidak bisa bergabung sekarang.")
-        return
+    session = get_or_create_session(chat_id)
 
-    session["participants"].add(user.id)
-    session["user_names"] = session.get("user_names", {})
-    session["user_names"][user.id] = user.first_name
+    if session.started:
+        await reply_low(context, update.message, "❗ Quiz sudah dimulai. Kamu tidak bisa bergabung sekarang.")
+        return
 
-    session["scores"][user.id] = 0
+    session.add_player(user.id, user.first_name)
+    session_store.schedule_save(session)
     await update.message.reply_text(f"✅ {user.first_name} telah bergabung ke sesi quiz.\n\nKetik /startquiznow untuk memulai sesi quiz.")
 
 # Choose max questions per session
 async def set_question_limit(update: Update, context: ContextTypes.DEFAULT_TYPE):
     keyboard = [
-        [InlineKeyboardButton("5 soal", callback_data="limit_5")],
-        [InlineKeyboardButton("10 soal", callback_data="limit_10")],
-        [InlineKeyboardButton("15 soal", callback_data="limit_15")],
-        [InlineKeyboardButton("20 soal", callback_data="limit_20")],
+        [InlineKeyboardButton("5 soal", callback_data=LIMIT + "5")],
+        [InlineKeyboardButton("10 soal", callback_data=LIMIT + "10")],
+        [InlineKeyboardButton("15 soal", callback_data=LIMIT + "15")],
+        [InlineKeyboardButton("20 soal", callback_data=LIMIT + "20")],
     ]
-    await update.message.reply_text("📊 Pilih jumlah soal per sesi:", reply_markup=InlineKeyboardMarkup(keyboard))
+    msg = await update.message.reply_text("📊 Pilih jumlah soal per sesi:", reply_markup=InlineKeyboardMarkup(keyboard))
+    session = sessions.get(update.effective_chat.id)
+    if session is not None:
+        # Disimpan supaya tombolnya bisa dihapus kalau sesi dibuang reaper
+        session.menu_message_id = msg.message_id
+        session_store.save(session)
 
 async def handle_limit_selection(update: Update, context: ContextTypes.DEFAULT_TYPE):
     query = update.callback_query
     chat_id = query.message.chat_id
-    session = sessions.setdefault(chat_id, {
-        "participants": set(),
-        "scores": {},
-        "started": False,
-        "index": 0,
-        "answers": {},
-        "limit": None,
-        "questions": [],
-        "waiting_limit_selection": True
-    })
+    session = get_or_create_session(chat_id, waiting_limit_selection=True)
 
     await query.answer()
 
-    if session.get("waiting_limit_selection") and query.data.startswith("limit_"):
-        session["limit"] = int(query.data.split("_")[1])
-        session["waiting_limit_selection"] = False
+    if session.waiting_limit_selection and query.data[1:].isdigit():
+        session.limit = int(query.data[1:])
+        session.waiting_limit_selection = False
+        session_store.save(session)
 
-        keyboard = [[InlineKeyboardButton("🚀 Mulai Quiz Sekarang", callback_data="start_quiz")]]
+        keyboard = [[InlineKeyboardButton("🚀 Mulai Quiz Sekarang", callback_data=START)]]
         await query.edit_message_text(
-            f"✅ Jumlah soal per sesi ditetapkan ke {session['limit']}.",
+            f"✅ Jumlah soal per sesi ditetapkan ke {session.limit}.",
             reply_markup=InlineKeyboardMarkup(keyboard)
         )
 
@@ -155,241 +426,279 @@ async def start_quiz_button(update: Update, context: ContextTypes.DEFAULT_TYPE):
     chat_id = query.message.chat_id
     session = sessions.get(chat_id)
 
-    if not session or session.get("started"):
+    if not session or session.started:
         await query.answer("Quiz sudah dimulai.", show_alert=True)
         return
 
-    session["started"] = True
-    session["index"] = 0
-    session["answers"] = {}
-    session["questions"] = random.sample(all_questions_master, session["limit"])
+    session.started = True
+    session.index = 0
+    session.bank = question_bank
+    # Ambil dari deck chat ini -> tidak ada soal berulang sampai bank habis
+    rng = session_rng(chat_id)
+    question_ids = decks.draw(chat_id, session.bank, session.limit, rng)
+    session.questions = [session.bank.questions[i] for i in question_ids]
+    session.limit = len(session.questions)
+    # Keyboard tiap soal dirender sekarang (token berisi epoch sesi), kirim soal cukup lookup
+    session.epoch = next_epoch()
+    session.layouts = [rng.randrange(len(q.layouts)) for q in session.questions]
+    build_keyboards(session)
+    await asyncio.to_thread(decks.save)
 
     await query.answer()
     await query.edit_message_text("🚀 Quiz dimulai sekarang!")
     await send_question_to_group(context, chat_id)
 
+def build_keyboards(session):
+    session.keyboards = [
+        render_keyboard(q, q.layouts[layout], session.epoch, i)
+        for i, (q, layout) in enumerate(zip(session.questions, session.layouts))
+    ]
+
 # Start Quiz Now
 async def start_quiz_now(update: Update, context: ContextTypes.DEFAULT_TYPE):
     chat_id = update.effective_chat.id
-    session = sessions.setdefault(chat_id, {
-        "participants": set(),
-        "scores": {},
-        "started": False,
-        "index": 0,
-        "answers": {},
-        "limit": None,
-        "questions": [],
-        "waiting_limit_selection": False
-    })
-
-    if session["started"]:
-        await update.message.reply_text("❗ Quiz sudah berjalan.")
+    session = get_or_create_session(chat_id)
+
+    if session.started:
+        await reply_low(context, update.message, "❗ Quiz sudah berjalan.")
         return
 
-    if not session["participants"]:
-        await update.message.reply_text("❗ Tidak ada peserta yang bergabung.")
+    if not session.user_ids:
+        await reply_low(context, update.message, "❗ Tidak ada peserta yang bergabung.")
         return
 
-    session["waiting_limit_selection"] = True
-    await set_question_limit(update, context)
+    session.waiting_limit_selection = True
+    await set_question_limit(update, context)  # snapshot disimpan di sini
 
 #fungsi timer
-async def timeout_question(context, chat_id, seconds):
-    await asyncio.sleep(seconds)
+async def timeout_question(context, chat_id, key):
     session = sessions.get(chat_id)
 
-    print(f"[DEBUG] [timeout_question] Timer selesai untuk chat_id {chat_id}")
+    log.debug("timeout_question chat_id=%s: timer selesai", chat_id)
 
     if not session:
-        print("[DEBUG] [timeout_question] Tidak ada session.")
+        log.debug("timeout_question chat_id=%s: tidak ada sesi", chat_id)
         return
 
-    if not session.get("question_active", False):
-        print("[DEBUG] [timeout_question] Soal sudah tidak aktif (mungkin sudah dijawab?), tapi tetap lanjut ke next question.")
-        # return
+    # Timer untuk soal yang sudah ditutup (misal semua sudah jawab) -> jangan lanjut 2x
+    if live_questions.get(chat_id) != key:
+        log.debug("timeout_question chat_id=%s: soal sudah tidak aktif, skip", chat_id)
+        return
 
-    print(f"[DEBUG] [timeout_question] Menandai soal sebagai selesai.")
-    session["question_active"] = False
+    log.debug("timeout_question chat_id=%s: soal ditutup", chat_id)
+    close_question(chat_id, session)
     await show_correct_and_continue(context, chat_id, timeout=True)
 
 
 
+QUESTION_HEADERS = [f"❓ Soal {i}:\n" for i in range(1, 101)]
+
+# Soal tidak bisa dijawab lagi, klik berikutnya ditolak tanpa lookup session
+def close_question(chat_id, session):
+    session.question_active = False
+    live_questions.pop(chat_id, None)
+
 #fungsi send question ke grup
 async def send_question_to_group(context, chat_id):
     session = sessions[chat_id]
-    print(f"[DEBUG] Soal ke-{session['index'] + 1} sudah dikirim setelah timeout.")
-    session = sessions[chat_id]
-    question = session["questions"][session["index"]]
+    question = session.questions[session.index]
 
-    options = question["options"]
-    random.shuffle(options)
-    keyboard = [[InlineKeyboardButton(opt, callback_data=opt)] for opt in options]
-
-    session["question_active"] = True
-    session["answer_order"] = []
+    session.question_active = True
 
     # ⏱️ Kirim soal dan simpan message_id
     msg = await context.bot.send_message(
         chat_id=chat_id,
-        text=f"❓ Soal {session['index'] + 1}:\n{question['question']}",
-        reply_markup=InlineKeyboardMarkup(keyboard)
+        text=QUESTION_HEADERS[session.index] + question.text,
+        reply_markup=session.keyboards[session.index],
+        rate_limit_args=HIGH
     )
-    session["current_message_id"] = msg.message_id
+    session.current_message_id = msg.message_id
+    # Waktu mulai dihitung setelah soal terkirim (pemain baru bisa lihat soalnya)
+    session.start_question()
+    live_questions[chat_id] = question_key(session.epoch, session.index)
 
-    print(f"[DEBUG] Soal ke-{session['index'] + 1} dikirim ke chat_id {chat_id}")
+    log.debug("send_question chat_id=%s soal=%d message_id=%s", chat_id, session.index + 1, msg.message_id)
 
-    # ⏱️ Mulai timer 15 detik untuk soal ini
-    session["timeout_task"] = asyncio.create_task(timeout_question(context, chat_id, 15))
+    # ⏱️ Mulai timer untuk soal ini (default 15 detik, bisa diatur per chat)
+    # Timeout ikut antre di actor chat ini, jadi tidak balapan dengan handle_answer
+    timers.schedule(chat_id, chat_timeouts.get(chat_id, QUESTION_TIMEOUT),
+                    actors.run, chat_id, timeout_question, context, chat_id, live_questions[chat_id])
+    session_store.save(session)
 
 # Handle Answer
 async def handle_answer(update: Update, context: ContextTypes.DEFAULT_TYPE):
     query = update.callback_query
     chat_id = query.message.chat_id
-    session = sessions[chat_id]
-    user_id = query.from_user.id
-    await query.answer()
+    key, option = decode_answer(query.data)
 
-    if not session["started"]:
-        await query.message.reply_text("❗ Quiz belum dimulai. Gunakan /startquiznow")
+    # Token dari soal lama / sesi lama -> tolak sebelum lookup session
+    if key is None or live_questions.get(chat_id) != key:
+        await reject_answer(context, query, "❗ Waktu menjawab sudah habis atau soal sudah berganti.")
         return
 
-    if not session.get("question_active", False) or query.message.message_id != session.get("current_message_id"):
-        await query.message.reply_text("❗ Waktu menjawab sudah habis atau soal sudah berganti.")
-        return
+    session = sessions[chat_id]
+    user_id = query.from_user.id
 
-    if user_id not in session["participants"]:
-        await query.message.reply_text("❗ Kamu tidak terdaftar sebagai peserta quiz ini.")
+    if not session.has_player(user_id):
+        await reject_answer(context, query, "❗ Kamu tidak terdaftar sebagai peserta quiz ini.")
         return
 
-    if user_id in session["answers"]:
-        await query.message.reply_text("❗ Kamu sudah menjawab soal ini.")
+    if session.has_answered(user_id):
+        await reject_answer(context, query, "❗ Kamu sudah menjawab soal ini.")
         return
 
-    session["answers"][user_id] = query.data
-
-    if "answer_order" not in session:
-        session["answer_order"] = []
-    session["answer_order"].append(user_id)
+    session.record_answer(user_id, option, getattr(context, "received_at", None))
+    ack_later(context, query, "✅ Jawaban tersimpan" if LOW_CHATTER else None)
+    session_store.schedule_save(session)
+    schedule_status_refresh(context, chat_id, session)
 
     # Jika semua sudah jawab → langsung lanjut
-    if len(session["answers"]) == len(session["participants"]):
-        session["question_active"] = False  # 🔐 kunci soal
+    if session.all_answered():
+        close_question(chat_id, session)  # 🔐 kunci soal
 
         # 🔥 Batalin timeout
-        timeout_task = session.get("timeout_task")
-        if timeout_task and not timeout_task.done():
-            timeout_task.cancel()
+        timers.cancel(chat_id)
 
         await show_correct_and_continue(context, chat_id)
 
 
+# Ack klik jawaban sebagai task sendiri: mailbox chat tidak menunggu round trip Bot API,
+# klik berikutnya di room yang sama langsung diproses
+def ack_later(context, query, text=None, show_alert=False):
+    context.application.create_task(query.answer(text, show_alert=show_alert))
+
+
+# Klik jawaban yang ditolak: toast di mode hemat, balasan di grup kalau tidak (juga di luar mailbox)
+async def reject_answer(context, query, text):
+    if LOW_CHATTER:
+        ack_later(context, query, text, show_alert=True)
+        return
+    ack_later(context, query)
+    context.application.create_task(reply_low(context, query.message, text))
+
+
+# Tombol dengan format lama / tidak dikenal
+async def handle_stale_button(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    await update.callback_query.answer("❗ Tombol ini sudah tidak berlaku.", show_alert=True)
+
+
 # /questionstatus command
 async def show_question_status(update: Update, context: ContextTypes.DEFAULT_TYPE):
     chat_id = update.effective_chat.id
     session = sessions.get(chat_id)
     
     if not session:
-        await update.message.reply_text("❗ Sesi quiz belum dimulai.")
+        await reply_low(context, update.message, "❗ Sesi quiz belum dimulai.")
         return
 
-    if not session["started"]:
-        await update.message.reply_text("❗ Quiz belum dimulai.")
+    if not session.started:
+        await reply_low(context, update.message, "❗ Quiz belum dimulai.")
         return
 
-    answered_users = [user_id for user_id in session["participants"] if user_id in session["answers"]]
-    not_answered_users = [user_id for user_id in session["participants"] if user_id not in session["answers"]]
+    text = await build_status_text(context, session)
+
+    # Satu pesan status; di mode hemat pesan ini di-edit tiap ada jawaban baru
+    msg = await update.message.reply_text(text)
+    if LOW_CHATTER:
+        session.status_message_id = msg.message_id
+        session_store.schedule_save(session)
+        session.status_text = text
+
+
+# Teks /questionstatus (sudah & belum menjawab) untuk soal yang sedang jalan
+async def build_status_text(context, session):
+    answered_users = session.answered_users()
+    not_answered_users = session.unanswered_users()
 
     # Prepare the message
-    answered_msg = "✅ Pengguna yang sudah menjawab:\n"
+    answered_msg = f"📋 Status soal {session.index + 1}:\n\n✅ Pengguna yang sudah menjawab:\n"
     not_answered_msg = "❌ Pengguna yang belum menjawab:\n"
 
+    names = await name_cache.get_many(context.bot, answered_users + not_answered_users)
+    answered_names = names[:len(answered_users)]
+    not_answered_names = names[len(answered_users):]
+
     # Add answered users
-    for uid in answered_users:
-        try:
-            user = await context.bot.get_chat(uid)
-            answered_msg += f"- {user.first_name}\n"
-        except:
+    for uid, name in zip(answered_users, answered_names):
+        if name:
+            answered_msg += f"- {name}\n"
+        else:
             answered_msg += f"- User ID: {uid}\n"
 
     # Add not answered users
-    for uid in not_answered_users:
-        try:
-            user = await context.bot.get_chat(uid)
-            not_answered_msg += f"- {user.first_name}\n"
-        except:
+    for uid, name in zip(not_answered_users, not_answered_names):
+        if name:
+            not_answered_msg += f"- {name}\n"
+        else:
             not_answered_msg += f"- User ID: {uid}\n"
 
-    # Send the status messages
-    await update.message.reply_text(answered_msg)
-    await update.message.reply_text(not_answered_msg)
+    return answered_msg + "\n" + not_answered_msg
+
+
+# Edit pesan status digabung: banyak jawaban dalam STATUS_EDIT_DELAY detik -> 1x edit
+def schedule_status_refresh(context, chat_id, session):
+    if not session.status_message_id or ("status", chat_id) in timers:
+        return
+    timers.schedule(("status", chat_id), STATUS_EDIT_DELAY, actors.run, chat_id, refresh_status_message, context, chat_id)
+
+
+async def refresh_status_message(context, chat_id):
+    session = sessions.get(chat_id)
+    if not session or not session.status_message_id:
+        return
+    text = await build_status_text(context, session)
+    if text == session.status_text:
+        return
+    session.status_text = text
+    try:
+        await context.bot.edit_message_text(text, chat_id=chat_id, message_id=session.status_message_id, rate_limit_args=LOW)
+    except (BadRequest, DroppedRequest) as e:
+        logging.info(f"Gagal edit status: {e}")
 
 
 # Show correct and go to next
 async def show_correct_and_continue(context, chat_id, timeout=False):
-    print(f"[DEBUG] Masuk show_correct_and_continue | timeout={timeout}")
+    log.debug("show_correct chat_id=%s timeout=%s", chat_id, timeout)
 
     session = sessions[chat_id]
-    question = session["questions"][session["index"]]
-    correct = question["answer"]
+    question = session.questions[session.index]
+    correct = question.answer_index
     result_text = "⏰ Waktu habis!\n\n📢 Hasil Jawaban:\n" if timeout else "📢 Hasil Jawaban:\n"
 
     
 
     # Batalkan timeout kalau masih jalan
-    timeout_task = session.get("timeout_task")
-    logging.info(f"timeout_task: {timeout_task}")
-    if timeout_task and not timeout_task.done():
-        timeout_task.cancel()
-
-    # List pengguna yang jawab benar dalam urutan kecepatan
-    correct_users_ordered = []
-
-    for uid in session["answer_order"]:
-        selected = session["answers"].get(uid)
-        if selected == correct:
-            correct_users_ordered.append(uid)
-
-    for uid in session["answers"]:
-        selected = session["answers"].get(uid)
-        try:
-            user = await context.bot.get_chat(uid)
-            name = user.first_name
-        except:
+    timers.cancel(chat_id)
+
+    # Hitung poin sekali jalan, urut sesuai waktu jawaban diterima server
+    rule = RULES[chat_scoring.get(chat_id, SCORING_RULE)]
+    results = score_answers(session.answer_log, correct, rule, chat_timeouts.get(chat_id, QUESTION_TIMEOUT))
+    answered_names = await name_cache.get_many(context.bot, [uid for uid, _, _ in results])
+    lines = []
+    for (uid, is_correct, points), name in zip(results, answered_names):
+        if not name:
             name = f"User {uid}"
 
-        if selected == correct:
-            if uid in correct_users_ordered:
-                rank = correct_users_ordered.index(uid)
-                if rank == 0:
-                    points = 5
-                elif rank == 1:
-                    points = 3
-                else:
-                    points = 1
-                session["scores"][uid] += points
-                result_text += f"✅ {name} menjawab benar! (+{points})\n"
-            else:
-                result_text += f"✅ {name} menjawab benar!\n"
+        if is_correct:
+            session.add_points(uid, points)
+            lines.append(f"✅ {name} menjawab benar! (+{points})\n")
         else:
-            result_text += f"❌ {name} salah.\n"
+            lines.append(f"❌ {name} salah.\n")
+    result_text += "".join(lines)
 
-    result_text += f"\nJawaban yang benar adalah: {correct}"
+    result_text += f"\nJawaban yang benar adalah: {question.answer}"
 
-    print(f"[DEBUG] result_text: {result_text}")
     # Cek siapa yang belum jawab (tidak termasuk ke bagian salah)
-    unanswered = [uid for uid in session["participants"] if uid not in session["answers"]]
-    print(f"[DEBUG] unanswered: {unanswered}")
+    unanswered = session.unanswered_users()
+    log.debug("show_correct chat_id=%s jawab=%d belum=%d", chat_id, len(results), len(unanswered))
     if unanswered:
         names = []
         for uid in unanswered:
-            name = session.get("user_names", {}).get(uid)
-            print(f"[DEBUG] unanswered: {name}")
+            name = session.name_of(uid)
+            if not name:
+                name = await name_cache.get(context.bot, uid)
             if not name:
-                try:
-                    user = await context.bot.get_chat(uid)
-                    name = user.first_name
-                except:
-                    name = f"User tidak dikenal (ID: {uid})"
+                name = f"User tidak dikenal (ID: {uid})"
             names.append(name)
         result_text += "\n\n🚫 Belum menjawab:\n" + "\n".join(names)
 
@@ -397,43 +706,51 @@ async def show_correct_and_continue(context, chat_id, timeout=False):
     result_text += "\n\nℹ️ Ketik /myscore untuk melihat skor sementara kamu."
     result_text += "\nℹ️ Ketik /questionstatus untuk melihat siapa aja yg sudah/belum jawab soal."
     result_text += "\n\n➡️ Kita lanjut ke soal berikutnya ya..."
-    
-    print(f"[DEBUG] result_text tambahan: {result_text}")
 
-    await context.bot.send_message(chat_id=chat_id, text=result_text)
+    # Mode hemat: hasil ditempel ke pesan soal (keyboard ikut hilang), bukan pesan baru
+    sent = False
+    if LOW_CHATTER and session.current_message_id:
+        try:
+            await context.bot.edit_message_text(
+                QUESTION_HEADERS[session.index] + question.text + "\n\n" + result_text,
+                chat_id=chat_id,
+                message_id=session.current_message_id,
+                rate_limit_args=HIGH
+            )
+            sent = True
+        except BadRequest as e:
+            logging.info(f"Gagal edit hasil ke pesan soal, kirim pesan baru: {e}")
+    if not sent:
+        await context.bot.send_message(chat_id=chat_id, text=result_text, rate_limit_args=HIGH)
 
     # 🔐 Reset flag sebelum lanjut
-    session["question_active"] = False
-    print(f"[DEBUG] Menambah index dari {session['index']}")
-    session["index"] += 1
-    session["answers"] = {}
-    session["answer_order"] = []
-    
-    print(f"[DEBUG] Siap lanjut ke soal berikutnya. Index: {session['index']}, Limit: {session['limit']}")
-
-    if session["index"] < session["limit"]:
+    close_question(chat_id, session)
+    session.index += 1
+    session.start_question()
+    # Poin soal ini sudah masuk; kalau mati sebelum soal berikutnya terkirim, restore lanjut dari sini
+    session_store.save(session)
+    schedule_status_refresh(context, chat_id, session)
+    log.debug("show_correct chat_id=%s lanjut index=%d limit=%d", chat_id, session.index, session.limit)
+    await continue_quiz(context, chat_id)
+
+
+# Kirim soal berikutnya, atau skor akhir kalau sudah habis
+async def continue_quiz(context, chat_id):
+    session = sessions.get(chat_id)
+    if session is None:
+        return
+    if session.index < session.limit:
         await send_question_to_group(context, chat_id)
-        print(f"[DEBUG] Soal ke-{session['index'] + 1} dikirim setelah timeout.")
     else:
-        print("[DEBUG] Sesi quiz selesai. Tidak lanjut soal.")
+        log.debug("continue_quiz chat_id=%s: sesi selesai", chat_id)
         await show_final_scores(context, chat_id)
 
 
 # Update global scores
-def update_global_scores(chat_id, local_scores):
-    chat_id = str(chat_id)
-
-    if chat_id not in global_scores:
-        global_scores[chat_id] = {}
-
-    for user_id, score in local_scores.items():
-        user_id = str(user_id)
-        if user_id in global_scores[chat_id]:
-            global_scores[chat_id][user_id] += score
-        else:
-            global_scores[chat_id][user_id] = score
-
-    save_scores()
+async def update_global_scores(chat_id, local_scores):
+    # Cuma delta sesi ini yang ditulis (1 baris journal / 1 transaksi), bukan seluruh skor
+    await score_store.add(chat_id, local_scores)
+    leaderboard_cache.pop(chat_id, None)
 
 
 # Show final leaderboard
@@ -441,71 +758,153 @@ def update_global_scores(chat_id, local_scores):
 async def show_final_scores(context, chat_id):
     session = sessions[chat_id]
     msg = "🏁 Sesi selesai! Skor akhir:\n"
-    sorted_scores = sorted(session["scores"].items(), key=lambda x: x[1], reverse=True)
+    sorted_scores = sorted(session.score_items(), key=lambda x: x[1], reverse=True)
 
     for i, (uid, score) in enumerate(sorted_scores, 1):
-        try:
-            user = await context.bot.get_chat(uid)
-            msg += f"{i}. {user.first_name} - {score} poin\n"
-        except:
+        name = user_dir.name(uid)
+        if name:
+            msg += f"{i}. {name} - {score} poin\n"
+        else:
             msg += f"{i}. (user ID: {uid}) - {score} poin\n"
 
     # Add the message for starting a new session
     msg += "\nKetik /quizwadidaw untuk memulai sesi game baru lagi!"
 
-    await context.bot.send_message(chat_id=chat_id, text=msg)
+    await context.bot.send_message(chat_id=chat_id, text=msg, rate_limit_args=HIGH)
+    refresh_stale_users(context, [uid for uid, _ in sorted_scores])
 
 
     # ✅ Update global score SEKARANG
-    update_global_scores(chat_id, session["scores"])
+    await update_global_scores(chat_id, dict(session.score_items()))
 
 
     # Kosongkan session setelah selesai
     # session.clear()
+    live_questions.pop(chat_id, None)
+    timers.cancel(chat_id)
+    timers.cancel(("status", chat_id))
     del sessions[chat_id]
+    session_store.delete(chat_id)
 
 
 # /myscore
 # /myscore
 async def my_score(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    chat_id = str(update.effective_chat.id)
-    user_id = str(update.effective_user.id)
+    chat_id = update.effective_chat.id
+    user_id = update.effective_user.id
+    window, _ = parse_leaderboard_args(context.args)
 
     # Cek jika ada sesi aktif di grup
-    session = sessions.get(int(chat_id))
-    if session and session.get("started") and user_id in session["scores"]:
+    session = sessions.get(chat_id)
+    if window is None and session and session.started and session.has_player(user_id):
         # Ambil skor sementara dari sesi aktif
-        score = session["scores"].get(user_id, 0)
+        score = session.score_of(user_id)
         await update.message.reply_text(f"📊 Skor kamu saat ini di sesi ini: {score} poin")
         return
 
-    # Kalau tidak ada sesi aktif, cek skor global
-    score = global_scores.get(chat_id, {}).get(user_id)
-    if score is None:
-        await update.message.reply_text("❗ Kamu belum memiliki skor di grup ini.")
+    # Kalau tidak ada sesi aktif, cek skor global + peringkat
+    found = await score_store.lookup(chat_id, user_id, window=window)
+    where = "di grup ini" if window is None else LABELS[window]
+    if found is None:
+        await reply_low(context, update.message, f"❗ Kamu belum memiliki skor {where}.")
     else:
-        await update.message.reply_text(f"📊 Skor kamu di grup ini: {score} poin")
-
-
-# /leaderboard command to show global leaderboard
+        score, rank = found
+        total = await score_store.count(chat_id, window=window)
+        msg = f"📊 Skor kamu {where}: {score} poin (peringkat {rank} dari {total})\n"
+        # Pemain tepat di atas & bawah kamu di leaderboard
+        for position, uid, points in await score_store.around(chat_id, user_id, window=window):
+            marker = "👉 " if uid == user_id else ""
+            name = user_dir.name(uid) or f"(user ID: {uid})"
+            msg += f"\n{marker}{position + 1}. {name} - {points} poin"
+        await update.message.reply_text(msg)
+
+
+# Argumen /leaderboard & /myscore: [hari|minggu|bulan|semua] [halaman], urutan bebas
+def parse_leaderboard_args(args):
+    window, page = None, 1
+    for arg in args or ():
+        arg = arg.lower()
+        if arg in ALIASES:
+            window = ALIASES[arg]
+        elif arg.isascii() and arg.isdigit() and int(arg) > 0:  # isdigit() saja lolos "²", int() gagal
+            page = int(arg)
+    return window, page
+
+# /leaderboard [periode] [halaman] command to show global leaderboard, LEADERBOARD_PAGE_SIZE per halaman
 async def leaderboard(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    chat_id = str(update.effective_chat.id)
-    chat_scores = global_scores.get(chat_id)
+    chat_id = update.effective_chat.id
+    window, page = parse_leaderboard_args(context.args)
+    # Periode ikut jadi key: begitu ganti hari/minggu/bulan, cache lama tidak terpakai lagi
+    cache_key = (window, period_key(window, time.time()) if window else None, page)
+    cached = leaderboard_cache.get(chat_id, {}).get(cache_key)
+    if cached is not None:
+        await update.message.reply_text(cached)
+        return
 
-    if not chat_scores:
-        await update.message.reply_text("❗ Belum ada skor untuk grup ini.")
+    offset = (page - 1) * LEADERBOARD_PAGE_SIZE
+    top_scores = await score_store.top(chat_id, LEADERBOARD_PAGE_SIZE, offset, window=window)
+
+    if not top_scores:
+        if page > 1:
+            await reply_low(context, update.message, f"❗ Leaderboard tidak punya halaman {page}.")
+        elif window is not None:
+            await reply_low(context, update.message, f"❗ Belum ada skor {LABELS[window]}.")
+        else:
+            await reply_low(context, update.message, "❗ Belum ada skor untuk grup ini.")
         return
 
-    sorted_scores = sorted(chat_scores.items(), key=lambda x: x[1], reverse=True)
-    leaderboard_msg = "🏆 Leaderboard Grup Ini:\n"
-    for i, (user_id, score) in enumerate(sorted_scores, 1):
-        try:
-            user = await context.bot.get_chat(user_id)
-            leaderboard_msg += f"{i}. {user.first_name} - {score} poin\n"
-        except:
+    total = await score_store.count(chat_id, window=window)
+    pages = (total + LEADERBOARD_PAGE_SIZE - 1) // LEADERBOARD_PAGE_SIZE
+    title = f"🏆 Leaderboard {LABELS[window].title()}"
+    leaderboard_msg = f"{title}:\n" if pages == 1 else f"{title} (halaman {page}/{pages}):\n"
+    unresolved = []
+    for i, (user_id, score) in enumerate(top_scores, offset + 1):
+        name = user_dir.name(user_id)
+        if name:
+            leaderboard_msg += f"{i}. {name} - {score} poin\n"
+        else:
+            unresolved.append(user_id)
             leaderboard_msg += f"{i}. (user ID: {user_id}) - {score} poin\n"
+    if page < pages:
+        next_args = f"{window} {page + 1}" if window else f"{page + 1}"
+        leaderboard_msg += f"\nKetik /leaderboard {next_args} untuk halaman berikutnya."
 
     await update.message.reply_text(leaderboard_msg)
+    if not user_dir.stale(unresolved, USER_REFRESH_AGE):
+        # Nama yang belum dikenal masih di-refresh, teks seperti itu jangan di-cache.
+        # Yang sudah dicoba get_chat tapi tetap tanpa nama boleh di-cache.
+        leaderboard_cache.setdefault(chat_id, {})[cache_key] = leaderboard_msg
+    refresh_stale_users(context, [user_id for user_id, _ in top_scores])
+
+# /settimer <detik> -> atur waktu menjawab per soal di grup ini (admin, tanpa argumen = lihat saja)
+async def set_timer(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    chat_id = update.effective_chat.id
+    arg = context.args[0] if context.args else ""
+    if not (arg.isascii() and arg.isdigit() and 5 <= int(arg) <= 120):
+        current = chat_timeouts.get(chat_id, QUESTION_TIMEOUT)
+        await update.message.reply_text(f"⏱️ Waktu per soal sekarang {current} detik.\nGunakan /settimer <5-120> untuk mengubah.")
+        return
+
+    if not await is_chat_admin(update, context):
+        await reply_low(context, update.message, "❗ Hanya admin yang bisa mengubah waktu per soal.")
+        return
+    await chat_settings.set("timeout", chat_id, int(arg))
+    await update.message.reply_text(f"✅ Waktu per soal diatur ke {chat_timeouts[chat_id]} detik (berlaku mulai soal berikutnya).")
+
+# /setscoring rank|speed -> pilih aturan poin di grup ini (admin, tanpa argumen = lihat saja)
+async def set_scoring(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    chat_id = update.effective_chat.id
+    if not context.args or context.args[0] not in RULES:
+        current = chat_scoring.get(chat_id, SCORING_RULE)
+        options = "\n".join(f"- {name}: {rule.describe()}" for name, rule in RULES.items())
+        await update.message.reply_text(f"🎯 Aturan poin sekarang: {current}\n\nPilihan:\n{options}\n\nGunakan /setscoring <nama>.")
+        return
+
+    if not await is_chat_admin(update, context):
+        await reply_low(context, update.message, "❗ Hanya admin yang bisa mengubah aturan poin.")
+        return
+    await chat_settings.set("scoring", chat_id, context.args[0])
+    await update.message.reply_text(f"✅ Aturan poin diatur ke {context.args[0]}: {RULES[context.args[0]].describe()}")
 
 # Restart game (reset session)
 async def restart_quiz(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -513,44 +912,211 @@ async def restart_quiz(update: Update, context: ContextTypes.DEFAULT_TYPE):
     session = sessions.get(chat_id)
     
     if not session:
-        await update.message.reply_text("❗ Sesi quiz belum dimulai.")
+        await reply_low(context, update.message, "❗ Sesi quiz belum dimulai.")
         return
 
     # Clear the session and scores
-    session.clear()
+    live_questions.pop(chat_id, None)
+    timers.cancel(chat_id)
+    timers.cancel(("status", chat_id))
     del sessions[chat_id]
+    session_store.delete(chat_id)
 
     await update.message.reply_text("🔄 Sesi quiz telah di-reset. Kamu bisa mulai quiz lagi dengan /quizwadidaw!")
 
-# Webhook handler
-# async def webhook_handler(request):
-#     data = await request.json()
-#     update = Update.de_json(data, app.bot)
-#     await app.update_queue.put(update)
-#     return web.Response()
+# Sesi idle dibuang reaper: matikan timer, hapus tombol yang masih bisa diklik, kabari grup
+REAP_MESSAGES = {
+    "lobby": "⌛ Sesi quiz ditutup karena tidak dimulai. Ketik /joinquiz untuk bikin sesi baru.",
+    "waiting": "⌛ Pilihan jumlah soal kedaluwarsa, sesi quiz ditutup. Ketik /joinquiz untuk mulai lagi.",
+    "running": "⌛ Quiz dihentikan karena tidak ada aktivitas. Ketik /joinquiz untuk mulai lagi.",
+}
+
+async def reap_session(bot, chat_id, session, state):
+    session_store.delete(chat_id)
+    live_questions.pop(chat_id, None)
+    timers.cancel(chat_id)
+    timers.cancel(("status", chat_id))
+    message_id = session.current_message_id if state == "running" else session.menu_message_id
+    if message_id:
+        try:
+            await bot.edit_message_reply_markup(chat_id=chat_id, message_id=message_id, reply_markup=None, rate_limit_args=LOW)
+        except TelegramError as e:
+            logging.debug(f"Tombol sesi chat {chat_id} tidak bisa dihapus: {e}")
+    try:
+        await bot.send_message(chat_id, REAP_MESSAGES[state], rate_limit_args=LOW)
+    except TelegramError as e:
+        logging.debug(f"Notifikasi sesi dibuang ke chat {chat_id} gagal: {e}")
 
 # Main
-# TOKEN = os.environ.get("BOT_TOKEN")
-# WEBHOOK_URL = os.environ.get("WEBHOOK_URL")
+TOKEN = os.environ.get("BOT_TOKEN", "8054761920:AAGVaOnzt6MbvOamAca3HhxGDqZy6Ml2FA0")
+BOT_API_URL = os.environ.get("BOT_API_URL")  # misal fake server lokal: http://127.0.0.1:8081/bot
+WEBHOOK_URL = os.environ.get("WEBHOOK_URL")
+WEBHOOK_PATH = os.environ.get("WEBHOOK_PATH", "/webhook")
+WEBHOOK_SECRET = os.environ.get("WEBHOOK_SECRET")
+WEBHOOK_QUEUE_SIZE = int(os.environ.get("WEBHOOK_QUEUE_SIZE", 1000))
+PORT = int(os.environ.get("PORT", 8080))
+BOT_MODE = os.environ.get("BOT_MODE", "webhook" if WEBHOOK_URL else "polling")
+
+# Tanpa secret, siapa pun yang tahu URL webhook bisa kirim update palsu (klik jawaban, admin).
+# Kalau webhook didaftarkan bot sendiri (WEBHOOK_URL), secret acak dibuat per start dan ikut
+# dikirim ke set_webhook. Kalau didaftarkan dari luar, WEBHOOK_SECRET wajib diisi.
+def webhook_secret():
+    if WEBHOOK_SECRET:
+        return WEBHOOK_SECRET
+    if WEBHOOK_URL:
+        logging.info("WEBHOOK_SECRET kosong, pakai secret acak untuk set_webhook")
+        return secrets.token_urlsafe(32)
+    raise SystemExit("Mode webhook tanpa WEBHOOK_URL butuh WEBHOOK_SECRET (secret yang didaftarkan ke set_webhook)")
+SHARD_SOCKET = os.environ.get("SHARD_SOCKET")  # diisi ingress untuk tiap worker
+
+# Mulai refresh soal setelah bot siap, bot langsung jalan pakai snapshot
+background_tasks = set()
+
+# Lanjutkan sesi dari snapshot: deadline soal dijadwalkan ulang sesuai sisa waktunya
+def restore_sessions(application):
+    started = time.perf_counter()
+    context = CallbackContext(application)
+    now = time.time()
+    restored = dropped = 0
+    for data in session_store.load_all():
+        chat_id = data["chat_id"]
+        if shard_ring is not None and shard_ring.owner(chat_id) != SHARD_INDEX:
+            continue  # dipulihkan worker shard lain
+        session = QuizSession.from_dict(data, question_bank)
+        if session is None or reaper.expired(session):
+            # Soalnya sudah hilang dari bank, atau sesi sudah keburu basi
+            session_store.delete(chat_id)
+            dropped += 1
+            continue
+        sessions[chat_id] = session
+        if data.get("timeout"):
+            chat_timeouts.setdefault(chat_id, data["timeout"])  # setelan tersimpan lebih baru dari snapshot sesi
+        if data.get("scoring"):
+            chat_scoring.setdefault(chat_id, data["scoring"])
+        if session.started:
+            build_keyboards(session)
+            if session.question_active:
+                key = live_questions[chat_id] = question_key(session.epoch, session.index)
+                remaining = max(0.0, (data["deadline"] or now) - now)
+                timers.schedule(chat_id, remaining, actors.run, chat_id, timeout_question, context, chat_id, key)
+            else:
+                # Mati di antara dua soal: kirim soal berikutnya sekarang
+                timers.schedule(chat_id, 0, actors.run, chat_id, continue_quiz, context, chat_id)
+        restored += 1
+    if restored or dropped:
+        logging.info(f"Sesi dipulihkan: {restored}, dibuang: {dropped}, "
+                     f"{(time.perf_counter() - started) * 1000:.1f} ms (bank {question_bank.digest})")
+
+async def on_startup(application):
+    timers.start()
+    loop_lag.start()
+    if METRICS_PORT and BOT_MODE != "webhook":
+        try:
+            await registry.serve(METRICS_HOST, METRICS_PORT + SHARD_INDEX)
+        except OSError as e:
+            logging.warning(f"Server metrics tidak bisa jalan: {e}")
+    restore_sessions(application)
+    # Reaper lewat actor chat-nya supaya tidak balapan dengan handler yang sedang jalan
+    reaper.start(functools.partial(reap_session, application.bot), run=actors.run)
+    # post_init jalan sebelum application.start(), jadi pakai task asyncio biasa
+    jobs = [periodic_reload()]
+    if SHARDS:
+        jobs.append(watch_snapshot())
+    for job in jobs:
+        task = asyncio.create_task(job)
+        background_tasks.add(task)
+        task.add_done_callback(background_tasks.discard)
+
+# Simpan data yang masih pending sebelum bot mati
+async def on_shutdown(application):
+    await reaper.stop()
+    await loop_lag.stop()
+    await registry.stop()
+    logging.info(f"sessions: {reaper.stats()}")
+    await timers.stop()
+    await actors.stop()
+    logging.info(f"timers: {timers.stats()}")
+    logging.info(f"name_cache: {name_cache.stats()}")
+    user_dir.flush()
+    session_store.flush()
+    await score_store.close()
+    if update_recorder is not None:
+        update_recorder.close()
+        logging.info(f"Update terekam: {update_recorder.recorded} ke {update_recorder.path}")
+
+def build_app(token=TOKEN, base_url=BOT_API_URL):
+    builder = (
+        ApplicationBuilder()
+        .token(token)
+        .concurrent_updates(CONCURRENT_UPDATES)
+        .rate_limiter(outbound)
+        .post_init(on_startup)
+        .post_shutdown(on_shutdown)
+    )
+    if base_url:
+        builder = builder.base_url(base_url)
+    app = builder.build()
+
+    if UPDATE_LOG:
+        global update_recorder
+        update_recorder = UpdateRecorder(UPDATE_LOG, meta={"question_timeout": QUESTION_TIMEOUT, "shard": SHARD_INDEX})
+        app.add_handler(TypeHandler(Update, record_update), group=-2)
+
+    # Isi cache nama dari semua update (group -1 = jalan sebelum handler lain)
+    app.add_handler(TypeHandler(Update, remember_user), group=-1)
+
+    # Tambahkan semua handler seperti sebelumnya.
+    # Update bisa diproses paralel, tapi per chat tetap berurutan lewat actor.
+    # Durasi tiap handler dicatat ke quiz_handler_seconds{handler=...}
+    serial = actors.wrap
+    def command(name, handler):
+        return CommandHandler(name, serial(timed(handler_seconds, handler_errors, name, handler)))
+    app.add_handler(command("quizwadidaw", start_quiz_wadidaw))
+    app.add_handler(command("joinquiz", join_quiz))
+    app.add_handler(command("setlimit", set_question_limit))
+    app.add_handler(command("startquiznow", start_quiz_now))
+    app.add_handler(command("questionstatus", show_question_status))
+    app.add_handler(command("myscore", my_score))
+    app.add_handler(command("leaderboard", leaderboard))
+    app.add_handler(command("restartquiz", restart_quiz))
+    app.add_handler(command("listpemain", list_players))
+    app.add_handler(command("reloadsoal", reload_questions_command))
+    app.add_handler(command("settimer", set_timer))
+    app.add_handler(command("setscoring", set_scoring))
+    # Semua tombol lewat satu router (prefix karakter pertama callback_data)
+    router = CallbackRouter(fallback=timed(handler_seconds, handler_errors, "stale_button", handle_stale_button))
+    router.route(ANSWER, timed(handler_seconds, handler_errors, "answer", handle_answer))
+    router.route(LIMIT, timed(handler_seconds, handler_errors, "limit", handle_limit_selection))
+    router.route(START, timed(handler_seconds, handler_errors, "start_button", start_quiz_button))
+    app.add_handler(CallbackQueryHandler(serial(router.dispatch)))
+    return app
 
 def main():
+    secret = webhook_secret() if BOT_MODE == "webhook" else None
+    if SHARDS and BOT_MODE != "worker":
+        # Proses ini jadi ingress, webhook kalau WEBHOOK_URL diisi, selain itu polling
+        asyncio.run(run_sharded(
+            [sys.executable, os.path.abspath(__file__)], SHARDS, TOKEN, BOT_API_URL,
+            port=PORT, path=WEBHOOK_PATH, secret=secret,
+            webhook_url=WEBHOOK_URL if BOT_MODE == "webhook" else None, queue_size=WEBHOOK_QUEUE_SIZE,
+        ))
+        return
+
     global app
-    # app = ApplicationBuilder().token("TOKEN").build()
-    app = ApplicationBuilder().token("8054761920:AAGVaOnzt6MbvOamAca3HhxGDqZy6Ml2FA0").build()
-
-    # Tambahkan semua handler seperti sebelumnya
-    app.add_handler(CommandHandler("quizwadidaw", start_quiz_wadidaw))
-    app.add_handler(CommandHandler("joinquiz", join_quiz))
-    app.add_handler(CommandHandler("setlimit", set_question_limit))
-    app.add_handler(CommandHandler("startquiznow", start_quiz_now))
-    app.add_handler(CommandHandler("questionstatus", show_question_status))
-    app.add_handler(CommandHandler("myscore", my_score))
-    app.add_handler(CommandHandler("leaderboard", leaderboard))
-    app.add_handler(CommandHandler("restartquiz", restart_quiz))
-    app.add_handler(CommandHandler("listpemain", list_players)) 
-    app.add_handler(CallbackQueryHandler(handle_answer, pattern="^(?!limit_)(?!start_quiz).+"))
-    app.add_handler(CallbackQueryHandler(handle_limit_selection, pattern="^limit_.*"))
-    app.add_handler(CallbackQueryHandler(start_quiz_button, pattern="^start_quiz$"))
+    app = build_app()
+
+    if BOT_MODE == "worker":
+        asyncio.run(run_worker(app, SHARD_SOCKET, queue_size=WEBHOOK_QUEUE_SIZE, workers=CONCURRENT_UPDATES))
+        return
+
+    if BOT_MODE == "webhook":
+        asyncio.run(run_webhook(
+            app, "0.0.0.0", PORT, WEBHOOK_PATH, secret, WEBHOOK_URL,
+            queue_size=WEBHOOK_QUEUE_SIZE, workers=CONCURRENT_UPDATES,
+            health={"sessions": reaper.stats, "timers": timers.stats, "outbound": outbound.stats},
+            metrics=registry.handle,
+        ))
+        return
 
     # Run polling
     app.run_polling()
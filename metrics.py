@@ -0,0 +1,186 @@
+import asyncio
+import bisect
+import functools
+import logging
+import time
+
+from aiohttp import web
+
+# Metrik dalam format teks Prometheus (GET /metrics). Semua update cuma operasi dict/list
+# di event loop yang sama, tanpa lock dan tanpa alokasi per observasi selain label baru.
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+LAG_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names, values):
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + "}"
+
+
+# fn (opsional) sama seperti Gauge, untuk counter yang sudah dihitung di objek lain
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name, help, labels=(), fn=None):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.fn = fn
+        self.values = {}  # tuple nilai label -> angka
+
+    def inc(self, *labels, amount=1):
+        self.values[labels] = self.values.get(labels, 0) + amount
+
+    def samples(self):
+        values = self.values
+        if self.fn is not None:
+            values = self.fn()
+            if not isinstance(values, dict):
+                values = {(): values}
+        for labels, value in values.items():
+            yield self.name, self.labels, labels, value
+
+
+# fn (opsional) dipanggil saat scrape: return angka, atau dict tuple label -> angka
+class Gauge:
+    kind = "gauge"
+
+    def __init__(self, name, help, labels=(), fn=None):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.fn = fn
+        self.values = {}
+
+    def set(self, value, *labels):
+        self.values[labels] = value
+
+    def samples(self):
+        values = self.values
+        if self.fn is not None:
+            values = self.fn()
+            if not isinstance(values, dict):
+                values = {(): values}
+        for labels, value in values.items():
+            yield self.name, self.labels, labels, value
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name, help, labels=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        self.values = {}  # tuple nilai label -> [jumlah per bucket (+Inf di akhir), total]
+
+    def observe(self, value, *labels):
+        entry = self.values.get(labels)
+        if entry is None:
+            entry = self.values[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+        entry[0][bisect.bisect_left(self.buckets, value)] += 1
+        entry[1] += value
+
+    def samples(self):
+        names = self.labels + ("le",)
+        for labels, (counts, total) in self.values.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), counts):
+                cumulative += count
+                yield self.name + "_bucket", names, labels + (bound,), cumulative
+            yield self.name + "_sum", self.labels, labels, total
+            yield self.name + "_count", self.labels, labels, cumulative
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = []
+        self._runner = None
+
+    def _add(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def counter(self, name, help, labels=(), fn=None):
+        return self._add(Counter(name, help, labels, fn))
+
+    def gauge(self, name, help, labels=(), fn=None):
+        return self._add(Gauge(name, help, labels, fn))
+
+    def histogram(self, name, help, labels=(), buckets=LATENCY_BUCKETS):
+        return self._add(Histogram(name, help, labels, buckets))
+
+    def render(self):
+        lines = []
+        for metric in self.metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, label_names, labels, value in metric.samples():
+                lines.append(f"{name}{_format_labels(label_names, labels)} {value}")
+        return "\n".join(lines) + "\n"
+
+    async def handle(self, request):
+        return web.Response(body=self.render().encode(),
+                            headers={"Content-Type": "text/plain; version=0.0.4; charset=utf-8"})
+
+    # Server HTTP kecil khusus /metrics (mode polling / worker shard yang tidak punya server webhook)
+    async def serve(self, host="127.0.0.1", port=9100):
+        app = web.Application()
+        app.router.add_get("/metrics", self.handle)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, host, port).start()
+        logging.info(f"Metrics di http://{host}:{port}/metrics")
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+
+# Bungkus handler: durasi per nama handler + jumlah error
+def timed(histogram, errors, name, handler):
+    @functools.wraps(handler)
+    async def wrapped(*args):
+        started = time.perf_counter()
+        try:
+            return await handler(*args)
+        except Exception:
+            errors.inc(name)
+            raise
+        finally:
+            histogram.observe(time.perf_counter() - started, name)
+    return wrapped
+
+
+# Lag event loop: tidur `interval` detik lalu ukur seberapa telat bangunnya
+class LoopLagMonitor:
+    def __init__(self, histogram, interval=0.5):
+        self.histogram = histogram
+        self.interval = interval
+        self.lag_max = 0.0
+        self._task = None
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, time.perf_counter() - started - self.interval)
+            self.lag_max = max(self.lag_max, lag)
+            self.histogram.observe(lag)
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
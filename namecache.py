@@ -0,0 +1,76 @@
+import asyncio
+import time
+from collections import OrderedDict
+
+
+# Cache nama user (TTL + LRU) di depan context.bot.get_chat
+class NameCache:
+    def __init__(self, ttl=3600, maxsize=5000, negative_ttl=60):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.negative_ttl = negative_ttl
+        self._data = OrderedDict()  # user_id -> (name, expires_at)
+        self._inflight = {}  # user_id -> task get_chat yang sedang jalan
+        self.hits = 0
+        self.misses = 0
+
+    def put(self, user_id, name, ttl=None):
+        user_id = int(user_id)
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        self._data[user_id] = (name, expires_at)
+        self._data.move_to_end(user_id)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    # Isi cache gratis dari objek User yang sudah ada di update
+    def remember(self, user):
+        if user is not None and user.first_name:
+            self.put(user.id, user.first_name)
+
+    def peek(self, user_id):
+        entry = self._data.get(int(user_id))
+        if entry is None or entry[1] < time.monotonic():
+            return None
+        return entry[0]
+
+    async def get(self, bot, user_id):
+        user_id = int(user_id)
+        entry = self._data.get(user_id)
+        if entry is not None:
+            if entry[1] >= time.monotonic():
+                self.hits += 1
+                self._data.move_to_end(user_id)
+                return entry[0]
+            del self._data[user_id]
+
+        self.misses += 1
+        # Single-flight: miss bersamaan untuk id yang sama cuma 1x get_chat
+        task = self._inflight.get(user_id)
+        if task is None:
+            task = asyncio.ensure_future(self._fetch(bot, user_id))
+            self._inflight[user_id] = task
+            task.add_done_callback(lambda _: self._inflight.pop(user_id, None))
+        return await asyncio.shield(task)
+
+    async def _fetch(self, bot, user_id):
+        try:
+            chat = await bot.get_chat(user_id)
+        except Exception:
+            # Simpan gagal sebentar biar tidak spam get_chat
+            self.put(user_id, None, ttl=self.negative_ttl)
+            return None
+        name = chat.first_name or chat.title
+        self.put(user_id, name)
+        return name
+
+    # Resolve banyak id sekaligus (paralel), urutan hasil = urutan input
+    async def get_many(self, bot, user_ids):
+        return await asyncio.gather(*(self.get(bot, uid) for uid in user_ids))
+
+    def stats(self):
+        return {
+            "size": len(self._data),
+            "hits": self.hits,
+            "misses": self.misses,
+            "inflight": len(self._inflight),
+        }
@@ -0,0 +1,223 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+
+from telegram.error import RetryAfter, TelegramError
+from telegram.ext import BaseRateLimiter
+
+# Prioritas request keluar (angka kecil = didahulukan)
+HIGH = 0  # soal, hasil jawaban, jawaban callback query
+NORMAL = 1
+LOW = 2  # balasan status / error yang boleh dibuang kalau antrean panjang
+
+# Endpoint yang kena limit per chat di Telegram
+CHAT_LIMITED = {"sendMessage", "editMessageText", "editMessageReplyMarkup", "deleteMessage", "sendPhoto"}
+# Cuma pengiriman/ubah pesan yang dihitung ke limit ~30 pesan/detik. answerCallbackQuery, getChat,
+# dan lookup lain tidak, jadi tidak ikut antre token global (ack klik tidak berebut dengan soal).
+GLOBAL_LIMITED = CHAT_LIMITED
+
+DEFAULT_PRIORITY = {
+    "answerCallbackQuery": HIGH,
+    "getChat": LOW,
+    "getChatMember": LOW,
+}
+
+
+# Request LOW dibuang karena chat-nya lagi banyak antrean
+class DroppedRequest(TelegramError):
+    pass
+
+
+class TokenBucket:
+    __slots__ = ("rate", "capacity", "tokens", "stamp")
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.stamp = time.monotonic()
+
+    # Detik sampai ada 1 token (0 = bisa langsung)
+    def delay(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.stamp) * self.rate)
+        self.stamp = now
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def take(self):
+        self.tokens -= 1
+
+
+class _Request:
+    __slots__ = ("priority", "seq", "callback", "args", "kwargs", "endpoint", "data", "future", "queued_at")
+
+    def __init__(self, priority, seq, callback, args, kwargs, endpoint, data, future):
+        self.priority = priority
+        self.seq = seq
+        self.callback = callback
+        self.args = args
+        self.kwargs = kwargs
+        self.endpoint = endpoint
+        self.data = data
+        self.future = future
+        self.queued_at = time.monotonic()
+
+    def __lt__(self, other):
+        return (self.priority, self.seq) < (other.priority, other.seq)
+
+
+class _ChatQueue:
+    __slots__ = ("heap", "bucket", "task")
+
+    def __init__(self, bucket):
+        self.heap = []
+        self.bucket = bucket
+        self.task = None
+
+
+# Scheduler untuk semua panggilan Bot API keluar (dipasang lewat ApplicationBuilder.rate_limiter).
+# Limit global + per chat pakai token bucket, per chat diproses berurutan sesuai prioritas.
+class OutboundScheduler(BaseRateLimiter):
+    # Default global 25/detik + burst 5, jadi di jendela 1 detik mana pun tetap <= 30 pesan
+    def __init__(self, global_rate=25, global_burst=5, group_rate=20 / 60, group_burst=5, private_rate=1,
+                 private_burst=3, backlog_limit=3, max_retries=2):
+        self.global_bucket = TokenBucket(global_rate, global_burst)
+        self.group_rate = group_rate
+        self.group_burst = group_burst
+        self.private_rate = private_rate
+        self.private_burst = private_burst
+        self.backlog_limit = backlog_limit
+        self.max_retries = max_retries
+        self._chats = {}
+        self._seq = itertools.count()
+        self._waiting = [0, 0, 0]  # jumlah request yang menunggu token global per prioritas
+        self.sent = 0
+        self.dropped = 0
+        self.merged = 0
+        self.flood_waits = 0
+        self.wait_total = [0.0, 0.0, 0.0]
+        self.wait_max = [0.0, 0.0, 0.0]
+        self.wait_count = [0, 0, 0]
+        self.observe = None  # hook(method, detik, hasil) tiap panggilan Bot API, hasil: ok/flood/error
+
+    async def initialize(self):
+        pass
+
+    async def shutdown(self):
+        for queue in self._chats.values():
+            if queue.task is not None:
+                queue.task.cancel()
+        logging.info(f"outbound: {self.stats()}")
+
+    async def process_request(self, callback, args, kwargs, endpoint, data, rate_limit_args):
+        priority = rate_limit_args if rate_limit_args is not None else DEFAULT_PRIORITY.get(endpoint, NORMAL)
+        chat_id = data.get("chat_id") if endpoint in CHAT_LIMITED else None
+        if chat_id is None:
+            return await self._send(callback, args, kwargs, priority, time.monotonic(), endpoint)
+
+        queue = self._chats.get(chat_id)
+        if queue is None:
+            if str(chat_id).startswith("-"):
+                bucket = TokenBucket(self.group_rate, self.group_burst)
+            else:
+                bucket = TokenBucket(self.private_rate, self.private_burst)
+            queue = self._chats[chat_id] = _ChatQueue(bucket)
+
+        if priority >= LOW:
+            # Balasan yang sama persis masih antre -> gabung, jangan kirim 2x
+            for item in queue.heap:
+                if item.priority >= LOW and item.endpoint == endpoint and item.data.get("text") == data.get("text"):
+                    self.merged += 1
+                    return await asyncio.shield(item.future)
+            if len(queue.heap) >= self.backlog_limit:
+                self.dropped += 1
+                raise DroppedRequest(f"Antrean chat {chat_id} penuh, {endpoint} dibuang")
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(queue.heap, _Request(priority, next(self._seq), callback, args, kwargs, endpoint, data, future))
+        if queue.task is None:
+            queue.task = asyncio.create_task(self._chat_worker(chat_id, queue))
+        return await future
+
+    async def _chat_worker(self, chat_id, queue):
+        try:
+            while queue.heap:
+                delay = queue.bucket.delay()
+                if delay:
+                    await asyncio.sleep(delay)
+                    continue
+                queue.bucket.take()
+                item = heapq.heappop(queue.heap)
+                try:
+                    result = await self._send(item.callback, item.args, item.kwargs, item.priority, item.queued_at,
+                                              item.endpoint)
+                except Exception as e:
+                    if not item.future.done():
+                        item.future.set_exception(e)
+                else:
+                    if not item.future.done():
+                        item.future.set_result(result)
+        finally:
+            del self._chats[chat_id]
+
+    async def _acquire_global(self, priority):
+        self._waiting[priority] += 1
+        try:
+            while True:
+                delay = self.global_bucket.delay()
+                if not delay and not any(self._waiting[:priority]):
+                    self.global_bucket.take()
+                    return
+                await asyncio.sleep(delay or 0.005)
+        finally:
+            self._waiting[priority] -= 1
+
+    async def _send(self, callback, args, kwargs, priority, queued_at, endpoint):
+        if endpoint in GLOBAL_LIMITED:
+            await self._acquire_global(priority)
+        waited = time.monotonic() - queued_at
+        self.wait_total[priority] += waited
+        self.wait_count[priority] += 1
+        self.wait_max[priority] = max(self.wait_max[priority], waited)
+
+        for attempt in range(self.max_retries + 1):
+            started = time.perf_counter()
+            try:
+                result = await callback(*args, **kwargs)
+                self.sent += 1
+                if self.observe is not None:
+                    self.observe(endpoint, time.perf_counter() - started, "ok")
+                return result
+            except RetryAfter as e:
+                self.flood_waits += 1
+                if self.observe is not None:
+                    self.observe(endpoint, time.perf_counter() - started, "flood")
+                if attempt == self.max_retries:
+                    raise
+                retry_after = e.retry_after.total_seconds() if hasattr(e.retry_after, "total_seconds") else e.retry_after
+                logging.warning(f"Kena flood wait {retry_after}s, coba lagi")
+                await asyncio.sleep(retry_after)
+            except Exception:
+                if self.observe is not None:
+                    self.observe(endpoint, time.perf_counter() - started, "error")
+                raise
+
+    def stats(self):
+        names = ("high", "normal", "low")
+        stats = {
+            "chats": len(self._chats),
+            "queued": sum(len(q.heap) for q in self._chats.values()),
+            "sent": self.sent,
+            "dropped": self.dropped,
+            "merged": self.merged,
+            "flood_waits": self.flood_waits,
+        }
+        for i, name in enumerate(names):
+            count = self.wait_count[i]
+            stats[f"wait_avg_ms_{name}"] = self.wait_total[i] / count * 1000 if count else 0.0
+            stats[f"wait_max_ms_{name}"] = self.wait_max[i] * 1000
+        return stats
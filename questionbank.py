@@ -0,0 +1,148 @@
+import csv
+import hashlib
+import io
+import json
+import os
+import random
+import sys
+import time
+
+import requests
+
+# Jumlah variasi urutan opsi yang dirender per soal
+LAYOUTS_PER_QUESTION = 4
+
+
+# Parse CSV dari Google Sheets (kolom: Question, A, B, C, D, Correct)
+def parse_questions_csv(text):
+    questions = []
+    reader = csv.DictReader(io.StringIO(text))
+    for row in reader:
+        correct_index = ["A", "B", "C", "D"].index(row["Correct"].strip().upper())
+        options = [row["A"], row["B"], row["C"], row["D"]]
+        questions.append({
+            "question": row["Question"],
+            "options": options,
+            "answer": options[correct_index]
+        })
+    return questions
+
+
+# Snapshot lokal hasil parse terakhir, dibaca saat startup (tanpa network)
+def load_snapshot(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def save_snapshot(path, snapshot):
+    # Nama tmp per proses: di mode sharded semua worker bisa menyimpan snapshot bersamaan
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(snapshot, f, ensure_ascii=False)
+    os.replace(tmp, path)
+
+
+# Ambil sheet pakai conditional request (ETag / Last-Modified).
+# Return snapshot baru, atau None kalau isinya tidak berubah.
+def fetch_sheet(url, previous=None, timeout=10):
+    headers = {}
+    if previous:
+        if previous.get("etag"):
+            headers["If-None-Match"] = previous["etag"]
+        if previous.get("last_modified"):
+            headers["If-Modified-Since"] = previous["last_modified"]
+
+    response = requests.get(url, headers=headers, timeout=timeout)
+    if response.status_code == 304:
+        return None
+    response.raise_for_status()
+
+    # Sheets export tidak selalu kirim ETag, jadi bandingkan juga hash isinya
+    digest = hashlib.sha256(response.content).hexdigest()
+    if previous and previous.get("sha256") == digest:
+        return None
+
+    return {
+        "url": url,
+        "etag": response.headers.get("ETag"),
+        "last_modified": response.headers.get("Last-Modified"),
+        "sha256": digest,
+        "fetched_at": time.time(),
+        "questions": parse_questions_csv(response.text),
+    }
+
+
+# Satu soal dalam bentuk ringkas: string di-intern, jawaban disimpan sebagai index
+class Question:
+    __slots__ = ("id", "text", "options", "answer_index", "layouts", "fingerprint")
+
+    def __init__(self, id, text, options, answer_index):
+        self.id = id
+        self.text = sys.intern(text)
+        self.options = tuple(sys.intern(opt) for opt in options)
+        self.answer_index = answer_index
+        self.layouts = ()
+        self.fingerprint = None
+
+    # Siapkan beberapa permutasi opsi sekali di awal, bank tidak pernah di-shuffle.
+    # Keyboard finalnya dirender per sesi (lihat callbacks.render_keyboard).
+    def render(self, rng, count=LAYOUTS_PER_QUESTION):
+        orders = []
+        for _ in range(count * 3):
+            order = list(range(len(self.options)))
+            rng.shuffle(order)
+            order = tuple(order)
+            if order not in orders:
+                orders.append(order)
+            if len(orders) == count:
+                break
+        self.layouts = tuple(orders)
+
+    @property
+    def answer(self):
+        return self.options[self.answer_index]
+
+    def key(self):
+        return (self.text, self.options, self.answer_index)
+
+
+# Satu versi bank soal yang immutable. Versi baru selalu objek baru,
+# jadi publish cukup dengan swap satu referensi.
+class QuestionBank:
+    __slots__ = ("version", "questions", "digest", "snapshot", "loaded_at")
+
+    def __init__(self, version, questions, snapshot=None):
+        self.version = version
+        self.questions = tuple(
+            Question(i, q["question"], q["options"], list(q["options"]).index(q["answer"]))
+            for i, q in enumerate(questions)
+        )
+        # Sidik isi bank, stabil antar restart (beda dengan version)
+        digest = hashlib.sha1()
+        for q in self.questions:
+            key = repr(q.key()).encode("utf-8")
+            digest.update(key)
+            # Sidik per soal, dipakai mencocokkan soal sesi tersimpan ke bank versi lain
+            q.fingerprint = hashlib.sha1(key).hexdigest()[:12]
+        self.digest = digest.hexdigest()[:16]
+        rng = random.Random(self.digest)
+        for q in self.questions:
+            q.render(rng)
+        self.snapshot = snapshot
+        self.loaded_at = time.time()
+
+    def __len__(self):
+        return len(self.questions)
+
+
+# Hitung perubahan antar versi, key = teks pertanyaan
+def diff_banks(old, new):
+    old_map = {q.text: q.key() for q in old.questions}
+    new_map = {q.text: q.key() for q in new.questions}
+    added = sum(1 for key in new_map if key not in old_map)
+    removed = sum(1 for key in old_map if key not in new_map)
+    changed = sum(1 for key, q in new_map.items() if key in old_map and old_map[key] != q)
+    return added, removed, changed
@@ -0,0 +1,44 @@
+from sortedcontainers import SortedList
+
+
+# Peringkat satu grup yang dijaga tetap urut: (-skor, user_id) di SortedList.
+# Top-K, peringkat user dan tetangganya O(log n), tanpa sort ulang per request.
+class ChatRanking:
+    __slots__ = ("scores", "order")
+
+    def __init__(self, scores=()):
+        self.scores = dict(scores)  # user_id -> skor
+        self.order = SortedList((-score, user_id) for user_id, score in self.scores.items())
+
+    def add(self, user_id, points):
+        old = self.scores.get(user_id)
+        if old is not None:
+            if not points:
+                return
+            self.order.remove((-old, user_id))
+            points += old
+        self.scores[user_id] = points
+        self.order.add((-points, user_id))
+
+    # List (user_id, skor) urut skor tertinggi, seri diurut user_id
+    def top(self, limit, offset=0):
+        return [(user_id, -neg) for neg, user_id in self.order.islice(offset, offset + limit)]
+
+    # (skor, peringkat) dengan skor sama = peringkat sama, atau None
+    def lookup(self, user_id):
+        score = self.scores.get(user_id)
+        if score is None:
+            return None
+        return score, self.order.bisect_left((-score,)) + 1
+
+    # Posisi di leaderboard (0-based) + radius pemain di atas/bawahnya: list (posisi, user_id, skor)
+    def around(self, user_id, radius=1):
+        score = self.scores.get(user_id)
+        if score is None:
+            return []
+        position = self.order.index((-score, user_id))
+        start = max(0, position - radius)
+        return [(start + i, uid, -neg) for i, (neg, uid) in enumerate(self.order.islice(start, position + radius + 1))]
+
+    def __len__(self):
+        return len(self.scores)
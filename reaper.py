@@ -0,0 +1,88 @@
+import asyncio
+import logging
+import time
+
+
+# Buang sesi yang ditinggal (lobby tanpa mulai, menu limit tidak diklik, quiz macet).
+# TTL dihitung dari last_activity per state sesi. Pembersihan (timer, keyboard,
+# notifikasi) dikerjakan on_reap; run dipakai supaya jalan di actor chat-nya.
+class SessionReaper:
+    def __init__(self, sessions, ttls, interval=60):
+        self.sessions = sessions
+        self.ttls = ttls  # state -> detik, 0 = tidak pernah dibuang
+        self.interval = interval
+        self.reaped = {state: 0 for state in ttls}
+        self.sweeps = 0
+        self._on_reap = None
+        self._run = None
+        self._task = None
+
+    def start(self, on_reap, run=None):
+        self._on_reap = on_reap
+        self._run = run
+        if self._task is None and self.interval > 0:
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def expired(self, session, now=None):
+        ttl = self.ttls.get(session.state, 0)
+        if ttl <= 0:
+            return False
+        now = time.monotonic() if now is None else now
+        return now - session.last_activity >= ttl
+
+    async def _loop(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.sweep()
+            except Exception:
+                logging.exception("Gagal membersihkan sesi idle")
+
+    # Return jumlah sesi yang dibuang di putaran ini
+    async def sweep(self, now=None):
+        self.sweeps += 1
+        now = time.monotonic() if now is None else now
+        candidates = [(chat_id, session) for chat_id, session in self.sessions.items() if self.expired(session, now)]
+        count = 0
+        for chat_id, session in candidates:
+            if self._run is not None:
+                reaped = await self._run(chat_id, self._reap, chat_id, session, now)
+            else:
+                reaped = await self._reap(chat_id, session, now)
+            count += reaped
+        return count
+
+    async def _reap(self, chat_id, session, now):
+        # Cek ulang: bisa saja ada aktivitas atau sesi diganti selagi antre di actor
+        if self.sessions.get(chat_id) is not session or not self.expired(session, now):
+            return False
+        state = session.state
+        del self.sessions[chat_id]
+        self.reaped[state] = self.reaped.get(state, 0) + 1
+        logging.info(f"Sesi chat {chat_id} dibuang ({state}, idle {now - session.last_activity:.0f}s)")
+        if self._on_reap is not None:
+            try:
+                await self._on_reap(chat_id, session, state)
+            except Exception:
+                logging.exception(f"Gagal membersihkan sesi chat {chat_id}")
+        return True
+
+    def stats(self):
+        live = {state: 0 for state in self.ttls}
+        for session in self.sessions.values():
+            live[session.state] = live.get(session.state, 0) + 1
+        stats = {"live": len(self.sessions), "sweeps": self.sweeps, "reaped": sum(self.reaped.values())}
+        for state, count in live.items():
+            stats[f"live_{state}"] = count
+        for state, count in self.reaped.items():
+            stats[f"reaped_{state}"] = count
+        return stats
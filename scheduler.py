@@ -0,0 +1,143 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+
+
+class TimerHandle:
+    __slots__ = ("when", "seq", "key", "callback", "args", "cancelled")
+
+    def __init__(self, when, seq, key, callback, args):
+        self.when = when
+        self.seq = seq
+        self.key = key
+        self.callback = callback
+        self.args = args
+        self.cancelled = False
+
+    def __lt__(self, other):
+        return (self.when, self.seq) < (other.when, other.seq)
+
+
+# Satu loop untuk semua deadline soal (heap + lazy delete).
+# Cancel O(1): timer cuma ditandai, dibuang saat sampai di puncak heap.
+class DeadlineScheduler:
+    def __init__(self):
+        self._heap = []
+        self._timers = {}  # key -> TimerHandle aktif
+        self._seq = itertools.count()
+        self._cancelled = 0
+        self._wakeup = None
+        self._task = None
+        self.fired = 0
+        self.lag_max = 0.0
+        self.lag_total = 0.0
+        self.observe_lag = None  # hook(detik telat) tiap timer jalan
+
+    def start(self):
+        if self._task is None:
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def schedule(self, key, delay, callback, *args):
+        self.cancel(key)
+        handle = TimerHandle(time.monotonic() + delay, next(self._seq), key, callback, args)
+        self._timers[key] = handle
+        heapq.heappush(self._heap, handle)
+        # Bangunkan loop kalau deadline baru ini yang paling dekat
+        if self._wakeup is not None and self._heap[0] is handle:
+            self._wakeup.set()
+        return handle
+
+    def cancel(self, key):
+        handle = self._timers.pop(key, None)
+        if handle is None:
+            return False
+        handle.cancelled = True
+        self._cancelled += 1
+        # Rapikan heap kalau isinya kebanyakan timer batal
+        if self._cancelled > 64 and self._cancelled > len(self._heap) // 2:
+            self._heap = [h for h in self._heap if not h.cancelled]
+            heapq.heapify(self._heap)
+            self._cancelled = 0
+        return True
+
+    def reschedule(self, key, delay):
+        handle = self._timers.get(key)
+        if handle is None:
+            return None
+        return self.schedule(key, delay, handle.callback, *handle.args)
+
+    def remaining(self, key):
+        handle = self._timers.get(key)
+        if handle is None:
+            return None
+        return max(0.0, handle.when - time.monotonic())
+
+    def __contains__(self, key):
+        return key in self._timers
+
+    def __len__(self):
+        return len(self._timers)
+
+    def _pop_cancelled(self):
+        while self._heap and self._heap[0].cancelled:
+            heapq.heappop(self._heap)
+            self._cancelled -= 1
+
+    async def _run(self):
+        while True:
+            self._pop_cancelled()
+            self._wakeup.clear()
+            if not self._heap:
+                await self._wakeup.wait()
+                continue
+
+            delay = self._heap[0].when - time.monotonic()
+            if delay > 0:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            now = time.monotonic()
+            while self._heap and self._heap[0].when <= now:
+                handle = heapq.heappop(self._heap)
+                if handle.cancelled:
+                    self._cancelled -= 1
+                    continue
+                del self._timers[handle.key]
+                lag = now - handle.when
+                self.fired += 1
+                self.lag_total += lag
+                self.lag_max = max(self.lag_max, lag)
+                if self.observe_lag is not None:
+                    self.observe_lag(lag)
+                # Callback jalan sebagai task sendiri, loop timer tidak ikut tertahan
+                asyncio.create_task(self._fire(handle))
+
+    async def _fire(self, handle):
+        try:
+            await handle.callback(*handle.args)
+        except Exception:
+            logging.exception(f"Timer {handle.key} gagal")
+
+    def stats(self):
+        return {
+            "pending": len(self._timers),
+            "heap": len(self._heap),
+            "fired": self.fired,
+            "lag_max_ms": self.lag_max * 1000,
+            "lag_avg_ms": (self.lag_total / self.fired * 1000) if self.fired else 0.0,
+        }
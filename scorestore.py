@@ -0,0 +1,464 @@
+import asyncio
+import concurrent.futures
+import glob
+import json
+import logging
+import os
+import sqlite3
+import time
+
+from ranking import ChatRanking
+from windows import WINDOWS, current_periods, period_key
+
+
+# Skor global per grup: snapshot + journal append-only berisi delta skor.
+# Tiap baris journal punya nomor urut (s); snapshot menyimpan nomor terakhir
+# yang sudah masuk, jadi replay tinggal lewati baris s <= seq snapshot.
+# Tulis = 1 baris kecil ke journal (O(delta)), fsync dikumpulkan per fsync_delay,
+# compaction (tulis snapshot + buang journal lama) jalan di background.
+# Selain all-time, skor hari/minggu/bulan ini disimpan sebagai bucket per periode
+# (window None = all-time); baris journal membawa waktu (t) untuk membangunnya ulang.
+class ScoreStore:
+    def __init__(self, path, fsync_delay=0.05, compact_bytes=1 << 20):
+        self.path = path
+        self.journal_path = path + ".journal"
+        self.fsync_delay = fsync_delay
+        self.compact_bytes = compact_bytes
+        self.appends = 0
+        self.fsyncs = 0
+        self.compactions = 0
+        self._replay()
+        # window -> {chat_id: ChatRanking}, dibangun saat grup itu pertama kali ditanya
+        self.rankings = {window: {} for window in (None,) + WINDOWS}
+        self._fd = os.open(self.journal_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        self._journal_size = os.fstat(self._fd).st_size
+        self._lock = asyncio.Lock()  # fd tidak boleh ditutup selagi fsync jalan
+        self._sync_task = None
+        self._compact_task = None
+
+    # File journal yang sudah dirotasi compaction (journal.<seq>), urut lama -> baru
+    def _rotated(self):
+        paths = glob.glob(glob.escape(self.journal_path) + ".*")
+        rotated = []
+        for path in paths:
+            suffix = path.rsplit(".", 1)[1]
+            if suffix.isdigit():
+                rotated.append((int(suffix), path))
+        return [path for _, path in sorted(rotated)]
+
+    def _replay(self):
+        scores, seq = {}, 0
+        self.periods = current_periods(time.time())
+        self.windows = {window: {} for window in WINDOWS}  # window -> {chat_id: {user_id: skor}}
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if isinstance(data.get("scores"), dict) and "seq" in data:
+                scores, seq = data["scores"], data["seq"]
+                for window, bucket in data.get("windows", {}).items():
+                    # Bucket periode yang sudah lewat tidak dimuat
+                    if self.periods.get(window) == bucket["period"]:
+                        self.windows[window] = bucket["scores"]
+            else:
+                scores = data  # format lama: langsung {chat_id: {user_id: skor}}
+        except FileNotFoundError:
+            pass
+
+        replayed = 0
+        for path in self._rotated() + [self.journal_path]:
+            try:
+                f = open(path, "rb")
+            except FileNotFoundError:
+                continue
+            with f:
+                valid = 0
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        entry = None
+                    if entry is None or not line.endswith(b"\n"):
+                        # Baris terakhir terpotong karena mati pas nulis
+                        logging.warning(f"Journal skor {path}: baris rusak di byte {valid} diabaikan")
+                        break
+                    valid += len(line)
+                    if entry["s"] <= seq:
+                        continue
+                    self._apply(scores, entry["c"], entry["d"])
+                    if "t" in entry:
+                        for window, bucket in self.windows.items():
+                            if period_key(window, entry["t"]) == self.periods[window]:
+                                self._apply(bucket, entry["c"], entry["d"])
+                    seq = entry["s"]
+                    replayed += 1
+            if path == self.journal_path:
+                # Potong sisa baris rusak supaya append berikutnya mulai di baris baru
+                os.truncate(path, valid)
+        self.scores, self.seq, self.replayed = scores, seq, replayed
+
+    # Periode ganti -> bucket lama dibuang utuh (O(1)), tidak perlu scan histori
+    def _roll(self, now=None):
+        periods = current_periods(time.time() if now is None else now)
+        for window, key in periods.items():
+            if self.periods[window] != key:
+                self.periods[window] = key
+                self.windows[window] = {}
+                self.rankings[window] = {}
+
+    def _bucket(self, window):
+        return self.scores if window is None else self.windows[window]
+
+    @staticmethod
+    def _apply(scores, chat_id, deltas):
+        chat_scores = scores.setdefault(chat_id, {})
+        for user_id, points in deltas.items():
+            chat_scores[user_id] = chat_scores.get(user_id, 0) + points
+
+    # Tambah skor satu grup, deltas = {user_id: poin}
+    async def add(self, chat_id, deltas):
+        self.append(chat_id, deltas)
+
+    def append(self, chat_id, deltas, now=None):
+        now = time.time() if now is None else now
+        self._roll(now)
+        chat_id = str(chat_id)
+        deltas = {str(user_id): points for user_id, points in deltas.items()}
+        for window, rankings in self.rankings.items():
+            self._apply(self._bucket(window), chat_id, deltas)
+            ranking = rankings.get(chat_id)
+            if ranking is not None:
+                for user_id, points in deltas.items():
+                    ranking.add(int(user_id), points)
+        self.seq += 1
+        line = json.dumps({"s": self.seq, "c": chat_id, "t": int(now), "d": deltas}, separators=(",", ":")) + "\n"
+        data = line.encode("utf-8")
+        # Langsung ke OS (aman kalau proses mati), fsync ke disk menyusul per batch
+        os.write(self._fd, data)
+        self._journal_size += len(data)
+        self.appends += 1
+        self._schedule_sync()
+        if self._journal_size >= self.compact_bytes:
+            self.schedule_compact()
+
+    def _schedule_sync(self):
+        if self._sync_task is not None:
+            return
+        try:
+            self._sync_task = asyncio.get_running_loop().create_task(self._sync_later())
+        except RuntimeError:
+            os.fsync(self._fd)
+            self.fsyncs += 1
+
+    async def _sync_later(self):
+        await asyncio.sleep(self.fsync_delay)
+        # Append berikutnya menjadwalkan batch baru
+        self._sync_task = None
+        async with self._lock:
+            await asyncio.to_thread(os.fsync, self._fd)
+            self.fsyncs += 1
+
+    def schedule_compact(self):
+        if self._compact_task is None:
+            self._compact_task = asyncio.get_running_loop().create_task(self._compact_background())
+
+    async def _compact_background(self):
+        try:
+            await self.compact()
+        except Exception:
+            logging.exception("Compaction skor gagal, journal tetap dipakai")
+        finally:
+            self._compact_task = None
+
+    async def compact(self):
+        async with self._lock:
+            if self._journal_size:
+                await asyncio.to_thread(os.fsync, self._fd)
+                os.close(self._fd)
+                os.replace(self.journal_path, f"{self.journal_path}.{self.seq}")
+                self._fd = os.open(self.journal_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+                self._journal_size = 0
+            # Salinan diambil tanpa await setelah rotasi: isinya tepat sampai self.seq
+            snapshot = {
+                "seq": self.seq,
+                "scores": {chat_id: dict(users) for chat_id, users in self.scores.items()},
+                "windows": {
+                    window: {"period": self.periods[window],
+                             "scores": {chat_id: dict(users) for chat_id, users in bucket.items()}}
+                    for window, bucket in self.windows.items()
+                },
+            }
+            rotated = self._rotated()
+        await asyncio.to_thread(self._write_snapshot, snapshot)
+        for path in rotated:
+            os.remove(path)
+        self.compactions += 1
+        logging.info(f"Skor dikompaksi sampai seq {snapshot['seq']}, {len(rotated)} journal dibuang")
+
+    def _write_snapshot(self, snapshot):
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(snapshot, f, separators=(",", ":"))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+
+    async def close(self):
+        if self._compact_task is not None:
+            await self._compact_task
+        if self._sync_task is not None:
+            self._sync_task.cancel()
+            self._sync_task = None
+        async with self._lock:
+            os.fsync(self._fd)
+            self.fsyncs += 1
+            os.close(self._fd)
+        logging.info(f"scores: {self.stats()}")
+
+    # user_id di hasil peringkat selalu int; window None = all-time, atau "day"/"week"/"month"
+    def ranking(self, chat_id, window=None):
+        if window is not None:
+            self._roll()
+        chat_id = str(chat_id)
+        rankings = self.rankings[window]
+        ranking = rankings.get(chat_id)
+        if ranking is None:
+            chat_scores = self._bucket(window).get(chat_id, {})
+            ranking = rankings[chat_id] = ChatRanking((int(u), s) for u, s in chat_scores.items())
+        return ranking
+
+    async def top(self, chat_id, limit, offset=0, window=None):
+        return self.ranking(chat_id, window).top(limit, offset)
+
+    # Return (skor, peringkat) atau None; skor sama = peringkat sama
+    async def lookup(self, chat_id, user_id, window=None):
+        return self.ranking(chat_id, window).lookup(int(user_id))
+
+    async def around(self, chat_id, user_id, radius=1, window=None):
+        return self.ranking(chat_id, window).around(int(user_id), radius)
+
+    async def count(self, chat_id, window=None):
+        return len(self.ranking(chat_id, window))
+
+    def stats(self):
+        return {
+            "backend": "journal",
+            "chats": len(self.scores),
+            "ranked_chats": len(self.rankings[None]),
+            "periods": self.periods,
+            "seq": self.seq,
+            "journal_bytes": self._journal_size,
+            "appends": self.appends,
+            "fsyncs": self.fsyncs,
+            "compactions": self.compactions,
+            "replayed": self.replayed,
+        }
+
+
+# Backend SQLite (WAL) dengan index (chat_id, score DESC): leaderboard = query top-N,
+# skor user = point lookup + COUNT di index. Semua query jalan di 1 thread khusus
+# (koneksi SQLite tidak dipakai bareng antar thread), event loop tidak ikut nunggu disk.
+# Skor hari/minggu/bulan ini ada di window_scores; periode lama dihapus saat periode ganti.
+# Aman dipakai beberapa proses sekaligus (mode sharded): tiap tulis 1 transaksi BEGIN IMMEDIATE.
+class SqliteScoreStore:
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS scores (
+            chat_id INTEGER NOT NULL,
+            user_id INTEGER NOT NULL,
+            score INTEGER NOT NULL,
+            PRIMARY KEY (chat_id, user_id)
+        ) WITHOUT ROWID;
+        CREATE INDEX IF NOT EXISTS scores_rank ON scores (chat_id, score DESC);
+        CREATE TABLE IF NOT EXISTS window_scores (
+            kind TEXT NOT NULL,
+            period TEXT NOT NULL,
+            chat_id INTEGER NOT NULL,
+            user_id INTEGER NOT NULL,
+            score INTEGER NOT NULL,
+            PRIMARY KEY (kind, chat_id, user_id)
+        ) WITHOUT ROWID;
+        CREATE INDEX IF NOT EXISTS window_scores_rank ON window_scores (kind, chat_id, score DESC);
+        CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+    """
+
+    def __init__(self, path, json_path=None):
+        self.path = path
+        self.json_path = json_path
+        self.writes = 0
+        self.queries = 0
+        self.query_time = 0.0
+        self.migrated = 0
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix="scores-db")
+        self._db = None
+        self._ready = None
+        self._periods = {}  # kind -> periode yang sekarang ada di window_scores
+
+    def _open(self):
+        # timeout = busy_timeout: tunggu giliran kalau proses lain sedang menulis
+        db = sqlite3.connect(self.path, timeout=30, check_same_thread=False, isolation_level=None)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=NORMAL")
+        db.executescript(self.SCHEMA)
+        self._db = db
+        for key, value in db.execute("SELECT key, value FROM meta WHERE key LIKE 'period:%'"):
+            self._periods[key[len("period:"):]] = value
+        if self.json_path and db.execute("SELECT 1 FROM meta WHERE key = 'migrated_from'").fetchone() is None:
+            self._migrate()
+
+    # Import sekali dari scores_db.json (+ journal-nya), file JSON dibiarkan sebagai cadangan
+    def _migrate(self):
+        rows, window_rows = [], []
+        if os.path.exists(self.json_path):
+            store = ScoreStore(self.json_path)
+            os.close(store._fd)
+            rows = [(int(chat_id), int(user_id), score)
+                    for chat_id, users in store.scores.items() for user_id, score in users.items()]
+            window_rows = [(window, store.periods[window], int(chat_id), int(user_id), score)
+                           for window, bucket in store.windows.items()
+                           for chat_id, users in bucket.items() for user_id, score in users.items()]
+        db = self._db
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            if db.execute("SELECT 1 FROM meta WHERE key = 'migrated_from'").fetchone() is not None:
+                # Proses lain (mode sharded) sudah duluan migrasi
+                db.execute("ROLLBACK")
+                return
+            db.executemany(
+                "INSERT INTO scores VALUES (?, ?, ?) "
+                "ON CONFLICT (chat_id, user_id) DO UPDATE SET score = score + excluded.score", rows)
+            db.executemany("INSERT OR REPLACE INTO window_scores VALUES (?, ?, ?, ?, ?)", window_rows)
+            for window, period in {row[0]: row[1] for row in window_rows}.items():
+                self._set_period(window, period)
+            db.execute("INSERT INTO meta VALUES ('migrated_from', ?)", (self.json_path,))
+            db.execute("COMMIT")
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        self.migrated = len(rows)
+        logging.info(f"Skor dimigrasi dari {self.json_path} ke {self.path}: {len(rows)} baris")
+
+    def _set_period(self, window, period):
+        self._db.execute("INSERT OR REPLACE INTO meta VALUES (?, ?)", ("period:" + window, period))
+        self._periods[window] = period
+
+    async def _run(self, fn, *args):
+        loop = asyncio.get_running_loop()
+        if self._ready is None:
+            self._ready = loop.run_in_executor(self._executor, self._open)
+        await self._ready
+        started = time.perf_counter()
+        try:
+            return await loop.run_in_executor(self._executor, fn, *args)
+        finally:
+            self.queries += 1
+            self.query_time += time.perf_counter() - started
+
+    # Tabel + kondisi WHERE untuk skor all-time (window None) atau periode yang sedang jalan
+    @staticmethod
+    def _scope(window):
+        if window is None:
+            return "scores", "chat_id = ?", ()
+        return "window_scores", "kind = ? AND period = ? AND chat_id = ?", (window, period_key(window, time.time()))
+
+    # Satu transaksi per sesi selesai, all-time + bucket periode sekaligus
+    def _add(self, chat_id, deltas, periods):
+        db = self._db
+        known_periods = dict(self._periods)
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            db.executemany(
+                "INSERT INTO scores VALUES (?, ?, ?) "
+                "ON CONFLICT (chat_id, user_id) DO UPDATE SET score = score + excluded.score",
+                [(chat_id, int(user_id), points) for user_id, points in deltas.items()])
+            for window, period in periods.items():
+                # Dibaca di dalam transaksi: di mode sharded proses lain bisa sudah ganti periode duluan
+                row = db.execute("SELECT value FROM meta WHERE key = ?", ("period:" + window,)).fetchone()
+                known = row and row[0]
+                if known and period < known:
+                    # Sesi selesai pas pergantian periode dan bucket lamanya sudah dibuang proses lain
+                    continue
+                if known != period:
+                    # Periode ganti: buang bucket lama sekali jalan
+                    db.execute("DELETE FROM window_scores WHERE kind = ? AND period != ?", (window, period))
+                    self._set_period(window, period)
+                else:
+                    self._periods[window] = period
+                db.executemany(
+                    "INSERT INTO window_scores VALUES (?, ?, ?, ?, ?) "
+                    "ON CONFLICT (kind, chat_id, user_id) DO UPDATE SET score = score + excluded.score",
+                    [(window, period, chat_id, int(user_id), points) for user_id, points in deltas.items()])
+            db.execute("COMMIT")
+        except BaseException:
+            db.execute("ROLLBACK")
+            self._periods = known_periods
+            raise
+        self.writes += 1
+
+    async def add(self, chat_id, deltas):
+        await self._run(self._add, int(chat_id), deltas, current_periods(time.time()))
+
+    def _top(self, scope, chat_id, limit, offset):
+        table, where, params = scope
+        return self._db.execute(
+            f"SELECT user_id, score FROM {table} WHERE {where} ORDER BY score DESC, user_id LIMIT ? OFFSET ?",
+            params + (chat_id, limit, offset)).fetchall()
+
+    async def top(self, chat_id, limit, offset=0, window=None):
+        return await self._run(self._top, self._scope(window), int(chat_id), limit, offset)
+
+    def _score(self, scope, chat_id, user_id):
+        table, where, params = scope
+        row = self._db.execute(
+            f"SELECT score FROM {table} WHERE {where} AND user_id = ?", params + (chat_id, user_id)).fetchone()
+        return None if row is None else row[0]
+
+    def _lookup(self, scope, chat_id, user_id):
+        score = self._score(scope, chat_id, user_id)
+        if score is None:
+            return None
+        table, where, params = scope
+        higher, = self._db.execute(
+            f"SELECT COUNT(*) FROM {table} WHERE {where} AND score > ?", params + (chat_id, score)).fetchone()
+        return score, higher + 1
+
+    async def lookup(self, chat_id, user_id, window=None):
+        return await self._run(self._lookup, self._scope(window), int(chat_id), int(user_id))
+
+    # Urutan sama dengan _top: skor turun, seri diurut user_id
+    def _around(self, scope, chat_id, user_id, radius):
+        score = self._score(scope, chat_id, user_id)
+        if score is None:
+            return []
+        table, where, params = scope
+        position, = self._db.execute(
+            f"SELECT COUNT(*) FROM {table} WHERE {where} AND (score > ? OR (score = ? AND user_id < ?))",
+            params + (chat_id, score, score, user_id)).fetchone()
+        start = max(0, position - radius)
+        rows = self._top(scope, chat_id, position - start + radius + 1, start)
+        return [(start + i, uid, points) for i, (uid, points) in enumerate(rows)]
+
+    async def around(self, chat_id, user_id, radius=1, window=None):
+        return await self._run(self._around, self._scope(window), int(chat_id), int(user_id), radius)
+
+    def _count(self, scope, chat_id):
+        table, where, params = scope
+        return self._db.execute(f"SELECT COUNT(*) FROM {table} WHERE {where}", params + (chat_id,)).fetchone()[0]
+
+    async def count(self, chat_id, window=None):
+        return await self._run(self._count, self._scope(window), int(chat_id))
+
+    async def close(self):
+        if self._db is not None:
+            await asyncio.get_running_loop().run_in_executor(self._executor, self._db.close)
+            self._db = None
+        self._executor.shutdown(wait=False)
+        logging.info(f"scores: {self.stats()}")
+
+    def stats(self):
+        return {
+            "backend": "sqlite",
+            "writes": self.writes,
+            "queries": self.queries,
+            "query_avg_ms": self.query_time / self.queries * 1000 if self.queries else 0.0,
+            "migrated": self.migrated,
+            "periods": dict(self._periods),
+        }
@@ -0,0 +1,74 @@
+import time
+
+
+# Poin berdasarkan urutan benar: default 5 / 3 / 1
+class RankPoints:
+    name = "rank"
+
+    def __init__(self, top=(5, 3), rest=1):
+        self.top = tuple(top)
+        self.rest = rest
+
+    def points(self, rank, elapsed, timeout):
+        return self.top[rank] if rank < len(self.top) else self.rest
+
+    def describe(self):
+        return " / ".join(str(p) for p in self.top) + f" / {self.rest} poin sesuai urutan"
+
+
+# Poin berdasarkan kecepatan: makin cepat makin besar, turun linear sampai timeout
+class SpeedPoints:
+    name = "speed"
+
+    def __init__(self, max_points=10, min_points=1):
+        self.max_points = max_points
+        self.min_points = min_points
+
+    def points(self, rank, elapsed, timeout):
+        if timeout <= 0:
+            return self.max_points
+        ratio = min(max(elapsed / timeout, 0.0), 1.0)
+        return round(self.min_points + (self.max_points - self.min_points) * (1 - ratio))
+
+    def describe(self):
+        return f"{self.max_points} sampai {self.min_points} poin sesuai kecepatan"
+
+
+RULES = {
+    "rank": RankPoints(),
+    "speed": SpeedPoints(),
+}
+
+
+# Jawaban satu soal dalam urutan diterima, dengan timestamp monotonic dari server
+class AnswerLog:
+    __slots__ = ("opened_at", "users", "options", "times")
+
+    def __init__(self, opened_at=None):
+        self.opened_at = time.monotonic() if opened_at is None else opened_at
+        self.users = []
+        self.options = []
+        self.times = []
+
+    def record(self, user_id, option, received_at=None):
+        self.users.append(user_id)
+        self.options.append(option)
+        self.times.append(time.monotonic() if received_at is None else received_at)
+
+    def __len__(self):
+        return len(self.users)
+
+
+# Ranking satu kali jalan: log sudah urut waktu diterima, jadi urutan benar = urutan di log.
+# Return list (user_id, benar?, poin) sesuai urutan jawaban.
+def score_answers(log, correct_option, rule, timeout):
+    results = []
+    rank = 0
+    opened_at = log.opened_at
+    for user_id, option, received_at in zip(log.users, log.options, log.times):
+        if option == correct_option:
+            results.append((user_id, True, rule.points(rank, received_at - opened_at, timeout)))
+            rank += 1
+        else:
+            results.append((user_id, False, 0))
+    return results
@@ -0,0 +1,193 @@
+import time
+from array import array
+
+from scoring import AnswerLog
+
+
+# State satu sesi quiz per chat. Pemain disimpan di array ringkas berindeks slot:
+# players (user_id -> slot), user_ids/names/scores/answered per slot.
+class QuizSession:
+    __slots__ = (
+        "chat_id", "created_at", "last_activity",
+        "started", "waiting_limit_selection", "limit", "index", "menu_message_id",
+        "bank", "questions", "layouts", "epoch", "keyboards",
+        "question_active", "current_message_id", "answer_log",
+        "status_message_id", "status_text",
+        "players", "user_ids", "names", "scores", "answered", "answer_count",
+    )
+
+    def __init__(self, chat_id, waiting_limit_selection=False):
+        self.chat_id = chat_id
+        self.created_at = self.last_activity = time.monotonic()
+        self.started = False
+        self.waiting_limit_selection = waiting_limit_selection
+        self.limit = None
+        self.index = 0
+        self.menu_message_id = None
+        self.bank = None
+        self.questions = []
+        self.layouts = []  # indeks layout opsi per soal (question.layouts)
+        self.epoch = 0
+        self.keyboards = []
+        self.question_active = False
+        self.current_message_id = None
+        self.answer_log = None
+        self.status_message_id = None
+        self.status_text = None
+        self.players = {}
+        self.user_ids = []
+        self.names = []
+        self.scores = array("l")
+        self.answered = bytearray()
+        self.answer_count = 0
+
+    # lobby (kumpul pemain) -> waiting (pilih jumlah soal) -> running
+    @property
+    def state(self):
+        if self.started:
+            return "running"
+        if self.waiting_limit_selection:
+            return "waiting"
+        return "lobby"
+
+    def touch(self):
+        self.last_activity = time.monotonic()
+
+    # ---- pemain ----
+
+    def add_player(self, user_id, name):
+        self.touch()
+        slot = self.players.get(user_id)
+        if slot is None:
+            slot = self.players[user_id] = len(self.user_ids)
+            self.user_ids.append(user_id)
+            self.names.append(name)
+            self.scores.append(0)
+            self.answered.append(0)
+        else:
+            self.names[slot] = name
+        return slot
+
+    def has_player(self, user_id):
+        return user_id in self.players
+
+    def name_of(self, user_id):
+        slot = self.players.get(user_id)
+        return None if slot is None else self.names[slot]
+
+    def score_of(self, user_id):
+        slot = self.players.get(user_id)
+        return None if slot is None else self.scores[slot]
+
+    def add_points(self, user_id, points):
+        self.scores[self.players[user_id]] += points
+
+    def score_items(self):
+        return list(zip(self.user_ids, self.scores))
+
+    # ---- jawaban soal yang sedang jalan ----
+
+    def start_question(self):
+        self.touch()
+        self.answered[:] = bytes(len(self.answered))
+        self.answer_count = 0
+        self.answer_log = AnswerLog()
+
+    def has_answered(self, user_id):
+        return self.answered[self.players[user_id]] == 1
+
+    def record_answer(self, user_id, option, received_at=None):
+        self.last_activity = time.monotonic() if received_at is None else received_at
+        self.answered[self.players[user_id]] = 1
+        self.answer_count += 1
+        self.answer_log.record(user_id, option, received_at)
+
+    def all_answered(self):
+        return self.answer_count == len(self.user_ids)
+
+    def answered_users(self):
+        return [uid for uid, done in zip(self.user_ids, self.answered) if done]
+
+    def unanswered_users(self):
+        return [uid for uid, done in zip(self.user_ids, self.answered) if not done]
+
+    # ---- snapshot (lihat sessionstore.py) ----
+
+    # Waktu monotonic tidak berlaku lintas restart, jadi disimpan sebagai waktu dinding
+    def to_dict(self):
+        offset = time.time() - time.monotonic()
+        data = {
+            "chat_id": self.chat_id,
+            "created_at": self.created_at + offset,
+            "last_activity": self.last_activity + offset,
+            "started": self.started,
+            "waiting_limit_selection": self.waiting_limit_selection,
+            "limit": self.limit,
+            "index": self.index,
+            "menu_message_id": self.menu_message_id,
+            "current_message_id": self.current_message_id,
+            "status_message_id": self.status_message_id,
+            "question_active": self.question_active,
+            "user_ids": self.user_ids,
+            "names": self.names,
+            "scores": self.scores.tolist(),
+            "answered": list(self.answered),
+        }
+        if self.bank is not None:
+            data["bank"] = self.bank.digest
+            data["questions"] = [[q.id, q.fingerprint] for q in self.questions]
+            data["layouts"] = self.layouts
+            data["epoch"] = self.epoch
+        log = self.answer_log
+        if log is not None:
+            data["opened_at"] = log.opened_at + offset
+            data["answers"] = [log.users, log.options, [t - log.opened_at for t in log.times]]
+        return data
+
+    # Return None kalau soal sesi ini sudah tidak ada di bank sekarang
+    @classmethod
+    def from_dict(cls, data, bank):
+        offset = time.time() - time.monotonic()
+        session = cls(data["chat_id"], data["waiting_limit_selection"])
+        session.created_at = data["created_at"] - offset
+        session.last_activity = data["last_activity"] - offset
+        session.started = data["started"]
+        session.limit = data["limit"]
+        session.index = data["index"]
+        session.menu_message_id = data["menu_message_id"]
+        session.current_message_id = data["current_message_id"]
+        session.status_message_id = data["status_message_id"]
+        session.question_active = data["question_active"]
+        session.user_ids = data["user_ids"]
+        session.names = data["names"]
+        session.players = {uid: slot for slot, uid in enumerate(session.user_ids)}
+        session.scores = array("l", data["scores"])
+        session.answered = bytearray(data["answered"])
+        session.answer_count = sum(session.answered)
+
+        if "bank" in data:
+            questions = bank.questions
+            by_fingerprint = None
+            for question_id, fingerprint in data["questions"]:
+                if question_id < len(questions) and questions[question_id].fingerprint == fingerprint:
+                    session.questions.append(questions[question_id])
+                    continue
+                # Bank sudah berubah (digest beda): cari soal yang sama lewat sidiknya
+                if by_fingerprint is None:
+                    by_fingerprint = {q.fingerprint: q for q in questions}
+                question = by_fingerprint.get(fingerprint)
+                if question is None:
+                    return None
+                session.questions.append(question)
+            session.bank = bank
+            session.layouts = [min(i, len(q.layouts) - 1) for i, q in zip(data["layouts"], session.questions)]
+            session.epoch = data["epoch"]
+
+        if "opened_at" in data:
+            opened_at = data["opened_at"] - offset
+            log = session.answer_log = AnswerLog(opened_at)
+            users, options, elapsed = data["answers"]
+            log.users = users
+            log.options = options
+            log.times = [opened_at + t for t in elapsed]
+        return session
@@ -0,0 +1,73 @@
+import asyncio
+import json
+import logging
+import os
+
+
+# Snapshot sesi yang sedang jalan, satu file kecil per chat (<dir>/<chat_id>.json).
+# Transisi state ditulis langsung, jawaban digabung per save_delay supaya
+# banyak klik -> 1x tulis. snapshot(session) -> dict yang disimpan.
+class SessionStore:
+    def __init__(self, directory, snapshot, save_delay=1):
+        self.directory = directory
+        self.snapshot = snapshot
+        self.save_delay = save_delay
+        self.writes = 0
+        self._dirty = {}
+        self._save_handle = None
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, chat_id):
+        return os.path.join(self.directory, f"{chat_id}.json")
+
+    def save(self, session):
+        self._dirty.pop(session.chat_id, None)
+        path = self._path(session.chat_id)
+        tmp = path + ".tmp"
+        data = json.dumps(self.snapshot(session), ensure_ascii=False, separators=(",", ":"))
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(data)
+        os.replace(tmp, path)
+        self.writes += 1
+
+    def schedule_save(self, session):
+        self._dirty[session.chat_id] = session
+        if self._save_handle is not None:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self.flush()
+            return
+        self._save_handle = loop.call_later(self.save_delay, self.flush)
+
+    def flush(self):
+        if self._save_handle is not None:
+            self._save_handle.cancel()
+            self._save_handle = None
+        dirty, self._dirty = self._dirty, {}
+        for session in dirty.values():
+            try:
+                self.save(session)
+            except OSError as e:
+                logging.warning(f"Gagal simpan snapshot sesi {session.chat_id}: {e}")
+
+    def delete(self, chat_id):
+        self._dirty.pop(chat_id, None)
+        try:
+            os.remove(self._path(chat_id))
+        except FileNotFoundError:
+            pass
+
+    # Semua snapshot yang bisa dibaca, file rusak (misal mati pas nulis .tmp) dilewati
+    def load_all(self):
+        result = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(".json"):
+                continue
+            try:
+                with open(os.path.join(self.directory, name), "r", encoding="utf-8") as f:
+                    result.append(json.load(f))
+            except (OSError, ValueError) as e:
+                logging.warning(f"Snapshot sesi {name} tidak bisa dibaca: {e}")
+        return result
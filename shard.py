@@ -0,0 +1,274 @@
+import asyncio
+import bisect
+import contextlib
+import functools
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+
+from telegram import Bot, Update
+from telegram.error import TelegramError
+
+from webhook import WebhookServer, running, stop_on_signals
+
+# Mode sharded: 1 proses ingress (webhook/polling) + N proses worker di mesin yang sama.
+# Ingress cuma membaca chat_id lalu meneruskan update mentah ke worker pemilik chat itu
+# lewat unix socket (1 baris JSON per update), jadi state sesi tetap lokal di 1 worker.
+
+MAX_LINE = 1 << 20  # batas 1 update per baris
+
+
+def _hash(key):
+    return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "big")
+
+
+# Consistent hashing chat_id -> shard. Tiap shard punya banyak titik di ring,
+# jadi kalau jumlah worker berubah cuma ~1/N chat yang pindah shard.
+class HashRing:
+    def __init__(self, shards, replicas=128):
+        self.shards = shards
+        points = sorted((_hash(f"shard-{shard}-{i}"), shard) for shard in range(shards) for i in range(replicas))
+        self._hashes = [h for h, _ in points]
+        self._owners = [shard for _, shard in points]
+
+    def owner(self, chat_id):
+        i = bisect.bisect(self._hashes, _hash(str(chat_id)))
+        return self._owners[i % len(self._owners)]
+
+
+# Kunci routing dari update mentah: chat-nya, atau user-nya kalau update tidak punya chat (inline dll)
+def chat_key(data):
+    for value in data.values():
+        if not isinstance(value, dict):
+            continue
+        chat = value.get("chat") or (value.get("message") or {}).get("chat")
+        if chat:
+            return chat["id"]
+        user = value.get("from") or value.get("user")
+        if user:
+            return user["id"]
+    return 0
+
+
+# Antrean + koneksi ingress ke 1 worker. Kalau worker sedang restart, update menunggu
+# di antrean (terbatas) dan dikirim ulang setelah tersambung lagi.
+class ShardLink:
+    def __init__(self, index, path, queue_size=1000):
+        self.index = index
+        self.path = path
+        self.queue = asyncio.Queue(maxsize=queue_size)
+        self.sent = 0
+        self.connects = 0
+        self._task = None
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        pending = []
+        while True:
+            try:
+                _, writer = await asyncio.open_unix_connection(self.path)
+            except OSError:
+                # Worker belum siap / sedang restart
+                await asyncio.sleep(0.2)
+                continue
+            self.connects += 1
+            try:
+                while True:
+                    if not pending:
+                        pending.append(await self.queue.get())
+                        # Kirim yang sudah antre sekalian, 1x drain per batch
+                        while len(pending) < 256 and not self.queue.empty():
+                            pending.append(self.queue.get_nowait())
+                    writer.write(b"".join(pending))
+                    await writer.drain()
+                    self.sent += len(pending)
+                    for _ in pending:
+                        self.queue.task_done()
+                    pending = []
+            except OSError:
+                logging.warning(f"Koneksi ke shard {self.index} putus, menyambung ulang")
+            finally:
+                writer.close()
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+
+
+class ShardRouter:
+    def __init__(self, paths, queue_size=1000):
+        self.ring = HashRing(len(paths))
+        self.links = [ShardLink(i, path, queue_size) for i, path in enumerate(paths)]
+        self.routed = 0
+
+    def start(self):
+        for link in self.links:
+            link.start()
+
+    # Dipanggil berurutan oleh 1 task ingress, jadi urutan update per chat tetap terjaga
+    async def dispatch(self, data):
+        line = json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode() + b"\n"
+        await self.links[self.ring.owner(chat_key(data))].queue.put(line)
+        self.routed += 1
+
+    # Kirim sisa antrean dulu (maks `timeout` detik) sebelum koneksi ditutup
+    async def stop(self, timeout=10):
+        try:
+            await asyncio.wait_for(asyncio.gather(*(link.queue.join() for link in self.links)), timeout)
+        except asyncio.TimeoutError:
+            logging.warning(f"Router shard berhenti dengan {sum(l.queue.qsize() for l in self.links)} update belum terkirim")
+        for link in self.links:
+            await link.stop()
+
+    def stats(self):
+        return {
+            "routed": self.routed,
+            "shards": [{"queue": link.queue.qsize(), "sent": link.sent, "connects": link.connects}
+                       for link in self.links],
+        }
+
+
+# Proses worker: `command` dijalankan ulang dengan BOT_MODE=worker + nomor shard-nya.
+# Worker yang mati distart ulang; sesinya dipulihkan dari sessions_db seperti restart biasa.
+class WorkerPool:
+    def __init__(self, command, count, directory, env=None, **popen):
+        self.command = command
+        self.count = count
+        self.paths = [os.path.join(directory, f"shard-{i}.sock") for i in range(count)]
+        self.env = env or {}
+        self.popen = popen
+        self.procs = [None] * count
+        self.restarts = 0
+        self._tasks = []
+        self._stopping = False
+
+    def start(self):
+        self._tasks = [asyncio.create_task(self._supervise(i)) for i in range(self.count)]
+
+    async def _supervise(self, index):
+        env = {**os.environ, **self.env, "BOT_MODE": "worker", "SHARDS": str(self.count),
+               "SHARD_INDEX": str(index), "SHARD_SOCKET": self.paths[index]}
+        while True:
+            proc = self.procs[index] = await asyncio.create_subprocess_exec(*self.command, env=env, **self.popen)
+            code = await proc.wait()
+            if self._stopping:
+                return
+            self.restarts += 1
+            logging.error(f"Worker shard {index} berhenti (exit {code}), start ulang")
+            await asyncio.sleep(1)
+
+    async def stop(self, timeout=15):
+        self._stopping = True
+        procs = [proc for proc in self.procs if proc is not None and proc.returncode is None]
+        for proc in procs:
+            proc.terminate()
+        try:
+            await asyncio.wait_for(asyncio.gather(*(proc.wait() for proc in procs)), timeout)
+        except asyncio.TimeoutError:
+            for proc in procs:
+                if proc.returncode is None:
+                    proc.kill()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def stats(self):
+        return {"workers": self.count, "alive": sum(1 for p in self.procs if p and p.returncode is None),
+                "restarts": self.restarts}
+
+
+async def _receive(server, connections, reader, writer):
+    connections.add(writer)
+    try:
+        while line := await reader.readline():
+            try:
+                data = json.loads(line)
+            except ValueError:
+                logging.warning("Baris update rusak dari ingress dilewati")
+                continue
+            # Antrean penuh -> berhenti baca socket, ingress ikut tertahan (backpressure)
+            await server.queue.put(data)
+    finally:
+        connections.discard(writer)
+        writer.close()
+
+
+# Worker shard: dapat update dari ingress lewat unix socket, sisanya sama dengan mode webhook
+async def run_worker(application, socket_path, queue_size=1000, workers=64, stop_event=None):
+    server = WebhookServer(application, queue_size=queue_size, workers=workers)
+    stop_event = stop_on_signals(stop_event)
+    connections = set()
+    async with running(application):
+        server.start_workers()
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(socket_path)
+        unix = await asyncio.start_unix_server(
+            functools.partial(_receive, server, connections), socket_path, limit=MAX_LINE)
+        logging.info(f"Worker shard siap di {socket_path}")
+        try:
+            await stop_event.wait()
+        finally:
+            unix.close()
+            for writer in list(connections):
+                writer.close()
+            await unix.wait_closed()
+            try:
+                await asyncio.wait_for(server.queue.join(), 10)
+            except asyncio.TimeoutError:
+                pass
+            await server.stop()
+
+
+async def _poll(bot, router, timeout=30):
+    await bot.delete_webhook()
+    offset = None
+    while True:
+        try:
+            updates = await bot.get_updates(offset=offset, timeout=timeout, allowed_updates=Update.ALL_TYPES)
+        except TelegramError as e:
+            logging.warning(f"getUpdates gagal: {e}")
+            await asyncio.sleep(1)
+            continue
+        for update in updates:
+            offset = update.update_id + 1
+            await router.dispatch(update.to_dict())
+
+
+# Proses ingress: start N worker, terima update (webhook kalau webhook_url diisi, selain itu polling)
+# lalu teruskan ke worker pemilik chat-nya sampai dapat SIGINT/SIGTERM.
+async def run_sharded(command, count, token, base_url=None, listen="0.0.0.0", port=8080, path="/webhook",
+                      secret=None, webhook_url=None, queue_size=1000, socket_dir=None, stop_event=None):
+    directory = socket_dir or tempfile.mkdtemp(prefix="quizbot-shards-")
+    pool = WorkerPool(command, count, directory)
+    router = ShardRouter(pool.paths, queue_size)
+    stop_event = stop_on_signals(stop_event)
+    bot = Bot(token, base_url=base_url) if base_url else Bot(token)
+    pool.start()
+    router.start()
+    server = poller = None
+    try:
+        async with bot:
+            if webhook_url:
+                # 1 task penerus saja supaya urutan update per chat tidak teracak
+                server = WebhookServer(None, path, secret, queue_size, workers=1,
+                                       health={"router": router.stats, "workers": pool.stats}, handler=router.dispatch)
+                await server.start(listen, port)
+                await bot.set_webhook(webhook_url + path, secret_token=secret, max_connections=100)
+            else:
+                poller = asyncio.create_task(_poll(bot, router))
+            logging.info(f"Ingress jalan dengan {count} worker shard ({directory})")
+            await stop_event.wait()
+    finally:
+        if server is not None:
+            await server.stop()
+        if poller is not None:
+            poller.cancel()
+            await asyncio.gather(poller, return_exceptions=True)
+        await router.stop()
+        await pool.stop()
+        if socket_dir is None:
+            shutil.rmtree(directory, ignore_errors=True)
@@ -0,0 +1,98 @@
+import asyncio
+import gzip
+import heapq
+import json
+import logging
+import os
+import time
+import zlib
+
+# Rekaman update masuk untuk diputar ulang (bench/replay.py): JSONL di-gzip, baris pertama header
+# (plus `meta`, misal timeout soal bot), lalu satu baris [waktu unix, update JSON] per update.
+# Isinya data asli pengguna (nama, teks), jadi cuma dinyalakan sementara lewat UPDATE_LOG dan
+# filenya diperlakukan seperti data produksi.
+FORMAT = "quiz-updates"
+VERSION = 1
+
+
+# Baris ditampung di memori lalu ditulis + di-flush (sync flush gzip) per flush_delay, supaya
+# rekaman tetap terbaca sampai flush terakhir walau proses mati tanpa sempat close().
+class UpdateRecorder:
+    def __init__(self, path, meta=None, flush_delay=1, max_pending=256):
+        self.path = path
+        self.flush_delay = flush_delay
+        self.max_pending = max_pending
+        self.recorded = 0
+        self._pending = []
+        self._flush_handle = None
+        self._file = gzip.open(path, "at", encoding="utf-8")
+        header = {"format": FORMAT, "version": VERSION, "started": time.time(), "pid": os.getpid(), "meta": meta or {}}
+        self._write([json.dumps(header)])
+
+    def record(self, data, received=None):
+        received = time.time() if received is None else received
+        self._pending.append(json.dumps([round(received, 3), data], ensure_ascii=False, separators=(",", ":")))
+        self.recorded += 1
+        if len(self._pending) >= self.max_pending:
+            self.flush()
+        elif self._flush_handle is None:
+            try:
+                self._flush_handle = asyncio.get_running_loop().call_later(self.flush_delay, self.flush)
+            except RuntimeError:
+                self.flush()
+
+    def _write(self, lines):
+        self._file.write("\n".join(lines) + "\n")
+        self._file.flush()
+
+    def flush(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        pending, self._pending = self._pending, []
+        if not pending or self._file is None:
+            return
+        try:
+            self._write(pending)
+        except OSError as e:
+            logging.warning(f"Gagal tulis rekaman update ke {self.path}: {e}")
+
+    def close(self):
+        self.flush()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+def _check(path, header):
+    if header.get("format") != FORMAT or header.get("version", 0) > VERSION:
+        raise ValueError(f"{path}: bukan rekaman {FORMAT} v{VERSION}")
+    return header
+
+
+def read_header(path):
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        return _check(path, json.loads(f.readline()))
+
+
+# Update dari satu file rekaman: (waktu, update). Satu file bisa berisi beberapa run (mode append);
+# ekor yang terpotong (proses mati di tengah flush) dilewati.
+def read_log(path):
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        try:
+            for line in f:
+                try:
+                    row = json.loads(line)
+                except ValueError:
+                    continue
+                if isinstance(row, dict):
+                    _check(path, row)
+                    continue
+                yield row[0], row[1]
+        except (EOFError, zlib.error, gzip.BadGzipFile):
+            logging.warning(f"Rekaman {path} terpotong, sisanya dilewati")
+
+
+# Gabungan beberapa rekaman (misal satu file per shard) urut waktu
+def read_logs(paths):
+    return heapq.merge(*(read_log(path) for path in paths), key=lambda row: row[0])
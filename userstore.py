@@ -0,0 +1,161 @@
+import asyncio
+import contextlib
+import json
+import logging
+import os
+import threading
+import time
+
+from filelock import file_lock
+
+
+# Kapan data user terakhir dianggap segar: terlihat di update, atau terakhir dicoba get_chat
+def _fresh_at(entry):
+    return max(entry["seen"], entry.get("checked", 0))
+
+
+# Direktori profil user (id -> nama), disimpan di samping scores_db.json.
+# shared=True: file yang sama ditulis beberapa proses (mode sharded), simpan pakai lock + merge.
+class UserDirectory:
+    def __init__(self, path, save_delay=5, touch_interval=86400, shared=False):
+        self.path = path
+        self.shared = shared
+        self.save_delay = save_delay
+        self.touch_interval = touch_interval
+        self.users = self._load()
+        self._save_handle = None
+        self._save_task = None
+        self._lock = threading.Lock()  # tulis file di thread, flush() saat shutdown di loop
+        self._version = 0  # nomor snapshot terakhir
+        self._written = 0  # snapshot lebih lama dari yang sudah ditulis tidak boleh menimpa
+
+    def _load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+
+    # Upsert dari objek User, return True kalau ada perubahan yang perlu disimpan
+    def upsert(self, user, now=None):
+        if user is None or user.is_bot:
+            return False
+        now = time.time() if now is None else now
+        key = str(user.id)
+        entry = self.users.get(key)
+        if entry and entry["name"] == user.first_name and entry.get("username") == user.username:
+            # Cuma perbarui timestamp sesekali biar tidak nulis file terus
+            if now - entry["seen"] < self.touch_interval:
+                return False
+            entry["seen"] = now
+            return True
+        self.users[key] = {"name": user.first_name, "username": user.username, "seen": now}
+        return True
+
+    def set_name(self, user_id, name, now=None):
+        entry = self.users.setdefault(str(user_id), {"name": name, "username": None})
+        entry["name"] = name
+        entry["seen"] = time.time() if now is None else now
+
+    def name(self, user_id):
+        entry = self.users.get(str(user_id))
+        return entry["name"] if entry else None
+
+    # User yang belum pernah terlihat atau datanya sudah lama
+    def stale(self, user_ids, max_age, now=None):
+        now = time.time() if now is None else now
+        result = []
+        for uid in user_ids:
+            entry = self.users.get(str(uid))
+            if entry is None or now - _fresh_at(entry) > max_age:
+                result.append(uid)
+        return result
+
+    # Salinan per entri: thread penulis tidak ikut membaca dict yang sedang diubah event loop
+    def _snapshot(self):
+        self._version += 1
+        return {key: dict(entry) for key, entry in self.users.items()}, self._version
+
+    # Tulis snapshot ke file (jalan di thread). Mode shared: gabung dulu dengan tulisan proses lain
+    # di bawah lock file, return entri proses lain yang lebih segar untuk dimasukkan ke self.users.
+    def _save(self, users, version):
+        with self._lock:
+            if version < self._written:
+                return {}
+            newer = {}
+            with file_lock(self.path) if self.shared else contextlib.nullcontext():
+                if self.shared:
+                    # Per user yang paling baru segar yang menang
+                    for key, entry in self._load().items():
+                        mine = users.get(key)
+                        if mine is None or _fresh_at(entry) > _fresh_at(mine):
+                            users[key] = newer[key] = entry
+                self._write(users)
+            self._written = version
+            return newer
+
+    def _merge(self, newer):
+        for key, entry in newer.items():
+            mine = self.users.get(key)
+            if mine is None or _fresh_at(entry) > _fresh_at(mine):
+                self.users[key] = entry
+
+    def save(self):
+        self._merge(self._save(*self._snapshot()))
+
+    # Lock file + baca + tulis seluruh file di thread, event loop (dan worker shard lain) tidak tertahan
+    async def _save_in_thread(self):
+        try:
+            self._merge(await asyncio.to_thread(self._save, *self._snapshot()))
+        except OSError as e:
+            logging.warning(f"Gagal simpan {self.path}: {e}")
+
+    def _start_save(self):
+        self._save_handle = None
+        self._save_task = asyncio.ensure_future(self._save_in_thread())
+
+    def _write(self, users):
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(users, f, ensure_ascii=False)
+        os.replace(tmp, self.path)
+
+    # Simpan dengan debounce, banyak upsert -> 1x tulis file
+    def schedule_save(self):
+        if self._save_handle is not None:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self.save()
+            return
+        self._save_handle = loop.call_later(self.save_delay, self._start_save)
+
+    # Saat shutdown: tulis langsung yang masih pending (snapshot di thread yang lebih lama dilewati)
+    def flush(self):
+        if self._save_handle is not None:
+            self._save_handle.cancel()
+            self._save_handle = None
+            self.save()
+
+    # Catat percobaan get_chat apa pun hasilnya (nama sama / gagal), supaya id yang sama
+    # tidak dicoba lagi sebelum max_age lewat. User yang belum dikenal dapat entri tanpa nama.
+    def mark_checked(self, user_id, now=None):
+        entry = self.users.setdefault(str(user_id), {"name": None, "username": None, "seen": 0})
+        entry["checked"] = time.time() if now is None else now
+
+    # Refresh nama yang basi lewat get_chat, dijalankan di background
+    async def refresh(self, name_cache, bot, user_ids, max_age):
+        stale = self.stale(user_ids, max_age)
+        if not stale:
+            return
+        names = await name_cache.get_many(bot, stale)
+        now = time.time()
+        changed = 0
+        for uid, name in zip(stale, names):
+            if name and name != self.name(uid):
+                self.set_name(uid, name, now)
+                changed += 1
+            self.mark_checked(uid, now)
+        self.schedule_save()
+        logging.info(f"user directory refresh: {len(stale)} stale, changed={changed}")
@@ -0,0 +1,147 @@
+import asyncio
+import contextlib
+import hmac
+import logging
+import signal
+import time
+
+from aiohttp import web
+from telegram import Update
+
+
+# Server webhook (aiohttp) dengan antrean update terbatas.
+# Kalau antrean penuh, Telegram dapat 503 dan akan kirim ulang update-nya nanti.
+# handler(data) menggantikan process_update, misal ingress mode sharded yang cuma meneruskan update.
+class WebhookServer:
+    def __init__(self, application, path="/webhook", secret=None, queue_size=1000, workers=64, health=None,
+                 handler=None, metrics=None):
+        self.application = application
+        self.handler = handler or self.process
+        self.health = health or {}  # nama -> fungsi stats() yang ikut ditampilkan di /health
+        self.path = path
+        self.secret = secret
+        self.queue = asyncio.Queue(maxsize=queue_size)
+        self.workers = workers
+        self.received = 0
+        self.rejected = 0
+        self.processed = 0
+        self.started_at = time.time()
+        self._tasks = []
+        self._runner = None
+
+        self.web_app = web.Application()
+        self.web_app.router.add_post(path, self.handle_update)
+        self.web_app.router.add_get("/health", self.handle_health)
+        if metrics is not None:
+            self.web_app.router.add_get("/metrics", metrics)
+
+    async def handle_update(self, request):
+        if self.secret:
+            token = request.headers.get("X-Telegram-Bot-Api-Secret-Token", "")
+            if not hmac.compare_digest(token, self.secret):
+                return web.Response(status=403)
+
+        try:
+            data = await request.json()
+        except ValueError:
+            return web.Response(status=400)
+
+        try:
+            self.queue.put_nowait(data)
+        except asyncio.QueueFull:
+            self.rejected += 1
+            return web.Response(status=503, headers={"Retry-After": "1"})
+        self.received += 1
+        return web.Response()
+
+    async def handle_health(self, request):
+        extra = {name: stats() for name, stats in self.health.items()}
+        return web.json_response({
+            "ok": True,
+            "uptime": time.time() - self.started_at,
+            "queue": self.queue.qsize(),
+            "queue_max": self.queue.maxsize,
+            "received": self.received,
+            "rejected": self.rejected,
+            "processed": self.processed,
+            **extra,
+        })
+
+    async def process(self, data):
+        await self.application.process_update(Update.de_json(data, self.application.bot))
+
+    async def _worker(self):
+        while True:
+            data = await self.queue.get()
+            try:
+                await self.handler(data)
+            except Exception:
+                logging.exception("Gagal memproses update dari webhook")
+            finally:
+                self.processed += 1
+                self.queue.task_done()
+
+    # Worker antrean saja, tanpa HTTP (dipakai worker shard yang dapat update dari unix socket)
+    def start_workers(self):
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def start(self, listen="0.0.0.0", port=8080):
+        if not self.secret:
+            raise ValueError("Server webhook butuh secret, tanpa itu update palsu bisa masuk")
+        self.start_workers()
+        self._runner = web.AppRunner(self.web_app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, listen, port).start()
+        logging.info(f"Webhook server jalan di {listen}:{port}{self.path}")
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+
+# stop_event di-set saat SIGINT/SIGTERM
+def stop_on_signals(stop_event=None):
+    stop_event = stop_event or asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop_event.set)
+        except (NotImplementedError, RuntimeError):
+            pass
+    return stop_event
+
+
+# Siklus hidup Application tanpa updater bawaan (initialize/start ... stop/shutdown + hook-nya)
+@contextlib.asynccontextmanager
+async def running(application):
+    await application.initialize()
+    if application.post_init:
+        await application.post_init(application)
+    await application.start()
+    try:
+        yield application
+    finally:
+        await application.stop()
+        if application.post_stop:
+            await application.post_stop(application)
+        await application.shutdown()
+        if application.post_shutdown:
+            await application.post_shutdown(application)
+
+
+# Jalankan bot dalam mode webhook sampai dapat SIGINT/SIGTERM
+async def run_webhook(application, listen, port, path, secret=None, webhook_url=None, queue_size=1000, workers=64,
+                      stop_event=None, health=None, metrics=None):
+    server = WebhookServer(application, path, secret, queue_size, workers, health, metrics=metrics)
+    stop_event = stop_on_signals(stop_event)
+    async with running(application):
+        await server.start(listen, port)
+        if webhook_url:
+            await application.bot.set_webhook(webhook_url + path, secret_token=secret, max_connections=100)
+        try:
+            await stop_event.wait()
+        finally:
+            await server.stop()
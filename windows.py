@@ -0,0 +1,34 @@
+import datetime
+import os
+
+# Leaderboard per periode kalender: hari ini, minggu ini (ISO, mulai Senin), bulan ini.
+# Skor tiap periode disimpan sebagai bucket sendiri; begitu periodenya ganti,
+# bucket lama langsung dibuang dan bucket baru mulai dari nol.
+WINDOWS = ("day", "week", "month")
+
+# Nama yang bisa dipakai di command, misal /leaderboard minggu
+ALIASES = {
+    "day": "day", "hari": "day", "harian": "day", "today": "day",
+    "week": "week", "minggu": "week", "mingguan": "week",
+    "month": "month", "bulan": "month", "bulanan": "month",
+    "all": None, "semua": None,
+}
+
+LABELS = {None: "grup ini", "day": "hari ini", "week": "minggu ini", "month": "bulan ini"}
+
+# Batas hari/minggu/bulan mengikuti zona waktu grup (default WIB)
+TZ = datetime.timezone(datetime.timedelta(hours=float(os.environ.get("LEADERBOARD_TZ_OFFSET", 7))))
+
+
+def period_key(window, ts):
+    date = datetime.datetime.fromtimestamp(ts, TZ).date()
+    if window == "day":
+        return date.isoformat()
+    if window == "week":
+        year, week, _ = date.isocalendar()
+        return f"{year}-W{week:02d}"
+    return f"{date.year}-{date.month:02d}"
+
+
+def current_periods(ts):
+    return {window: period_key(window, ts) for window in WINDOWS}